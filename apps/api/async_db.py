@@ -0,0 +1,146 @@
+"""Database access of the async views, on a psycopg 3 connection pool.
+
+Under ASGI, Django's async ORM still runs every query in a thread with a
+connection of its own. The async views instead build their queries with the
+ORM as usual, and ``fetch_values()`` runs the compiled SQL on a pool of
+psycopg async connections: a request waiting for Postgres holds a coroutine,
+not a thread or a worker process, and each worker opens at most
+``ASYNC_DB_POOL_MAX_SIZE`` connections.
+
+Each endpoint gets ``ASYNC_<ENDPOINT>_CONCURRENCY`` slots, so that a burst of
+batch searches cannot take every connection from ``/search/``. A request that
+waits more than ``ASYNC_QUEUE_TIMEOUT`` seconds for a slot is refused
+(``Overloaded``), and the statements of one that runs longer than
+``ASYNC_<ENDPOINT>_TIMEOUT`` are cancelled: psycopg cancels the running
+statement, and a matching ``statement_timeout`` stops it on the server should
+the cancel get lost. A client that disconnects cancels its statement too.
+The statements are not prepared (see ``apps.api.prepared``): a statement bound
+on the server cannot share its query string with the ``SET``, and the extra
+round trip costs more than parsing a search.
+
+The pool belongs to the event loop of the worker, so these views need an
+ASGI server (``ASYNC_VIEWS``, set by ``asgi.py``).
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ImproperlyConfigured
+from psycopg import AsyncClientCursor
+from psycopg_pool import AsyncConnectionPool
+
+from . import instrumentation, prepared
+
+_pool = None
+_pool_loop = None
+_semaphores = {}
+_deadline = contextvars.ContextVar("async_db_deadline", default=None)
+
+
+class Overloaded(Exception):
+    """No slot of the endpoint freed up within ``ASYNC_QUEUE_TIMEOUT``."""
+
+
+def connection_kwargs(alias="default"):
+    """psycopg connection arguments of a ``DATABASES`` entry."""
+    database = settings.DATABASES[alias]
+    kwargs = {
+        "dbname": database["NAME"],
+        "user": database["USER"],
+        "password": database["PASSWORD"],
+        "host": database["HOST"],
+        "port": database["PORT"],
+        "options": database.get("OPTIONS", {}).get("options"),
+    }
+    return {key: value for key, value in kwargs.items() if value}
+
+
+def get_pool():
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool is None:
+        _pool = AsyncConnectionPool(
+            min_size=settings.ASYNC_DB_POOL_MIN_SIZE,
+            max_size=settings.ASYNC_DB_POOL_MAX_SIZE,
+            # client-side binding, like Django: the compiled SQL runs unchanged
+            kwargs={**connection_kwargs(), "autocommit": True, "cursor_factory": AsyncClientCursor},
+            check=AsyncConnectionPool.check_connection if settings.DB_CONN_HEALTH_CHECKS else None,
+            max_idle=settings.DB_POOL_MAX_IDLE,
+            open=False,
+            name="async-views",
+        )
+        _pool_loop = loop
+    elif _pool_loop is not loop:
+        raise ImproperlyConfigured("The async views need an ASGI server, see ASYNC_VIEWS.")
+    return _pool
+
+
+async def fetch(sql, params):
+    """Run ``sql`` on the pool and return its rows.
+
+    Inside ``slot()``, raises ``asyncio.TimeoutError`` past the deadline of
+    the request, the statement being cancelled.
+    """
+    pool = get_pool()
+    if pool.closed:
+        await pool.open()
+    timeout = None
+    deadline = _deadline.get()
+    if deadline is not None:
+        timeout = deadline - asyncio.get_running_loop().time()
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        # one round trip: the statements of a query string share a transaction
+        sql = f"SET LOCAL statement_timeout = {max(int(timeout * 1000), 1)}; {sql}"
+
+    async def run():
+        async with pool.connection() as connection:
+            cursor = connection.cursor()
+            await cursor.execute(sql, params)
+            if deadline is not None:
+                cursor.nextset()
+            return await cursor.fetchall()
+
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(run(), timeout)
+    finally:
+        instrumentation.record_query(time.perf_counter() - started)
+
+
+async def fetch_values(queryset):
+    """Evaluate a ``values()`` queryset on the pool, as a list of dicts."""
+    try:
+        sql, params, shape = prepared.compile_values(queryset)
+    except EmptyResultSet:
+        return []
+    return shape(await fetch(sql, params))
+
+
+def _semaphore(endpoint):
+    if endpoint not in _semaphores:
+        _semaphores[endpoint] = asyncio.Semaphore(getattr(settings, f"ASYNC_{endpoint.upper()}_CONCURRENCY"))
+    return _semaphores[endpoint]
+
+
+@asynccontextmanager
+async def slot(endpoint):
+    """Run the block in one of the slots of ``endpoint``, its statements within its timeout.
+
+    Raises ``Overloaded`` when no slot frees up in time.
+    """
+    semaphore = _semaphore(endpoint)
+    try:
+        await asyncio.wait_for(semaphore.acquire(), settings.ASYNC_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise Overloaded(endpoint)
+    timeout = getattr(settings, f"ASYNC_{endpoint.upper()}_TIMEOUT")
+    token = _deadline.set(asyncio.get_running_loop().time() + timeout)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+        semaphore.release()
@@ -0,0 +1,188 @@
+"""Async versions of ``/search/``, ``/search/batch/`` and ``/autocomplete/``.
+
+``urls.py`` routes these paths here when ``ASYNC_VIEWS`` is on, which
+``asgi.py`` does. The queries are the ones of the DRF views, run on the pool
+of ``apps.api.async_db`` in one of the slots of their endpoint. A request
+refused for lack of a slot gets a 503, one that runs out of time a 504. The
+cache, the memory index and ``embed=`` still use the sync ORM or the Django
+cache, and run in the thread pool. ``/search/batch/`` first authenticates,
+checks the permissions and throttles of its DRF view, in the thread pool too.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    ValidationError,
+)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import async_db
+from . import cache as search_cache
+from . import http_cache, serializers, views
+from .batch import andjson_lines, asearch_batch
+from .pagination import KeysetPagination
+
+
+def in_thread(function):
+    # the threads of the default executor, not one per request
+    return sync_to_async(function, thread_sensitive=False)
+
+
+def drf_request(request):
+    """Wrap ``request`` like the DRF views do, for ``query_params`` and ``data``."""
+    return Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+
+
+def checked_request(view_class, request):
+    """``request`` as the DRF view ``view_class`` sees it, once authenticated, permitted and throttled."""
+    view = view_class()
+    view.args, view.kwargs = (), {}
+    request = view.initialize_request(request)
+    view.request = request
+    try:
+        view.perform_authentication(request)
+        view.check_permissions(request)
+        view.check_throttles(request)
+    except (NotAuthenticated, AuthenticationFailed) as e:
+        # as in APIView.handle_exception
+        header = view.get_authenticate_header(request)
+        if header:
+            e.auth_header = header
+        else:
+            e.status_code = 403
+        raise
+    return request
+
+
+def error(message, status, **headers):
+    return JsonResponse({"error": message}, status=status, headers=headers)
+
+
+def exception_response(e):
+    # the body DRF's exception handler gives the same exception
+    detail = e.detail if isinstance(e, ValidationError) else {"detail": e.detail}
+    headers = {}
+    if getattr(e, "auth_header", None):
+        headers["WWW-Authenticate"] = e.auth_header
+    if getattr(e, "wait", None):
+        headers["Retry-After"] = "%d" % e.wait
+    return JsonResponse(detail, status=e.status_code, safe=False, headers=headers)
+
+
+async def answer(endpoint, handler, *args):
+    """Await the response of ``handler(*args)`` in a slot of ``endpoint``, with its errors as responses."""
+    try:
+        async with async_db.slot(endpoint):
+            return await handler(*args)
+    except APIException as e:
+        return exception_response(e)
+    except async_db.Overloaded:
+        return error("Too many concurrent requests, retry later.", 503, **{"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        return error("The request took too long and was cancelled.", 504)
+
+
+def documented_as(api_view, view):
+    """``view``, documented in the OpenAPI schema like the DRF view ``api_view``."""
+    view.cls = api_view.cls
+    view.initkwargs = api_view.initkwargs
+    view.csrf_exempt = True
+    return view
+
+
+@http_cache.conditional(http_cache.search_etag)
+async def search(request):
+    request = drf_request(request)
+    query = request.query_params.get("query", "")
+    if not query:
+        return error("Query parameter 'query' is required.", 400)
+    return await answer("search", search_response, request, query)
+
+
+async def search_response(request, query):
+    cache_key = await in_thread(search_cache.search_cache_key)(request)
+    data = await in_thread(search_cache.lookup)(cache_key)
+    if data is None:
+        data = await search_data(request, query)
+        await in_thread(search_cache.store)(cache_key, data)
+    return JsonResponse(data)
+
+
+async def search_data(request, query):
+    fields = serializers.parse_term_fields(request)
+    compact = serializers.is_compact(request)
+    embed = serializers.parse_embed(request)
+    if settings.SEARCH_BACKEND == "memory":
+        data = await in_thread(views.SearchView().search_memory)(request, query, fields, compact, embed)
+        if data is not None:
+            return data
+
+    paginator = KeysetPagination()
+    terms = paginator.page_queryset(views.search_terms(request, query, fields), request)
+    page = paginator.paginate_rows(await async_db.fetch_values(terms))
+    if embed:
+        return await in_thread(views.paginated_terms)(paginator, page, fields, compact, embed)
+    return views.paginated_terms(paginator, page, fields, compact)
+
+
+async def search_batch(request):
+    try:
+        # the session, user and throttle history live in the database and the cache
+        request = await sync_to_async(checked_request)(views.SearchBatchView, request)
+        body = serializers.SearchBatchSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        fields = serializers.parse_term_fields(request)
+    except APIException as e:
+        return exception_response(e)
+    compact = serializers.is_compact(request)
+    queries, limit = body.validated_data["queries"], body.validated_data["limit"]
+
+    stream = request.query_params.get("stream", "").lower() in ("true", "1")
+    if stream or "application/x-ndjson" in request.headers.get("Accept", ""):
+        return StreamingHttpResponse(
+            stream_batch(queries, limit, fields, compact), content_type="application/x-ndjson"
+        )
+    return await answer("batch", batch_response, queries, limit, fields, compact)
+
+
+async def batch_response(queries, limit, fields, compact):
+    results = []
+    ontologies = {}
+    async for query, hits, new in asearch_batch(queries, limit, fields, compact):
+        results.append({"query": query, "results": hits})
+        ontologies.update(new)
+    data = {"results": results}
+    if compact:
+        data["ontologies"] = ontologies
+    return JsonResponse(data)
+
+
+async def stream_batch(queries, limit, fields, compact):
+    # the status line is sent before the first chunk, later errors end the stream with an error line
+    try:
+        async with async_db.slot("batch"):
+            async for line in andjson_lines(asearch_batch(queries, limit, fields, compact), compact):
+                yield line
+    except async_db.Overloaded:
+        yield '{"error":"Too many concurrent requests, retry later."}\n'
+    except asyncio.TimeoutError:
+        yield '{"error":"The request took too long and was cancelled."}\n'
+
+
+async def autocomplete(request):
+    request = drf_request(request)
+    query, limit, message = views.autocomplete_params(request)
+    if message:
+        return error(message, 400)
+    return await answer("autocomplete", autocomplete_response, query, limit)
+
+
+async def autocomplete_response(query, limit):
+    return JsonResponse(await async_db.fetch_values(views.autocomplete_terms(query, limit)), safe=False)
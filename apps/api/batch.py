@@ -0,0 +1,134 @@
+"""Top-k search for many queries at once.
+
+Each chunk of queries is answered by one statement: the queries are passed
+as an array, turned into tsqueries with ``unnest ... WITH ORDINALITY``, and
+every one of them picks its top-k terms in a ``LATERAL`` subquery that uses
+the GIN index on ``search_vector``. The ranking is the one of ``/search/``.
+"""
+
+import json
+
+from django.conf import settings
+from django.db import connection
+
+from apps.ontologies import models
+
+from . import async_db, instrumentation, serializers
+
+
+TOP_K_SQL = """
+    WITH batch AS (
+        SELECT q.position, websearch_to_tsquery(%s::regconfig, q.text) AS tsquery
+        FROM unnest(%s::text[]) WITH ORDINALITY AS q(text, position)
+    )
+    SELECT batch.position, hit.uri
+    FROM batch
+    CROSS JOIN LATERAL (
+        SELECT t.uri, t.is_favorite,
+               t.static_score * ts_rank(t.search_vector, batch.tsquery) AS score
+        FROM {term} t
+        WHERE t.search_vector @@ batch.tsquery AND NOT t.is_obsolete
+        ORDER BY t.is_favorite DESC, score DESC, t.uri COLLATE "C"
+        LIMIT %s
+    ) hit
+    ORDER BY batch.position, hit.is_favorite DESC, hit.score DESC, hit.uri COLLATE "C"
+"""
+
+
+def top_k_statement(queries, limit):
+    """The SQL and parameters ranking ``queries``, read back with ``ranked_uris``."""
+    return (
+        TOP_K_SQL.format(term=models.Term._meta.db_table),
+        [models.SEARCH_CONFIG, list(queries), limit],
+    )
+
+
+def ranked_uris(rows, count):
+    """The term URIs of each of the ``count`` queries, from the rows of ``top_k_statement``."""
+    ranked = [[] for _ in range(count)]
+    for position, uri in rows:
+        ranked[position - 1].append(uri)
+    return ranked
+
+
+def top_k(queries, limit):
+    """Return the ranked term URIs of each query, in the order of ``queries``."""
+    sql, params = top_k_statement(queries, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return ranked_uris(cursor.fetchall(), len(queries))
+
+
+def batch_columns(fields):
+    columns = serializers.term_columns(fields)
+    if "uri" not in columns:
+        columns.append("uri")
+    return columns
+
+
+def hit_rows(ranked, columns):
+    """The ``values()`` queryset of the terms ranked for a chunk."""
+    uris = {uri for hits in ranked for uri in hits}
+    return models.Term.objects.filter(uri__in=uris).values(*columns)
+
+
+def shape_chunk(chunk, ranked, rows, fields, compact, sent):
+    """Yield ``(query, results, ontologies)`` for each query of a chunk, see ``search_batch``."""
+    rows = {row["uri"]: row for row in rows}
+    for query, hits in zip(chunk, ranked):
+        with instrumentation.timing("serialize"):
+            results, ontologies = serializers.serialize_terms(
+                [rows[uri] for uri in hits if uri in rows], fields, compact
+            )
+        new = {uri: ontology for uri, ontology in ontologies.items() if uri not in sent}
+        sent.update(new)
+        yield query, results, new
+
+
+def chunks(queries):
+    chunk_size = settings.SEARCH_BATCH_CHUNK_SIZE
+    for start in range(0, len(queries), chunk_size):
+        yield queries[start: start + chunk_size]
+
+
+def search_batch(queries, limit, fields, compact):
+    """Yield ``(query, results, ontologies)`` for each query, one chunk at a time.
+
+    With ``compact``, ``ontologies`` only holds the ontologies not yet yielded.
+    """
+    columns = batch_columns(fields)
+    sent = set()
+    for chunk in chunks(queries):
+        with instrumentation.explain_slow_queries():
+            ranked = top_k(chunk, limit)
+        rows = hit_rows(ranked, columns)
+        yield from shape_chunk(chunk, ranked, rows, fields, compact, sent)
+
+
+async def asearch_batch(queries, limit, fields, compact):
+    """``search_batch`` on the async connection pool, see ``apps.api.async_db``."""
+    columns = batch_columns(fields)
+    sent = set()
+    for chunk in chunks(queries):
+        sql, params = top_k_statement(chunk, limit)
+        ranked = ranked_uris(await async_db.fetch(sql, params), len(chunk))
+        rows = await async_db.fetch_values(hit_rows(ranked, columns))
+        for item in shape_chunk(chunk, ranked, rows, fields, compact, sent):
+            yield item
+
+
+def ndjson_lines(batch, compact):
+    for query, results, ontologies in batch:
+        yield ndjson_line(query, results, ontologies, compact)
+
+
+async def andjson_lines(batch, compact):
+    async for query, results, ontologies in batch:
+        yield ndjson_line(query, results, ontologies, compact)
+
+
+def ndjson_line(query, results, ontologies, compact):
+    line = {"query": query, "results": results}
+    if compact:
+        line["ontologies"] = ontologies
+    return json.dumps(line, separators=(",", ":")) + "\n"
@@ -0,0 +1,78 @@
+"""Result cache for the search endpoints.
+
+Entries are keyed by the normalized request and by the generation token of
+the ontologies (see ``apps.ontologies.generations``), so ingests and edits
+invalidate them without explicit deletes. Hits and misses are counted in
+process, by a Prometheus counter (``/metrics``, which adds up the workers
+with ``PROMETHEUS_MULTIPROC_DIR``): counting them in the shared cache would
+cost a read-modify-write of the cache on every search.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import REGISTRY
+
+from apps.ontologies.generations import generation_token
+from apps.ontologies.search_index import get_index
+
+from .instrumentation import SEARCH_CACHE_LOOKUPS
+
+
+def normalize_query(query: str):
+    # tsquery matching is case-insensitive, except for the websearch OR keyword
+    return " ".join(
+        word if word == "OR" else word.lower() for word in query.split()
+    )
+
+
+def backend_token():
+    """Which backend answers, and for the in-memory one which index file."""
+    if settings.SEARCH_BACKEND == "memory":
+        index = get_index()
+        if index is not None:
+            # the index is rebuilt after the generation is bumped, key on it too
+            return f"memory-{index.identity}"
+    return "postgres"
+
+
+def search_cache_key(request, query_param="query"):
+    params = {
+        key: sorted(request.query_params.getlist(key))
+        for key in request.query_params
+    }
+    if query_param in params:
+        params[query_param] = [normalize_query(q) for q in params[query_param]]
+    request_key = json.dumps(
+        [request.get_host(), request.path, sorted(params.items())]
+    )
+    digest = hashlib.sha1(request_key.encode()).hexdigest()
+    return f"search:{backend_token()}:{generation_token()}:{digest}"
+
+
+def lookup(key):
+    value = cache.get(key)
+    SEARCH_CACHE_LOOKUPS.labels("miss" if value is None else "hit").inc()
+    return value
+
+
+def store(key, value):
+    cache.set(key, value, timeout=settings.SEARCH_CACHE_TIMEOUT)
+
+
+def _lookups(result):
+    return int(REGISTRY.get_sample_value("ontology_api_search_cache_lookups_total", {"result": result}) or 0)
+
+
+def stats():
+    """The hit and miss counts of this worker process."""
+    hits = _lookups("hit")
+    misses = _lookups("miss")
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total else None,
+    }
@@ -0,0 +1,84 @@
+"""HTTP validators for the read endpoints.
+
+``/terms/``, ``/ontologies/`` and ``/search/`` only answer differently once a
+generation changes (see ``apps.ontologies.generations``), so their ETag is
+derived from the generation token and the request instead of the response.
+``conditional()`` answers a matching ``If-None-Match`` with a 304 before the
+view runs, and lets browsers and shared caches (a reverse proxy, a CDN in
+front of the route) reuse a response for ``HTTP_CACHE_MAX_AGE`` seconds, then
+revalidate it. The generations are read from the shared cache, so every
+worker hands out the same tag and an ``ingest`` run invalidates them all.
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from apps.ontologies.generations import generation_token
+
+from .cache import backend_token
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def _etag(request, *tokens):
+    # the absolute URL: the next links of a page embed the host
+    state = json.dumps([*tokens, request.build_absolute_uri(), request.headers.get("Accept", "")])
+    return quote_etag(hashlib.sha1(state.encode()).hexdigest())
+
+
+def data_etag(request):
+    return _etag(request, generation_token())
+
+
+def search_etag(request):
+    # the memory index is rebuilt after the generation is bumped, like the result cache
+    return _etag(request, generation_token(), backend_token())
+
+
+def add_validators(response, etag):
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=settings.HTTP_CACHE_MAX_AGE)
+        # Cookie: the session middleware adds it to a 200, a 304 must match
+        patch_vary_headers(response, ["Accept", "Cookie"])
+    return response
+
+
+def conditional(etag_func):
+    """Decorate a view whose reads are validated by ``etag_func(request)``."""
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_view(request, *args, **kwargs):
+                if request.method not in SAFE_METHODS:
+                    return await view(request, *args, **kwargs)
+                # the generation token may need a query on a cold cache
+                etag = await sync_to_async(etag_func, thread_sensitive=False)(request)
+                response = get_conditional_response(request, etag=etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return add_validators(response, etag)
+
+            return async_view
+
+        @wraps(view)
+        def sync_view(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return view(request, *args, **kwargs)
+            etag = etag_func(request)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return add_validators(response, etag)
+
+        return sync_view
+
+    return decorator
@@ -0,0 +1,242 @@
+"""Per-request instrumentation: query count, database time, serialization time and size.
+
+``InstrumentationMiddleware`` counts the SQL statements of every request with
+a database execute wrapper, and the views time their own phases with
+``timing()``. Each response gets a ``Server-Timing`` header, and the figures
+feed Prometheus histograms served by ``/metrics``. With several worker
+processes, set ``PROMETHEUS_MULTIPROC_DIR`` so that ``/metrics`` adds up every
+worker instead of reporting the one that answered the scrape.
+
+With ``SLOW_QUERY_MS`` set, the queries run inside ``explain_slow_queries()``
+(the search statements) that are slower than that are run again under
+``EXPLAIN ANALYZE``, and their plan is logged to ``apps.api.slow_queries``.
+"""
+
+import contextvars
+import logging
+import os
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+slow_queries = logging.getLogger("apps.api.slow_queries")
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUEST_SECONDS = Histogram(
+    "ontology_api_request_seconds", "Time spent answering a request", ["view", "method", "status"]
+)
+DB_QUERIES = Histogram(
+    "ontology_api_db_queries", "SQL statements run by a request", ["view"], buckets=QUERY_BUCKETS
+)
+DB_SECONDS = Histogram("ontology_api_db_seconds", "Time a request spent in SQL statements", ["view"])
+SERIALIZE_SECONDS = Histogram(
+    "ontology_api_serialize_seconds", "Time a request spent shaping and rendering its results", ["view"]
+)
+RESPONSE_BYTES = Histogram(
+    "ontology_api_response_bytes", "Size of the response body", ["view"], buckets=SIZE_BUCKETS
+)
+SEARCH_CACHE_LOOKUPS = Counter(
+    "ontology_api_search_cache_lookups", "Lookups in the search result cache", ["result"]
+)
+
+# phases added up as serialization
+SERIALIZE_PHASES = ("serialize", "render")
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.phases = {}
+        self.explain = False
+        # the execute wrappers installed in the thread of a sync view under ASGI
+        self.wrappers = None
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timing(phase):
+    """Add the time spent in the block to ``phase`` of the current request, if any."""
+    timings = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(phase, time.perf_counter() - started)
+
+
+def record_query(seconds):
+    """Count a statement run outside of Django's cursors (see ``apps.api.async_db``)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db += seconds
+
+
+@contextmanager
+def explain_slow_queries():
+    """Log the plan of the queries of the block slower than ``SLOW_QUERY_MS``.
+
+    Only wrap read-only statements: the slow ones are run a second time.
+    """
+    timings = _current.get()
+    enabled = timings is not None and settings.SLOW_QUERY_MS > 0
+    if enabled:
+        timings.explain = True
+    try:
+        yield
+    finally:
+        if enabled:
+            timings.explain = False
+
+
+def _explain(connection, sql, params, elapsed, timings):
+    # the EXPLAIN runs through this wrapper too: it must not be explained in
+    # turn, nor counted as a statement of the request
+    queries, db = timings.queries, timings.db
+    timings.explain = False
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+    except DatabaseError:
+        slow_queries.exception("Slow query (%.0f ms), EXPLAIN failed: %s", elapsed * 1000, sql)
+        return
+    finally:
+        timings.explain = True
+        timings.queries, timings.db = queries, db
+    slow_queries.warning("Slow query (%.0f ms): %s\nParameters: %r\n%s", elapsed * 1000, sql, params, plan)
+
+
+def _query_recorder(timings):
+    def record(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            timings.queries += 1
+            timings.db += elapsed
+        if (
+            timings.explain
+            and not many
+            and elapsed * 1000 >= settings.SLOW_QUERY_MS
+            and sql.lstrip().upper().startswith(("SELECT", "WITH"))
+        ):
+            _explain(context["connection"], sql, params, elapsed, timings)
+        return result
+
+    return record
+
+
+def _wrap_connections(stack, timings):
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(_query_recorder(timings)))
+
+
+def server_timing(timings, total):
+    entries = [f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"']
+    entries += [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in timings.phases.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class InstrumentationMiddleware:
+    """Measure every request, see the module docstring.
+
+    Statements run while a streaming response is consumed, after the view
+    returned, are not counted. Under ASGI, a sync view runs in a thread of its
+    own (``sync_to_async``) whose connections ``process_view`` wraps; async
+    views count the statements of ``apps.api.async_db`` only.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as wrappers:
+                _wrap_connections(wrappers, timings)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if timings.wrappers is not None:
+                await sync_to_async(timings.wrappers.close, thread_sensitive=True)()
+            _current.reset(token)
+        return self.observe(request, response, timings, time.perf_counter() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Under ASGI this runs through sync_to_async in the thread that then
+        # runs a sync view, the one whose connections its queries use
+        timings = _current.get()
+        if iscoroutinefunction(self) and timings is not None and not iscoroutinefunction(view_func):
+            timings.wrappers = ExitStack()
+            _wrap_connections(timings.wrappers, timings)
+        return None
+
+    def observe(self, request, response, timings, total):
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        REQUEST_SECONDS.labels(view, request.method, str(response.status_code)).observe(total)
+        DB_QUERIES.labels(view).observe(timings.queries)
+        DB_SECONDS.labels(view).observe(timings.db)
+        SERIALIZE_SECONDS.labels(view).observe(sum(timings.phases.get(phase, 0.0) for phase in SERIALIZE_PHASES))
+        if not response.streaming:
+            RESPONSE_BYTES.labels(view).observe(len(response.content))
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = server_timing(timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered once the view has returned, time that too
+        timings = _current.get()
+        started = time.perf_counter()
+
+        def rendered(response):
+            timings.add("render", time.perf_counter() - started)
+
+        if timings is not None:
+            response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics(request):
+    """Prometheus exposition of the request histograms."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
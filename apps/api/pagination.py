@@ -0,0 +1,119 @@
+import base64
+import heapq
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Collate
+from django.db.models.lookups import GreaterThan
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """Cursor pagination over a fixed ``(is_favorite, score, uri)`` ordering.
+
+    The cursor encodes the sort key of the last row of the previous page, and
+    the next page is selected with a row comparison against it. Unlike OFFSET,
+    the database never has to walk past the rows of earlier pages, so deep
+    pages cost the same as the first one.
+
+    URIs compare bytewise (the "C" collation) rather than in the collation of
+    the database: that is the order of the memory search index and of Python
+    strings, so a cursor means the same row whichever backend reads it.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+
+    def __init__(self):
+        self.page_size = settings.SEARCH_PAGE_SIZE
+        self.max_page_size = settings.SEARCH_MAX_PAGE_SIZE
+
+    def get_limit(self, request):
+        raw = request.query_params.get(self.limit_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            limit = int(raw)
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        if limit < 1:
+            raise ValidationError({"limit": "Must be a positive integer."})
+        return min(limit, self.max_page_size)
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            is_favorite, score, uri = json.loads(base64.urlsafe_b64decode(raw.encode()))
+            return bool(is_favorite), float(score), str(uri)
+        except (ValueError, TypeError):
+            raise ValidationError({"cursor": "Invalid cursor."})
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            position = [row["is_favorite"], row["score"], row["uri"]]
+        else:
+            position = [row.is_favorite, row.score, row.uri]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def paginate_queryset(self, queryset, request):
+        """Return one page of ``queryset``, which must be annotated with ``score``.
+
+        ``queryset`` may be a ``values()`` queryset including ``is_favorite``,
+        ``score`` and ``uri``.
+        """
+        return self.paginate_rows(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """The unevaluated query of the page, to be passed to ``paginate_rows`` once fetched."""
+        self.request = request
+        self.limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is not None:
+            is_favorite, score, uri = cursor
+            queryset = queryset.filter(
+                Q(is_favorite__lt=is_favorite)
+                | Q(is_favorite=is_favorite, score__lt=score)
+                | Q(is_favorite=is_favorite, score=score) & GreaterThan(Collate("uri", "C"), uri)
+            )
+        # one row more than the page tells whether there is a next one
+        return queryset.order_by("-is_favorite", "-score", Collate("uri", "C"))[: self.limit + 1]
+
+    def paginate_rows(self, rows):
+        limit = self.limit
+        self.next_cursor = self.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit]
+
+    def paginate_ranked(self, matches, request):
+        """Return one page of search index ``matches``, with the same cursors."""
+        self.request = request
+        limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is not None:
+            is_favorite, score, uri = cursor
+            matches = [
+                match
+                for match in matches
+                if match.is_favorite < is_favorite
+                or (match.is_favorite == is_favorite and match.score < score)
+                or (match.is_favorite == is_favorite and match.score == score and match.uri > uri)
+            ]
+
+        rows = heapq.nsmallest(limit + 1, matches, key=lambda match: match.sort_key())
+        self.next_cursor = self.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {"next": self.get_next_link(), "results": data}
@@ -0,0 +1,60 @@
+"""Server-side prepared statements for the search and autocomplete queries.
+
+Django binds parameters on the client: statements reach Postgres as plain
+text, which keeps every query working (the ingest upserts bind more
+parameters than the protocol allows) but makes Postgres parse and analyze
+each search again. With ``DB_PREPARED_STATEMENTS``, ``fetch_values()`` runs a
+``values()`` queryset with server-side binding on the connection of the
+request, and psycopg prepares the statement once it has run
+``DB_PREPARE_THRESHOLD`` times there. The settings keep a custom plan for
+every run (``plan_cache_mode``): a generic plan ignores the words searched and
+was slower than no prepared statement at all. The statement still goes
+through Django's cursor wrapper, so the instrumentation and the slow query
+log see it.
+
+A prepared statement belongs to its connection: it only pays off when
+connections outlive the request (``DB_CONN_MAX_AGE`` or ``DB_POOL``). The
+async views do not use it, see ``apps.api.async_db``.
+"""
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.backends.postgresql.base import ServerBindingCursor
+
+
+def compile_values(queryset):
+    """The SQL and parameters of a ``values()`` queryset, and a function turning its rows into dicts.
+
+    Raises ``EmptyResultSet`` when the queryset cannot match anything.
+    """
+    query = queryset.query
+    compiler = query.get_compiler(queryset.db)
+    sql, params = compiler.as_sql()
+    fields = [expression for expression, _, _ in compiler.select[: compiler.col_count]]
+    converters = compiler.get_converters(fields)
+    # the names ValuesIterable gives the columns
+    names = [*query.extra_select, *query.values_select, *query.annotation_select]
+
+    def shape(rows):
+        if converters:
+            rows = compiler.apply_converters(rows, converters)
+        return [dict(zip(names, row)) for row in rows]
+
+    return sql, params, shape
+
+
+def fetch_values(queryset):
+    """Evaluate a ``values()`` queryset as a list of dicts, as a prepared statement if enabled."""
+    if not settings.DB_PREPARED_STATEMENTS:
+        return list(queryset)
+    try:
+        sql, params, shape = compile_values(queryset)
+    except EmptyResultSet:
+        return []
+    connection = connections[queryset.db]
+    connection.ensure_connection()
+    wrap = connection.make_debug_cursor if connection.queries_logged else connection.make_cursor
+    with wrap(ServerBindingCursor(connection.connection)) as cursor:
+        cursor.execute(sql, params)
+        return shape(cursor.fetchall())
@@ -0,0 +1,29 @@
+"""The formats of ``/terms/export/``, for DRF's content negotiation.
+
+They let a client pick a format with ``?format=`` or ``Accept``. The view
+streams the body itself, so they never render anything.
+"""
+
+from rest_framework.renderers import BaseRenderer
+
+from apps.ontologies.export import FORMATS
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = FORMATS["ndjson"]
+    format = "ndjson"
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = FORMATS["csv"]
+    format = "csv"
+
+
+class ParquetRenderer(BaseRenderer):
+    media_type = FORMATS["parquet"]
+    format = "parquet"
+    charset = None
+    render_style = "binary"
+
+
+EXPORT_RENDERERS = [NDJSONRenderer, CSVRenderer, ParquetRenderer]
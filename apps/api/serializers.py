@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.db.models import Prefetch
+
 from apps.ontologies import models
 from rest_framework import serializers
 
@@ -8,9 +11,66 @@ class OntologySerializer(serializers.ModelSerializer):
         fields = ("uri", "label")
 
 
+class OntologyDetailSerializer(OntologySerializer):
+    class Meta(OntologySerializer.Meta):
+        fields = ("uri", "label", "weight")
+
+
+class TermParentSerializer(serializers.ModelSerializer):
+    uri = serializers.URLField(source="parent_uri")
+    label = serializers.CharField(source="parent.label", allow_null=True, default=None)
+
+    class Meta:
+        model = models.TermParent
+        fields = ("uri", "label", "kind", "relation")
+
+
+class TermChildSerializer(serializers.ModelSerializer):
+    uri = serializers.URLField(source="child.uri")
+    label = serializers.CharField(source="child.label", allow_null=True)
+
+    class Meta:
+        model = models.TermParent
+        fields = ("uri", "label", "kind", "relation")
+
+
+# ?embed= summaries of the neighbours of a term, one prefetch each, stored
+# in a list attribute (sliced prefetches need to_attr)
+EMBEDS = {
+    "parents": ("embedded_parents", TermParentSerializer),
+    "children": ("embedded_children", TermChildSerializer),
+}
+
+
+def embed_prefetches(embed):
+    """The ``prefetch_related`` lookups rendering ``embed`` without a query per term."""
+    prefetches = []
+    if "parents" in embed:
+        edges = models.TermParent.objects.select_related("parent").order_by("kind", "parent_uri")
+        prefetches.append(Prefetch("parent_links", queryset=edges, to_attr="embedded_parents"))
+    if "children" in embed:
+        edges = models.TermParent.objects.select_related("child").order_by("child__uri")
+        prefetches.append(
+            Prefetch(
+                "child_links",
+                queryset=edges[: settings.HIERARCHY_EMBED_MAX_CHILDREN],
+                to_attr="embedded_children",
+            )
+        )
+    return prefetches
+
+
 class TermSerializer(serializers.ModelSerializer):
+    """A term. ``context["embed"]`` adds the ``parents`` and/or ``children`` summaries."""
+
     ontology = OntologySerializer(read_only=True)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get("embed", ()):
+            source, serializer = EMBEDS[name]
+            self.fields[name] = serializer(source=source, many=True, read_only=True)
+
     class Meta:
         model = models.Term
         fields = (
@@ -21,5 +81,157 @@ class TermSerializer(serializers.ModelSerializer):
             "subClassOf",
             "weight",
             "is_favorite",
+            "is_obsolete",
+        )
+        read_only_fields = ("uri", "ontology", "is_obsolete")
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    uri = serializers.URLField()
+    label = serializers.CharField()
+    ontology = serializers.URLField(allow_null=True)
+
+
+class HierarchyTermSerializer(serializers.Serializer):
+    uri = serializers.URLField()
+    label = serializers.CharField()
+    ontology = serializers.URLField(allow_null=True)
+    depth = serializers.IntegerField()
+
+
+class SearchBatchSerializer(serializers.Serializer):
+    queries = serializers.ListField(
+        child=serializers.CharField(allow_blank=True),
+        allow_empty=False,
+        max_length=settings.SEARCH_BATCH_MAX_QUERIES,
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.SEARCH_MAX_PAGE_SIZE,
+        default=settings.SEARCH_BATCH_LIMIT,
+    )
+
+
+class LookupMatchSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=["uri", "curie", *models.TermSynonym.Kind.values])
+    text = serializers.CharField()
+
+
+class LookupSerializer(serializers.Serializer):
+    uri = serializers.URLField()
+    label = serializers.CharField()
+    ontology = serializers.URLField(allow_null=True)
+    is_obsolete = serializers.BooleanField()
+    match = LookupMatchSerializer()
+
+
+class AnnotateSerializer(serializers.Serializer):
+    text = serializers.CharField(
+        allow_blank=True, trim_whitespace=False, max_length=settings.ANNOTATE_MAX_CHARS
+    )
+
+
+class AnnotationTermSerializer(serializers.Serializer):
+    uri = serializers.URLField()
+    label = serializers.CharField()
+    ontology = serializers.URLField(allow_null=True)
+
+
+class AnnotationSerializer(serializers.Serializer):
+    start = serializers.IntegerField()
+    end = serializers.IntegerField()
+    text = serializers.CharField()
+    terms = AnnotationTermSerializer(many=True)
+
+
+# Lean path for large result lists: rows come from ``values()`` with the
+# ontology joined in, and are shaped into plain dicts without going through
+# the per-field machinery of ``TermSerializer``. The output is the same.
+TERM_FIELDS = TermSerializer.Meta.fields
+
+
+def parse_term_fields(request):
+    """The ``fields=`` subset of ``TERM_FIELDS`` asked for, in canonical order."""
+    raw = request.query_params.get("fields")
+    if not raw:
+        return TERM_FIELDS
+    requested = {field.strip() for field in raw.split(",") if field.strip()}
+    unknown = requested - set(TERM_FIELDS)
+    if unknown:
+        raise serializers.ValidationError(
+            {"fields": f"Unknown field(s): {', '.join(sorted(unknown))}. Choose from {', '.join(TERM_FIELDS)}."}
+        )
+    return tuple(field for field in TERM_FIELDS if field in requested)
+
+
+def parse_embed(request):
+    """The ``embed=`` names (``parents``, ``children``) asked for, in canonical order."""
+    raw = request.query_params.get("embed")
+    if not raw:
+        return ()
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested - set(EMBEDS)
+    if unknown:
+        raise serializers.ValidationError(
+            {"embed": f"Unknown embed(s): {', '.join(sorted(unknown))}. Choose from {', '.join(EMBEDS)}."}
+        )
+    return tuple(name for name in EMBEDS if name in requested)
+
+
+def is_compact(request):
+    return request.query_params.get("compact", "").lower() in ("true", "1")
+
+
+def term_columns(fields):
+    """The ``values()`` columns needed to render ``fields``."""
+    columns = [field for field in fields if field != "ontology"]
+    if "ontology" in fields:
+        columns += ["ontology__uri", "ontology__label"]
+    return columns
+
+
+def serialize_terms(rows, fields=TERM_FIELDS, compact=False, embed=()):
+    """Shape ``values()`` rows like ``TermSerializer``.
+
+    Returns ``(results, ontologies)``. With ``compact``, each result refers to
+    its ontology by URI and ``ontologies`` maps every URI to its label once.
+    With ``embed``, the rows must include ``uri``.
+    """
+    results = []
+    ontologies = {}
+    uris = []
+    for row in rows:
+        if embed:
+            uris.append(row["uri"])
+        item = {}
+        for field in fields:
+            if field != "ontology":
+                item[field] = row[field]
+                continue
+            uri = row["ontology__uri"]
+            if uri is None:
+                item["ontology"] = None
+            elif compact:
+                item["ontology"] = uri
+                ontologies[uri] = {"uri": uri, "label": row["ontology__label"]}
+            else:
+                item["ontology"] = {"uri": uri, "label": row["ontology__label"]}
+        results.append(item)
+    if embed:
+        embed_relatives(results, uris, embed)
+    return results, ontologies
+
+
+def embed_relatives(results, uris, embed, chunk_size=1000):
+    """Add the ``embed`` summaries of ``uris`` to the matching ``results``."""
+    for start in range(0, len(results), chunk_size):
+        chunk = uris[start:start + chunk_size]
+        terms = models.Term.objects.filter(uri__in=chunk).only("id", "uri").prefetch_related(
+            *embed_prefetches(embed)
         )
-        read_only_fields = ("uri", "ontology")
+        by_uri = {term.uri: term for term in terms}
+        for item, uri in zip(results[start:start + chunk_size], chunk):
+            for name in embed:
+                source, serializer = EMBEDS[name]
+                edges = getattr(by_uri[uri], source) if uri in by_uri else ()
+                item[name] = serializer(edges, many=True).data
@@ -0,0 +1,74 @@
+import json
+
+from rest_framework.throttling import ScopedRateThrottle
+
+from conftest import food_uri
+
+
+def streamed(response):
+    return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+
+def test_annotate_json(food, admin_api):
+    response = admin_api.post("/annotate/", {"text": "Blue cheese or yoghurt?"}, format="json")
+    assert response.status_code == 200, response.content
+    assert response.json() == {
+        "annotations": [
+            {
+                "start": 0,
+                "end": 11,
+                "text": "Blue cheese",
+                "terms": [{"uri": food_uri(4), "label": "blue cheese", "ontology": food["cheese"].ontology_id}],
+            },
+            {
+                "start": 15,
+                "end": 22,
+                "text": "yoghurt",
+                "terms": [{"uri": food_uri(5), "label": "yogurt", "ontology": food["cheese"].ontology_id}],
+            },
+        ]
+    }
+
+
+def test_annotate_overlapping(food, admin_api):
+    response = admin_api.post("/annotate/?overlapping=true", {"text": "blue cheese"}, format="json")
+    assert [span["text"] for span in response.json()["annotations"]] == ["blue cheese", "cheese"]
+
+
+def test_annotate_streams_plain_text(food, admin_api, settings):
+    settings.ANNOTATE_CHUNK_SIZE = 16
+    text = "milk and cheese. " * 100
+    response = admin_api.generic("POST", "/annotate/", text.encode(), content_type="text/plain")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    spans = streamed(response)
+    assert len(spans) == 200
+    assert spans[-1]["start"] == len(text) - 8
+    assert spans[-1]["text"] == "cheese"
+
+
+def test_annotate_json_is_capped(food, admin_api):
+    # over ANNOTATE_MAX_CHARS
+    response = admin_api.post("/annotate/", {"text": "cheese " * 200000}, format="json")
+    assert response.status_code == 400
+
+
+def test_annotate_plain_text_is_capped(food, admin_api, settings):
+    settings.ANNOTATE_MAX_BYTES = 100
+    response = admin_api.generic("POST", "/annotate/", b"cheese " * 20, content_type="text/plain")
+    assert response.status_code == 413
+    assert response.json() == {"error": "The text is larger than 100 bytes."}
+    assert admin_api.generic("POST", "/annotate/", b"cheese " * 14, content_type="text/plain").status_code == 200
+
+
+def test_annotate_needs_a_user(food, api):
+    assert api.post("/annotate/", {"text": "cheese"}, format="json").status_code == 403
+    assert api.generic("POST", "/annotate/", b"cheese", content_type="text/plain").status_code == 403
+
+
+def test_annotate_is_throttled_per_user(food, admin_api, monkeypatch):
+    monkeypatch.setitem(ScopedRateThrottle.THROTTLE_RATES, "annotate", "1/min")
+    assert admin_api.post("/annotate/", {"text": "cheese"}, format="json").status_code == 200
+    response = admin_api.generic("POST", "/annotate/", b"cheese", content_type="text/plain")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) <= 60
@@ -0,0 +1,44 @@
+from apps.ontologies.models import Term
+
+
+def suggestions(api, **params):
+    response = api.get("/autocomplete/", params)
+    assert response.status_code == 200, response.content
+    return [term["label"] for term in response.json()]
+
+
+def test_prefixes_come_first_then_fuzzy_matches(food, api):
+    # aged cheese is obsolete
+    assert suggestions(api, query="Che") == ["cheese", "blue cheese"]
+    assert suggestions(api, query="che", limit=1) == ["cheese"]
+
+
+def test_synonym_prefixes_suggest_their_term(food, api):
+    # other-language label, exact and related synonyms
+    assert suggestions(api, query="from") == ["cheese"]
+    assert suggestions(api, query="yogh") == ["yogurt"]
+    assert suggestions(api, query="cur") == ["cheese"]
+    # xrefs are not names
+    assert suggestions(api, query="foodon") == []
+
+
+def test_synonym_prefixes_rank_with_label_prefixes(food, api):
+    Term.objects.filter(label="dairy product").update(is_favorite=True)
+    # milk is a label prefix, "milk product" a synonym of the favorite dairy product
+    assert suggestions(api, query="milk") == ["dairy product", "milk"]
+
+
+def test_suggestions_have_the_term_and_its_ontology(food, api):
+    response = api.get("/autocomplete/", {"query": "yog"})
+    assert response.json() == [
+        {
+            "uri": food["yogurt"].uri,
+            "label": "yogurt",
+            "ontology": "http://purl.obolibrary.org/obo/food.owl",
+        }
+    ]
+
+
+def test_invalid_requests(food, api):
+    assert api.get("/autocomplete/").status_code == 400
+    assert api.get("/autocomplete/", {"query": "che", "limit": "ten"}).status_code == 400
@@ -0,0 +1,48 @@
+import io
+import json
+
+import pyarrow.parquet as pq
+
+from apps.ontologies.models import Term
+
+
+def body(response):
+    assert response.status_code == 200, response.content
+    return b"".join(response.streaming_content)
+
+
+def test_export_formats(food, api):
+    response = api.get("/terms/export/")
+    assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+    assert response["Content-Disposition"] == 'attachment; filename="terms.ndjson"'
+    assert len(body(response).splitlines()) == 8
+
+    response = api.get("/terms/export/", {"format": "csv"})
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert len(body(response).splitlines()) == 9
+
+    response = api.get("/terms/export/", HTTP_ACCEPT="application/vnd.apache.parquet")
+    assert response["Content-Type"] == "application/vnd.apache.parquet"
+    assert pq.read_table(io.BytesIO(body(response))).num_rows == 8
+
+
+def test_export_filters(food, api):
+    Term.objects.filter(label="milk").update(updated_at="2030-01-01T00:00:00Z")
+    response = api.get("/terms/export/", {"updated_since": "2029-12-31T23:00:00-01:00"})
+    assert [json.loads(line)["label"] for line in body(response).splitlines()] == ["milk"]
+
+    response = api.get("/terms/export/", {"ontology": "http://purl.obolibrary.org/obo/drink.owl"})
+    assert body(response) == b""
+
+
+def test_export_errors_are_json(food, api):
+    response = api.get("/terms/export/", {"format": "xml"})
+    assert response.status_code == 400
+    assert response["Content-Type"] == "application/json"
+    assert "format" in response.json()
+
+    response = api.get("/terms/export/", {"updated_since": "yesterday"})
+    assert response.status_code == 400
+    assert "updated_since" in response.json()
+
+    assert api.get("/terms/export/", HTTP_ACCEPT="application/xml").status_code == 406
@@ -0,0 +1,77 @@
+from apps.ontologies.models import Term
+from conftest import food_uri
+
+
+def rows(response):
+    assert response.status_code == 200, response.content
+    return [(row["label"], row["depth"]) for row in response.json()]
+
+
+def test_ancestors(food, api):
+    response = api.get("/hierarchy/ancestors/", {"uri": food_uri(4)})
+    assert rows(response) == [("cheese", 1), ("dairy product", 2), ("food", 3)]
+
+
+def test_descendants(food, api):
+    response = api.get("/hierarchy/descendants/", {"uri": food_uri(2)})
+    assert rows(response) == [("cheese", 1), ("yogurt", 1), ("blue cheese", 2), ("aged cheese", 2)]
+    response = api.get("/hierarchy/descendants/", {"uri": food_uri(2), "max_depth": 1, "limit": 1})
+    assert rows(response) == [("cheese", 1)]
+    assert api.get("/hierarchy/descendants/", {"uri": food_uri(2), "max_depth": "x"}).status_code == 400
+
+
+def test_depth(food, api):
+    assert api.get("/hierarchy/depth/", {"uri": food_uri(4)}).json() == {"uri": food_uri(4), "depth": 3}
+    assert api.get("/hierarchy/depth/", {"uri": food_uri(1)}).json()["depth"] == 0
+
+
+def test_lowest_common_ancestor(food, api):
+    response = api.get("/hierarchy/lca/", {"uri": [food_uri(4), food_uri(5)]})
+    assert rows(response) == [("dairy product", 3)]
+    response = api.get("/hierarchy/lca/", {"uri": [food_uri(4), food_uri(3)]})
+    assert rows(response) == [("cheese", 1)]
+    assert api.get("/hierarchy/lca/", {"uri": food_uri(4)}).status_code == 400
+
+
+def test_unknown_terms(food, api):
+    for path in ("ancestors", "descendants", "depth"):
+        assert api.get(f"/hierarchy/{path}/", {"uri": food_uri(99)}).status_code == 404
+
+
+def test_parent_edits_update_the_hierarchy(food, admin_api):
+    Term.objects.filter(label="apple").update(weight=3.0)
+    response = admin_api.put(f"/terms/{food['cheese'].pk}/", {"label": "cheese", "subClassOf": [food_uri(7)]}, format="json")
+    assert response.status_code == 200, response.content
+
+    response = admin_api.get("/hierarchy/ancestors/", {"uri": food_uri(4)})
+    assert rows(response) == [("cheese", 1), ("apple", 2), ("food", 3)]
+    response = admin_api.get("/hierarchy/descendants/", {"uri": food_uri(2)})
+    assert rows(response) == [("yogurt", 1)]
+    # the moved subtree inherits from its new ancestors
+    assert Term.objects.get(label="blue cheese").inherited_weight == 0.5
+
+
+def test_deleting_a_term_detaches_its_subtree(food, admin_api):
+    Term.objects.filter(label="food").update(weight=3.0)
+    Term.objects.filter(pk=food["blue cheese"].pk).update(inherited_weight=0.25)
+    assert admin_api.delete(f"/terms/{food['dairy product'].pk}/").status_code == 204
+
+    # blue cheese reached food through dairy product only
+    response = admin_api.get("/hierarchy/ancestors/", {"uri": food_uri(4)})
+    assert rows(response) == [("cheese", 1)]
+    response = admin_api.get("/hierarchy/descendants/", {"uri": food_uri(1)})
+    assert rows(response) == [("milk", 1), ("apple", 1)]
+    assert Term.objects.get(label="blue cheese").inherited_weight == 0.0
+    # yogurt keeps its restriction on milk, which is not an is_a edge
+    assert admin_api.get("/hierarchy/depth/", {"uri": food_uri(5)}).json()["depth"] == 0
+
+
+def test_created_terms_join_the_hierarchy(food, api):
+    ontology = food["cheese"].ontology
+    # a child ingested before its parent
+    Term.objects.create(uri=food_uri(10), label="smoked blue cheese", ontology=ontology, subClassOf=[food_uri(9)])
+    Term.objects.create(uri=food_uri(9), label="smoked cheese", ontology=ontology, subClassOf=[food_uri(3)])
+
+    response = api.get("/hierarchy/ancestors/", {"uri": food_uri(10)})
+    assert rows(response) == [("smoked cheese", 1), ("cheese", 2), ("dairy product", 3), ("food", 4)]
+    assert api.get("/hierarchy/depth/", {"uri": food_uri(9)}).json()["depth"] == 3
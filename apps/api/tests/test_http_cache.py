@@ -0,0 +1,65 @@
+import multiprocessing
+
+import pytest
+from django.db import connections
+
+from apps.ontologies.generations import bump_generation
+from conftest import FOOD_ONTOLOGY
+
+
+def test_read_endpoints_send_validators(food, api, settings):
+    settings.HTTP_CACHE_MAX_AGE = 30
+    for path in ("/terms/", "/ontologies/", "/search/?query=cheese", "/terms/export/"):
+        response = api.get(path)
+        assert response.status_code == 200
+        assert response["ETag"].startswith('"')
+        assert "max-age=30" in response["Cache-Control"]
+        assert "public" in response["Cache-Control"]
+
+
+def test_matching_etag_gets_a_304(food, api, django_assert_max_num_queries):
+    etag = api.get("/search/?query=cheese")["ETag"]
+    with django_assert_max_num_queries(2) as queries:
+        response = api.get("/search/?query=cheese", HTTP_IF_NONE_MATCH=etag)
+    # only the generations are read from the (database) cache, not the terms
+    assert all("django_cache" in query["sql"] for query in queries.captured_queries)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert api.get("/search/?query=milk", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_etag_depends_on_the_representation(food, api):
+    json = api.get("/terms/", HTTP_ACCEPT="application/json")["ETag"]
+    assert api.get("/terms/", HTTP_ACCEPT="*/*")["ETag"] != json
+    assert api.get("/terms/?fields=uri")["ETag"] != api.get("/terms/")["ETag"]
+
+
+def test_writes_change_the_etag(food, api, admin_api, django_capture_on_commit_callbacks):
+    etag = api.get("/terms/")["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        response = admin_api.put(f"/terms/{food['cheese'].pk}/", {"label": "cheese", "weight": 2.0}, format="json")
+    assert response.status_code == 200
+    assert "ETag" not in response
+
+    response = api.get("/terms/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def ingest_elsewhere():
+    connections.close_all()
+    bump_generation(FOOD_ONTOLOGY)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_in_another_process_changes_the_etag(food, api):
+    etag = api.get("/terms/")["ETag"]
+    connections.close_all()
+    child = multiprocessing.get_context("fork").Process(target=ingest_elsewhere)
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    response = api.get("/terms/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
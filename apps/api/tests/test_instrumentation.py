@@ -0,0 +1,36 @@
+import re
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+
+def timing_queries(response):
+    match = re.search(r'db;dur=[0-9.]+;desc="(\d+) queries"', response["Server-Timing"])
+    assert match, response["Server-Timing"]
+    return int(match.group(1))
+
+
+def test_server_timing_counts_queries(food, api):
+    response = api.get("/lookup/", {"query": "cheese"})
+    assert response.status_code == 200
+    assert timing_queries(response) > 0
+    assert "total;dur=" in response["Server-Timing"]
+    assert "render;dur=" in response["Server-Timing"]
+
+
+def test_server_timing_counts_the_queries_of_sync_views_under_asgi(food):
+    response = async_to_sync(AsyncClient().get)("/lookup/", {"query": "cheese"})
+    assert response.status_code == 200
+    assert timing_queries(response) > 0
+
+
+def test_server_timing_can_be_turned_off(food, api, settings):
+    settings.SERVER_TIMING = False
+    assert "Server-Timing" not in api.get("/lookup/", {"query": "cheese"})
+
+
+def test_metrics(food, api):
+    api.get("/lookup/", {"query": "cheese"})
+    response = api.get("/metrics")
+    assert response.status_code == 200
+    assert b'ontology_api_db_queries_count{view="lookup-terms"}' in response.content
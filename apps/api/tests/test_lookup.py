@@ -0,0 +1,38 @@
+import pytest
+
+from apps.ontologies.models import Prefix
+from conftest import food_uri
+
+
+def lookup(api, query):
+    response = api.get("/lookup/", {"query": query})
+    assert response.status_code == 200, response.content
+    return [(term["uri"], term["match"]["kind"]) for term in response.json()]
+
+
+@pytest.mark.parametrize(
+    "query, kind",
+    [
+        (food_uri(3), "uri"),
+        ("FOOD:0000003", "curie"),
+        ("food:0000003", "curie"),
+        ("FOOD_0000003", "curie"),
+        ("  CHEESE ", "label"),
+        ("Fromage", "label"),
+        ("curd", "related"),
+        # also a CURIE, of a term that is not ingested
+        ("FOODON:00001013", "xref"),
+    ],
+)
+def test_lookup_resolves_names_and_identifiers(food, api, query, kind):
+    assert lookup(api, query) == [(food_uri(3), kind)]
+
+
+def test_lookup_expands_registered_prefixes(food, api):
+    Prefix.objects.create(prefix="cheeses", namespace="http://purl.obolibrary.org/obo/FOOD_000000")
+    assert lookup(api, "cheeses:3") == [(food_uri(3), "curie")]
+
+
+def test_lookup_misses_and_errors(food, api):
+    assert lookup(api, "camembert") == []
+    assert api.get("/lookup/", {"query": " "}).status_code == 400
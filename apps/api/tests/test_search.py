@@ -0,0 +1,98 @@
+from apps.ontologies import search_index
+from apps.ontologies.models import Term
+from conftest import OBO, food_uri
+
+
+def search(api, **params):
+    response = api.get("/search/", params)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def labels(data):
+    return [term["label"] for term in data["results"]]
+
+
+def test_label_matches_rank_above_definition_matches(food, api):
+    found = labels(search(api, query="cheese"))
+    assert set(found[:2]) == {"cheese", "blue cheese"}
+    # yogurt only mentions cheese in its definition, aged cheese is obsolete
+    assert found[2:] == ["yogurt"]
+
+
+def test_favorites_then_weights_come_first(food, api):
+    Term.objects.filter(label="yogurt").update(is_favorite=True)
+    Term.objects.filter(label="blue cheese").update(static_score=10.0)
+    assert labels(search(api, query="cheese")) == ["yogurt", "blue cheese", "cheese"]
+
+
+def test_results_have_the_term_fields(food, api):
+    result = search(api, query="blue", fields="uri,label,ontology")["results"]
+    assert result == [
+        {
+            "uri": food_uri(4),
+            "label": "blue cheese",
+            "ontology": {"uri": "http://purl.obolibrary.org/obo/food.owl", "label": "Food test ontology"},
+        }
+    ]
+
+
+def test_keyset_pagination_walks_every_result_once(food, api):
+    everything = labels(search(api, query="dairy OR milk OR cheese"))
+    assert len(everything) == 5
+
+    found = []
+    data = search(api, query="dairy OR milk OR cheese", limit=2)
+    while True:
+        assert len(data["results"]) <= 2
+        found += labels(data)
+        if data["next"] is None:
+            break
+        data = api.get(data["next"]).json()
+    assert found == everything
+
+
+def walk(api, query, limit):
+    pages = [search(api, query=query, limit=limit, fields="uri")]
+    while pages[-1]["next"] is not None:
+        pages.append(api.get(pages[-1]["next"]).json())
+    return pages
+
+
+def test_both_backends_break_ties_in_the_same_order(food, api, settings, tmp_path, monkeypatch):
+    # tied scores, with URIs that the database collation may sort apart from bytes
+    cheddars = ["cheddar_b", "Cheddar_a", "cheddar_a", "Cheddar_b", "cheddar-c"]
+    for uri in cheddars:
+        Term.objects.create(uri=f"{OBO}{uri}", label="cheddar", ontology=food["cheese"].ontology)
+    in_postgres = walk(api, "cheddar", 2)
+
+    settings.SEARCH_BACKEND = "memory"
+    settings.SEARCH_INDEX_PATH = str(tmp_path / "search.idx")
+    search_index.build_index()
+    monkeypatch.setattr(search_index, "_index", None)
+    in_memory = walk(api, "cheddar", 2)
+
+    uris = [[term["uri"] for term in page["results"]] for page in in_postgres]
+    assert [[term["uri"] for term in page["results"]] for page in in_memory] == uris
+    # bytewise, as Python compares the URIs of the cursors
+    assert sum(uris, []) == sorted(f"{OBO}{uri}" for uri in cheddars)
+
+
+def test_invalid_requests(food, api):
+    assert api.get("/search/").status_code == 400
+    assert api.get("/search/", {"query": "cheese", "cursor": "nope"}).status_code == 400
+    assert api.get("/search/", {"query": "cheese", "limit": "0"}).status_code == 400
+    assert api.get("/search/", {"query": "cheese", "fields": "colour"}).status_code == 400
+
+
+def test_cache_hits_and_misses_are_counted_in_process(food, api, django_assert_max_num_queries):
+    before = api.get("/search/cache/").json()
+    api.get("/search/", {"query": "cheese"})
+    with django_assert_max_num_queries(5) as queries:
+        assert api.get("/search/", {"query": "cheese"}).status_code == 200
+    # a hit reads the cache and writes nothing to it
+    assert not [query for query in queries.captured_queries if not query["sql"].startswith("SELECT")]
+
+    after = api.get("/search/cache/").json()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (1, 1)
+    assert b'ontology_api_search_cache_lookups_total{result="hit"}' in api.get("/metrics").content
@@ -1,6 +1,16 @@
-from . import views
+from . import async_views, instrumentation, views
+from django.conf import settings
 from django.urls import path, include
 
+search_view = views.SearchView.as_view()
+search_batch_view = views.SearchBatchView.as_view()
+autocomplete_view = views.AutocompleteView.as_view()
+if settings.ASYNC_VIEWS:
+    # under ASGI (see asgi.py), answered on the async pool and documented like the DRF views
+    search_view = async_views.documented_as(search_view, async_views.search)
+    search_batch_view = async_views.documented_as(search_batch_view, async_views.search_batch)
+    autocomplete_view = async_views.documented_as(autocomplete_view, async_views.autocomplete)
+
 urlpatterns = [
     path(
         "ontologies/",
@@ -8,7 +18,7 @@ urlpatterns = [
         name="ontology-list",
     ),
     path(
-        "ontologies/<int:pk>/",
+        "ontologies/<path:pk>/",
         views.OntologyViewSet.as_view(
             {"get": "retrieve", "put": "update", "delete": "destroy"}
         ),
@@ -19,6 +29,7 @@ urlpatterns = [
         views.TermViewSet.as_view({"get": "list", "post": "create"}),
         name="term-list",
     ),
+    path("terms/export/", views.TermExportView.as_view(), name="term-export"),
     path(
         "terms/<int:pk>/",
         views.TermViewSet.as_view(
@@ -26,5 +37,15 @@ urlpatterns = [
         ),
         name="term-detail",
     ),
-    path("search/", views.SearchView.as_view(), name="search-terms"),
+    path("search/", search_view, name="search-terms"),
+    path("search/batch/", search_batch_view, name="search-batch"),
+    path("search/cache/", views.SearchCacheStatsView.as_view(), name="search-cache-stats"),
+    path("hierarchy/ancestors/", views.TermAncestorsView.as_view(), name="term-ancestors"),
+    path("hierarchy/descendants/", views.TermDescendantsView.as_view(), name="term-descendants"),
+    path("hierarchy/depth/", views.TermDepthView.as_view(), name="term-depth"),
+    path("hierarchy/lca/", views.LowestCommonAncestorView.as_view(), name="term-lca"),
+    path("lookup/", views.LookupView.as_view(), name="lookup-terms"),
+    path("annotate/", views.AnnotateView.as_view(), name="annotate-text"),
+    path("autocomplete/", autocomplete_view, name="autocomplete-terms"),
+    path("metrics", instrumentation.metrics, name="metrics"),
 ]
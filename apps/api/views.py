@@ -1,45 +1,318 @@
-from django.contrib.postgres.search import SearchVector
+import codecs
+import json
+import re
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.db.models.functions import Length, Lower
 
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView, Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.throttling import ScopedRateThrottle
 
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter
+from rest_framework import serializers as drf_serializers
 
-from apps.ontologies import models
+from apps.ontologies import export, models
+from apps.ontologies.annotator import get_automaton
+from apps.ontologies.lookup import resolve
+from apps.ontologies.search_index import get_index as get_search_index
+from . import cache as search_cache
+from . import http_cache, instrumentation, prepared
+from .batch import ndjson_lines, search_batch
 from . import serializers
+from .pagination import KeysetPagination
+from .renderers import EXPORT_RENDERERS
+
 
+# search parameters the in-memory index cannot answer
+HIERARCHY_SEARCH_PARAMS = ("subtree", "under", "boost_ancestors")
+WEBSEARCH_OPERATORS = re.compile(r'"|(^|\s)-|\bOR\b')
 
+
+@method_decorator(http_cache.conditional(http_cache.data_etag), name="dispatch")
 class OntologyViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     queryset = models.Ontology.objects.all()
-    serializer_class = serializers.OntologySerializer
+    serializer_class = serializers.OntologyDetailSerializer
+
+
+FIELDS_PARAMETER = OpenApiParameter(
+    name="fields",
+    type=str,
+    description="Comma-separated term fields to return (default: all).",
+    required=False,
+)
+COMPACT_PARAMETER = OpenApiParameter(
+    name="compact",
+    type=bool,
+    description=(
+        "Return each term's ontology as a URI, with the ontologies listed once in a "
+        "top-level `ontologies` object."
+    ),
+    required=False,
+)
+
+EMBED_PARAMETER = OpenApiParameter(
+    name="embed",
+    type=str,
+    description=(
+        "Comma-separated relatives to include in each term: `parents` (named parents and "
+        "restrictions) and/or `children` (capped per term)."
+    ),
+    required=False,
+)
+
+
+def paginated_terms(paginator, page, fields, compact, embed=()):
+    with instrumentation.timing("serialize"):
+        results, ontologies = serializers.serialize_terms(page, fields, compact, embed)
+    data = paginator.get_paginated_data(results)
+    if compact:
+        data["ontologies"] = ontologies
+    return data
 
 
+@method_decorator(http_cache.conditional(http_cache.data_etag), name="dispatch")
 class TermViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
-    queryset = models.Term.objects.all()
+    queryset = models.Term.objects.select_related("ontology")
     serializer_class = serializers.TermSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # list renders values() rows and embeds with serialize_terms
+            return queryset
+        return queryset.prefetch_related(*serializers.embed_prefetches(serializers.parse_embed(self.request)))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "embed": serializers.parse_embed(self.request)}
+
+    @extend_schema(parameters=[EMBED_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        with instrumentation.timing("serialize"):
+            data = self.get_serializer(instance).data
+        return Response(data)
+
+    @extend_schema(parameters=[FIELDS_PARAMETER, COMPACT_PARAMETER, EMBED_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        fields = serializers.parse_term_fields(request)
+        compact = serializers.is_compact(request)
+        embed = serializers.parse_embed(request)
+        columns = serializers.term_columns(fields) + (["uri"] if embed else [])
+        rows = self.filter_queryset(self.get_queryset()).values(*dict.fromkeys(columns))
+        # rows are fetched while they are shaped, their fetches count as serialization
+        with instrumentation.timing("serialize"):
+            results, ontologies = serializers.serialize_terms(
+                rows.iterator(chunk_size=2000), fields, compact, embed
+            )
+        if compact:
+            return Response({"ontologies": ontologies, "results": results})
+        return Response(results)
+
+
+@method_decorator(http_cache.conditional(http_cache.data_etag), name="dispatch")
+class TermExportView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    renderer_classes = EXPORT_RENDERERS
 
+    @extend_schema(
+        operation_id="Export Terms",
+        description=(
+            "Stream every term with its ontology, parents and weights, ordered by `updated_at`, "
+            "as NDJSON (the default), CSV (parents as a JSON list) or Parquet. Pick the format "
+            "with `format` or `Accept`. For an incremental export, pass the `updated_at` of the "
+            "last term of the previous one as `updated_since`: the terms of the "
+            "`EXPORT_WATERMARK_LAG` seconds before it are sent again, so that rows committed "
+            "late are not missed. Upsert them by `uri`."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="format",
+                type=str,
+                enum=list(export.FORMATS),
+                description="Format of the export (default: from `Accept`, else `ndjson`).",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="ontology",
+                type=str,
+                many=True,
+                description="Only export the terms of these ontology URIs (repeat the parameter).",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="updated_since",
+                type=OpenApiTypes.DATETIME,
+                description="Only export the terms updated at or after this ISO 8601 date or datetime, "
+                "less `EXPORT_WATERMARK_LAG` seconds.",
+                required=False,
+            ),
+        ],
+        responses={
+            200: OpenApiTypes.BINARY,
+            # errors are JSON, see handle_exception
+            (400, "application/json"): {"description": "Bad Request"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        updated_since = request.query_params.get("updated_since")
+        if updated_since:
+            try:
+                updated_since = export.parse_watermark(updated_since)
+            except ValueError:
+                raise ValidationError({"updated_since": "Must be an ISO 8601 date or datetime."})
+        chunks = export.term_chunks(request.query_params.getlist("ontology"), updated_since or None)
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type + (f"; charset={renderer.charset}" if renderer.charset else "")
+        return stream_response(
+            request,
+            export.export_terms(renderer.format, chunks),
+            content_type=content_type,
+            headers={"Content-Disposition": f'attachment; filename="terms.{renderer.format}"'},
+        )
+
+    def perform_content_negotiation(self, request, force=False):
+        # DRF answers an unknown ?format= with a 404
+        format = request.query_params.get(api_settings.URL_FORMAT_OVERRIDE)
+        if format and format not in export.FORMATS and not force:
+            raise ValidationError({"format": f"Choose from {', '.join(export.FORMATS)}."})
+        return super().perform_content_negotiation(request, force)
+
+    def handle_exception(self, exc):
+        # errors are JSON whatever the format asked for
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
+
+def search_terms(request, query, fields):
+    """The ranked ``values()`` queryset of a ``/search/`` request, before pagination."""
+    search_query = SearchQuery(
+        query, config=models.SEARCH_CONFIG, search_type="websearch"
+    )
+    # ontology weight x term weight is precomputed, no join to the ontologies
+    score = F("static_score") * F("rank")
+
+    under = request.query_params.get("under")
+    if under:
+        in_branch = models.TermClosure.objects.filter(
+            ancestor__uri=under, descendant_id=OuterRef("id")
+        )
+        score = score * Case(
+            When(Exists(in_branch), then=Value(settings.HIERARCHY_UNDER_BOOST)),
+            default=Value(1.0),
+            output_field=FloatField(),
+        )
+    if request.query_params.get("boost_ancestors", "").lower() in ("true", "1"):
+        score = score * (1.0 + F("inherited_weight"))
+
+    terms = (
+        models.Term.objects.filter(search_vector=search_query, is_obsolete=False)
+        .annotate(rank=SearchRank(F("search_vector"), search_query))
+        .annotate(score=score)
+    )
+    subtree = request.query_params.get("subtree")
+    if subtree:
+        terms = terms.filter(ancestor_links__ancestor__uri=subtree)
+    # the sort key is needed for the cursor even when not asked for
+    columns = [*serializers.term_columns(fields), "uri", "is_favorite", "score"]
+    return terms.values(*dict.fromkeys(columns))
+
+
+@method_decorator(http_cache.conditional(http_cache.search_etag), name="dispatch")
 class SearchView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     @extend_schema(
         operation_id="Search Terms",
-        description="Search for terms by their URI, label, or definition using a full-text search.",
+        description=(
+            "Search for terms by their URI, label, or definition using a full-text search. "
+            "Favorites come first, then results are ordered by ontology weight × term weight × "
+            "text rank. Label matches weigh more than definition matches, which weigh more than "
+            "URI matches. Results are paginated with an opaque cursor: follow the `next` link "
+            "until it is null."
+        ),
         parameters=[
             OpenApiParameter(
                 name="query",
                 type=str,
-                description="The search query string to match against term URIs, labels, or definitions.",
+                description=(
+                    "The search query string to match against term URIs, labels, or definitions. "
+                    'Supports web search syntax: "quoted phrases", OR, and -exclusions.'
+                ),
                 required=True,
             ),
+            OpenApiParameter(
+                name="subtree",
+                type=str,
+                description="Only return terms that are this term (URI) or one of its descendants.",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="under",
+                type=str,
+                description="Rank terms in the branch under this term (URI) higher, without excluding the others.",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="boost_ancestors",
+                type=bool,
+                description="Boost terms whose ancestors are favorites or weighted above 1.",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="Number of results per page (capped server-side).",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                description="Opaque cursor taken from the `next` link of the previous page.",
+                required=False,
+            ),
+            FIELDS_PARAMETER,
+            COMPACT_PARAMETER,
+            EMBED_PARAMETER,
         ],
         responses={
-            200: serializers.TermSerializer(many=True),
+            200: inline_serializer(
+                name="SearchResults",
+                fields={
+                    "next": drf_serializers.URLField(allow_null=True),
+                    "results": serializers.TermSerializer(many=True),
+                },
+            ),
             400: {"description": "Bad Request"},
         },
     )
@@ -50,11 +323,556 @@ class SearchView(APIView):
                 {"error": "Query parameter 'query' is required."}, status=400
             )
 
-        terms = models.Term.objects.annotate(
-            search=SearchVector("uri", "label", "definition"),
-        ).filter(search=query)
+        cache_key = search_cache.search_cache_key(request)
+        data = search_cache.lookup(cache_key)
+        if data is None:
+            data = self.search(request, query)
+            search_cache.store(cache_key, data)
+        return Response(data)
+
+    def search(self, request, query):
+        fields = serializers.parse_term_fields(request)
+        compact = serializers.is_compact(request)
+        embed = serializers.parse_embed(request)
+        if settings.SEARCH_BACKEND == "memory":
+            data = self.search_memory(request, query, fields, compact, embed)
+            if data is not None:
+                return data
+
+        terms = search_terms(request, query, fields)
+        paginator = KeysetPagination()
+        with instrumentation.explain_slow_queries():
+            page = paginator.paginate_rows(prepared.fetch_values(paginator.page_queryset(terms, request)))
+        return paginated_terms(paginator, page, fields, compact, embed)
+
+    def search_memory(self, request, query, fields, compact, embed):
+        """Answer from the in-process index, or return None to fall back to Postgres.
+
+        The index only knows plain words: web search operators and the hierarchy
+        parameters still need the database.
+        """
+        if any(request.query_params.get(name) for name in HIERARCHY_SEARCH_PARAMS):
+            return None
+        if WEBSEARCH_OPERATORS.search(query):
+            return None
+        index = get_search_index()
+        if index is None:
+            return None
+
+        paginator = KeysetPagination()
+        with instrumentation.timing("index"):
+            page = paginator.paginate_ranked(index.search(query), request)
+        documents = [index.document(match.doc_id) for match in page]
+        return paginated_terms(paginator, documents, fields, compact, embed)
+
+
+class SearchBatchView(APIView):
+    # a read-only search, but a POST of up to SEARCH_BATCH_MAX_QUERIES queries:
+    # only for users, each throttled to SEARCH_BATCH_THROTTLE_RATE batches
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "search-batch"
+
+    @extend_schema(
+        operation_id="Batch Search Terms",
+        description=(
+            "Return the top matches of each of many queries, ranked like `/search/`. "
+            "Queries are answered by chunks, each chunk with a single SQL statement. "
+            "With `stream=true` (or `Accept: application/x-ndjson`) the response is "
+            "newline-delimited JSON, one line per query, written as chunks complete. "
+            "Requires authentication; each user may send `SEARCH_BATCH_THROTTLE_RATE` batches."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="stream",
+                type=bool,
+                description="Stream one JSON line per query instead of a single JSON document.",
+                required=False,
+            ),
+            FIELDS_PARAMETER,
+            COMPACT_PARAMETER,
+        ],
+        request=serializers.SearchBatchSerializer,
+        responses={
+            200: inline_serializer(
+                name="SearchBatchResults",
+                fields={
+                    "results": inline_serializer(
+                        name="SearchBatchResult",
+                        fields={
+                            "query": drf_serializers.CharField(),
+                            "results": serializers.TermSerializer(many=True),
+                        },
+                        many=True,
+                    ),
+                },
+            ),
+            400: {"description": "Bad Request"},
+            403: {"description": "Not authenticated"},
+            429: {"description": "Too many batches, retry after `Retry-After` seconds"},
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        body = serializers.SearchBatchSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        fields = serializers.parse_term_fields(request)
+        compact = serializers.is_compact(request)
+        batch = search_batch(body.validated_data["queries"], body.validated_data["limit"], fields, compact)
+
+        stream = request.query_params.get("stream", "").lower() in ("true", "1")
+        if stream or "application/x-ndjson" in request.headers.get("Accept", ""):
+            return stream_response(
+                request, ndjson_lines(batch, compact), content_type="application/x-ndjson"
+            )
+
+        results = []
+        ontologies = {}
+        for query, hits, new in batch:
+            results.append({"query": query, "results": hits})
+            ontologies.update(new)
+        data = {"results": results}
+        if compact:
+            data["ontologies"] = ontologies
+        return Response(data)
+
+
+class SearchCacheStatsView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="Search Cache Statistics",
+        description=(
+            "Hit and miss counters of the search result cache, in the worker process that "
+            "answers. `/metrics` exports them as `ontology_api_search_cache_lookups_total`."
+        ),
+        responses={
+            200: inline_serializer(
+                name="SearchCacheStats",
+                fields={
+                    "hits": drf_serializers.IntegerField(),
+                    "misses": drf_serializers.IntegerField(),
+                    "hit_ratio": drf_serializers.FloatField(allow_null=True),
+                },
+            ),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(search_cache.stats())
+
+
+class LookupView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="Lookup Terms",
+        description=(
+            "Resolve an exact name or identifier to terms: a URI, a CURIE such as "
+            "`FOODON:03301710`, or a label (in any language), synonym or cross-reference, "
+            "compared case- and space-insensitively. Each is answered by one index lookup, "
+            "without full-text search. Best matches come first."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="query",
+                type=str,
+                description="The URI, CURIE, label, synonym or cross-reference to resolve.",
+                required=True,
+            ),
+        ],
+        responses={
+            200: serializers.LookupSerializer(many=True),
+            400: {"description": "Bad Request"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("query", "")
+        if not query.strip():
+            return Response(
+                {"error": "Query parameter 'query' is required."}, status=400
+            )
+        return Response(resolve(query, settings.LOOKUP_MAX_RESULTS))
+
+
+def read_text(request):
+    """Decode the body of ``request`` chunk by chunk, or None past ANNOTATE_MAX_BYTES.
+
+    The body is spooled (to disk past ANNOTATE_SPOOL_SIZE) before the first
+    chunk is returned: clients send the whole body before reading the
+    response, and writing spans while they are still sending would deadlock
+    once both socket buffers are full. The cap is checked on Content-Length
+    before anything is read, and again on the bytes spooled.
+    """
+    if int(request.META.get("CONTENT_LENGTH") or 0) > settings.ANNOTATE_MAX_BYTES:
+        return None
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.ANNOTATE_SPOOL_SIZE)
+    size = 0
+    while request.stream is not None and (data := request.stream.read(settings.ANNOTATE_CHUNK_SIZE)):
+        size += len(data)
+        if size > settings.ANNOTATE_MAX_BYTES:
+            spool.close()
+            return None
+        spool.write(data)
+    spool.seek(0)
+
+    def chunks():
+        decoder = codecs.getincrementaldecoder(request.encoding or "utf-8")(errors="replace")
+        with spool:
+            while data := spool.read(settings.ANNOTATE_CHUNK_SIZE):
+                yield decoder.decode(data)
+        yield decoder.decode(b"", final=True)
+
+    return chunks()
+
 
-        terms.order_by("is_favorite", "weight", "label")
+def stream_response(request, chunks, **kwargs):
+    """A ``StreamingHttpResponse`` sending ``chunks`` as they are produced, under ASGI too.
 
-        serializer = serializers.TermSerializer(terms, many=True)
-        return Response(serializer.data)
+    Under ASGI, Django reads a sync iterator to the end before sending any of
+    it. There, the chunks are produced one at a time in the thread of the
+    request instead, where its database connection (and open cursor) lives.
+    """
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = in_request_thread(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
+
+
+async def in_request_thread(chunks):
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await step(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def ndjson_chunks(items):
+    """One JSON line per item, written ANNOTATE_CHUNK_SIZE characters at a time."""
+    lines = []
+    size = 0
+    for item in items:
+        line = json.dumps(item, separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= settings.ANNOTATE_CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines)
+
+
+class AnnotateView(APIView):
+    # a read-only lookup, but a POST of up to ANNOTATE_MAX_BYTES of text:
+    # only for users, each throttled to ANNOTATE_THROTTLE_RATE requests
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "annotate"
+
+    @extend_schema(
+        operation_id="Annotate Text",
+        description=(
+            "Find the terms whose label appears in a text, as character spans. Labels match "
+            "whole words, case-insensitively; overlapping mentions resolve to the leftmost "
+            "longest one unless `overlapping=true`. Send `{\"text\": ...}` as JSON, or a "
+            "`text/plain` body (up to `ANNOTATE_MAX_BYTES`) to stream one JSON line per span. "
+            "Requires authentication; each user may send `ANNOTATE_THROTTLE_RATE` texts."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="overlapping",
+                type=bool,
+                description="Return every mention, including the ones inside longer mentions.",
+                required=False,
+            ),
+        ],
+        request={
+            "application/json": serializers.AnnotateSerializer,
+            "text/plain": {"type": "string"},
+        },
+        responses={
+            200: inline_serializer(
+                name="Annotations",
+                fields={"annotations": serializers.AnnotationSerializer(many=True)},
+            ),
+            400: {"description": "Bad Request"},
+            403: {"description": "Not authenticated"},
+            413: {"description": "The text/plain body is larger than ANNOTATE_MAX_BYTES"},
+            429: {"description": "Too many texts, retry after `Retry-After` seconds"},
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        longest = request.query_params.get("overlapping", "").lower() not in ("true", "1")
+        automaton = get_automaton()
+
+        if request.content_type.startswith("text/plain"):
+            text = read_text(request)
+            if text is None:
+                return Response(
+                    {"error": f"The text is larger than {settings.ANNOTATE_MAX_BYTES} bytes."}, status=413
+                )
+            spans = automaton.annotate(text, longest)
+            return stream_response(request, ndjson_chunks(spans), content_type="application/x-ndjson")
+
+        body = serializers.AnnotateSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        spans = automaton.annotate([body.validated_data["text"]], longest)
+        return Response({"annotations": list(spans)})
+
+
+def autocomplete_params(request):
+    """``(query, limit, error)`` of an ``/autocomplete/`` request, ``error`` being the message of a 400."""
+    query = request.query_params.get("query", "").strip().lower()
+    if not query:
+        return query, None, "Query parameter 'query' is required."
+    try:
+        limit = int(request.query_params.get("limit", settings.AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        return query, None, "Parameter 'limit' must be an integer."
+    return query, max(1, min(limit, settings.AUTOCOMPLETE_MAX_LIMIT)), None
+
+
+def autocomplete_terms(query, limit):
+    """The suggestions for the lowercased fragment ``query``, as a ``values()`` queryset.
+
+    A term is suggested when its label starts with ``query`` or is a fuzzy
+    match, or when one of its other names (labels in other languages and
+    synonyms, not xrefs) starts with ``query``.
+    """
+    # Each branch of the union is served by a gin_trgm_ops index on the lowercased text
+    names = models.TermSynonym.objects.alias(lower_text=Lower("text")).exclude(kind=models.TermSynonym.Kind.XREF)
+    by_name = names.filter(lower_text__startswith=query)
+    candidates = (
+        models.Term.objects.alias(lower_label=Lower("label"))
+        .filter(Q(lower_label__startswith=query) | Q(lower_label__trigram_word_similar=query))
+        .values("id")
+        .union(by_name.values("term_id"))
+    )
+    return (
+        models.Term.objects.alias(lower_label=Lower("label"))
+        .filter(id__in=candidates, is_obsolete=False)
+        .alias(
+            is_prefix=Case(
+                When(lower_label__startswith=query, then=Value(1)),
+                When(Exists(by_name.filter(term=OuterRef("id"))), then=Value(1)),
+                default=Value(0),
+            ),
+            similarity=TrigramWordSimilarity(query, Lower("label")),
+        )
+        .order_by(
+            "-is_prefix",
+            "-is_favorite",
+            "-similarity",
+            Length("label"),
+            "label",
+        )
+        .values("uri", "label", "ontology")[:limit]
+    )
+
+
+class AutocompleteView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="Autocomplete Terms",
+        description=(
+            "Suggest term labels for a prefix or a fuzzy fragment, for typeahead. "
+            "Terms whose label or one of whose synonyms (labels in other languages included) "
+            "starts with the fragment come first, then the closest fuzzy matches of the label."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="query",
+                type=str,
+                description="The prefix or fragment typed so far.",
+                required=True,
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="Number of suggestions to return (capped server-side).",
+                required=False,
+            ),
+        ],
+        responses={
+            200: serializers.AutocompleteSerializer(many=True),
+            400: {"description": "Bad Request"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        query, limit, error = autocomplete_params(request)
+        if error:
+            return Response({"error": error}, status=400)
+        return Response(prepared.fetch_values(autocomplete_terms(query, limit)))
+
+
+HIERARCHY_FIELDS = ("uri", "label", "ontology", "depth")
+
+uri_parameter = OpenApiParameter(
+    name="uri",
+    type=str,
+    description="The URI of the term.",
+    required=True,
+)
+
+
+def hierarchy_rows(links, term_field):
+    """Flatten TermClosure rows into ``HIERARCHY_FIELDS`` dicts for ``term_field``."""
+    return links.values(
+        "depth",
+        uri=F(f"{term_field}__uri"),
+        label=F(f"{term_field}__label"),
+        ontology=F(f"{term_field}__ontology"),
+    )
+
+
+class TermAncestorsView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="Term Ancestors",
+        description="All ancestors of a term, nearest first, with their distance in subClassOf steps.",
+        parameters=[uri_parameter],
+        responses={
+            200: serializers.HierarchyTermSerializer(many=True),
+            404: {"description": "Not Found"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        term = get_object_or_404(models.Term, uri=request.query_params.get("uri", ""))
+        links = models.TermClosure.objects.filter(descendant=term, depth__gt=0)
+        return Response(
+            list(hierarchy_rows(links, "ancestor").order_by("depth", "ancestor__uri"))
+        )
+
+
+class TermDescendantsView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="Term Descendants",
+        description="Descendants of a term, nearest first, with their distance in subClassOf steps.",
+        parameters=[
+            uri_parameter,
+            OpenApiParameter(
+                name="max_depth",
+                type=int,
+                description="Only return descendants at most this many steps away (1 for direct children).",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="Maximum number of descendants to return (capped server-side).",
+                required=False,
+            ),
+        ],
+        responses={
+            200: serializers.HierarchyTermSerializer(many=True),
+            400: {"description": "Bad Request"},
+            404: {"description": "Not Found"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        term = get_object_or_404(models.Term, uri=request.query_params.get("uri", ""))
+        try:
+            max_depth = request.query_params.get("max_depth")
+            max_depth = int(max_depth) if max_depth else None
+            limit = int(request.query_params.get("limit", settings.HIERARCHY_MAX_RESULTS))
+        except ValueError:
+            return Response(
+                {"error": "Parameters 'max_depth' and 'limit' must be integers."}, status=400
+            )
+        limit = max(1, min(limit, settings.HIERARCHY_MAX_RESULTS))
+
+        links = models.TermClosure.objects.filter(ancestor=term, depth__gt=0)
+        if max_depth is not None:
+            links = links.filter(depth__lte=max_depth)
+        rows = hierarchy_rows(links, "descendant").order_by("depth", "descendant__uri")
+        return Response(list(rows[:limit]))
+
+
+class TermDepthView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="Term Depth",
+        description="Distance of a term to its furthest ancestor (0 for a root term).",
+        parameters=[uri_parameter],
+        responses={
+            200: inline_serializer(
+                name="TermDepth",
+                fields={
+                    "uri": drf_serializers.URLField(),
+                    "depth": drf_serializers.IntegerField(),
+                },
+            ),
+            404: {"description": "Not Found"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        uri = request.query_params.get("uri", "")
+        depth = models.TermClosure.objects.filter(descendant__uri=uri).aggregate(
+            depth=Max("depth")
+        )["depth"]
+        if depth is None:
+            return Response({"detail": "No Term matches the given query."}, status=404)
+        return Response({"uri": uri, "depth": depth})
+
+
+class LowestCommonAncestorView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="Lowest Common Ancestor",
+        description=(
+            "The lowest common ancestors of two or more terms: the shared ancestors with the "
+            "smallest total distance to the given terms. `depth` is that total distance."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="uri",
+                type=str,
+                many=True,
+                description="The URIs of the terms (repeat the parameter).",
+                required=True,
+            ),
+        ],
+        responses={
+            200: serializers.HierarchyTermSerializer(many=True),
+            400: {"description": "Bad Request"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        uris = set(request.query_params.getlist("uri"))
+        if len(uris) < 2:
+            return Response(
+                {"error": "At least two distinct 'uri' parameters are required."}, status=400
+            )
+
+        common = (
+            models.TermClosure.objects.filter(descendant__uri__in=uris)
+            .values("ancestor")
+            .annotate(matched=Count("descendant"), total_depth=Sum("depth"))
+            .filter(matched=len(uris))
+            .order_by("total_depth")
+            .values(
+                "total_depth",
+                uri=F("ancestor__uri"),
+                label=F("ancestor__label"),
+                ontology=F("ancestor__ontology"),
+            )
+        )
+        rows = list(common)
+        lowest = rows[0]["total_depth"] if rows else None
+        return Response(
+            [
+                {
+                    "uri": row["uri"],
+                    "label": row["label"],
+                    "ontology": row["ontology"],
+                    "depth": row["total_depth"],
+                }
+                for row in rows
+                if row["total_depth"] == lowest
+            ]
+        )
@@ -4,14 +4,35 @@ from . import models
 
 @admin.register(models.Ontology)
 class OntologyAdmin(admin.ModelAdmin):
-    list_display = ("label", "uri", "created_at")
+    list_display = ("label", "uri", "weight", "created_at")
     search_fields = ("label", "uri")
     ordering = ("-created_at",)
 
 
+@admin.register(models.Prefix)
+class PrefixAdmin(admin.ModelAdmin):
+    list_display = ("prefix", "namespace")
+    search_fields = ("prefix", "namespace")
+
+
+class TermSynonymInline(admin.TabularInline):
+    model = models.TermSynonym
+    fields = ("text", "kind", "lang")
+    extra = 0
+
+
+class TermParentInline(admin.TabularInline):
+    model = models.TermParent
+    fk_name = "child"
+    fields = ("kind", "relation", "parent_uri", "parent")
+    readonly_fields = ("parent",)
+    extra = 0
+
+
 @admin.register(models.Term)
 class TermAdmin(admin.ModelAdmin):
     list_display = ("label", "ontology", "is_favorite", "weight", "created_at")
     search_fields = ("label", "uri")
     ordering = ("uri",)
-    list_filter = ("ontology", "is_favorite")
+    list_filter = ("ontology", "is_favorite", "is_obsolete")
+    inlines = [TermParentInline, TermSynonymInline]
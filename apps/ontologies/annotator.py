@@ -0,0 +1,200 @@
+"""Find the terms mentioned in a text with an Aho–Corasick automaton.
+
+Every label and exact synonym is split into word tokens (folded like the search index), and
+the automaton is built over token sequences rather than characters, so a
+label only matches whole words ("cheese" is not found in "cheesecake").
+Scanning a text is a single pass over its tokens whatever the number of
+labels, and works on a stream of chunks so large documents never have to be
+held in memory.
+
+Each worker keeps one automaton, rebuilt when the generation of the
+ontologies changes (after an ingest or an edit).
+"""
+
+import re
+import threading
+from collections import defaultdict, deque
+from itertools import chain
+
+from django.conf import settings
+
+from .generations import generation_token
+from .models import Term, TermSynonym
+from .search_index import fold_token
+
+WORD_RE = re.compile(r"[A-Za-z0-9]+")
+
+# distinct words whose folded token is remembered while scanning a text
+FOLDED_CACHE_SIZE = 100000
+
+
+class Automaton:
+    def __init__(self, generation=None):
+        self.generation = generation
+        self.goto = [{}]
+        self.fail = [0]
+        # (number of tokens, entry) of the labels ending at each state
+        self.outputs = [[]]
+        # the terms sharing each distinct label
+        self.entries = []
+        self.max_tokens = 0
+
+    def add(self, tokens, terms):
+        state = 0
+        for token in tokens:
+            following = self.goto[state].get(token)
+            if following is None:
+                following = len(self.goto)
+                self.goto[state][token] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = following
+        self.outputs[state].append((len(tokens), len(self.entries)))
+        self.entries.append(terms)
+        self.max_tokens = max(self.max_tokens, len(tokens))
+
+    def compile(self):
+        """Compute the failure links, breadth first, once every label is added."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[following] = self.goto[fallback].get(token, 0)
+                # a label ending here also ends every label that is a suffix of it
+                self.outputs[following] = self.outputs[following] + self.outputs[self.fail[following]]
+
+    def scan(self, chunks):
+        """Yield ``(first token, last token, start, end, text, entry)`` of every match.
+
+        ``chunks`` is an iterable of strings; offsets are in characters from
+        the start of the whole text, and matches come by increasing end.
+        """
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        root = goto[0]
+        folded = {}
+        state = 0
+        offset = 0  # position of text[0] in the whole text
+        text = ""
+        starts = deque(maxlen=max(self.max_tokens, 1))
+        index = -1
+        position = 0  # where the next word is looked for in text
+        for chunk in chain(chunks, [None]):
+            final = chunk is None
+            text += chunk or ""
+            size = partial = len(text)
+            for match in WORD_RE.finditer(text, position):
+                start, end = match.span()
+                if end == size and not final:
+                    partial = start
+                    break  # the word may go on in the next chunk
+                index += 1
+                starts.append(offset + start)
+
+                word = match.group()
+                token = folded.get(word)
+                if token is None:
+                    if len(folded) > FOLDED_CACHE_SIZE:
+                        folded.clear()
+                    token = folded[word] = fold_token(word)
+                if not state and token not in root:
+                    continue  # most words of a text start no label
+                while state and token not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(token, 0)
+
+                for length, entry in outputs[state]:
+                    first = starts[-length]
+                    yield (
+                        index - length + 1,
+                        index,
+                        first,
+                        offset + end,
+                        text[first - offset: end],
+                        entry,
+                    )
+            # keep what later matches may still need: the window of tokens
+            # that can start a label, and the word left incomplete
+            cut = min(starts[0] - offset, partial) if starts else partial
+            text = text[cut:]
+            offset += cut
+            position = partial - cut
+
+    def annotate(self, chunks, longest=True):
+        """Yield the spans of ``chunks`` as dicts.
+
+        With ``longest``, overlapping matches are resolved leftmost-longest,
+        as soon as no later match can overlap them anymore.
+        """
+        matches = self.scan(chunks)
+        if longest:
+            matches = self._leftmost_longest(matches)
+        for _, _, start, end, text, entry in matches:
+            yield {"start": start, "end": end, "text": text, "terms": self.entries[entry]}
+
+    def _leftmost_longest(self, matches):
+        pending = []
+        last = -1  # last token of the latest match kept
+        for match in chain(matches, [None]):
+            # later matches end after this one, so cannot start before threshold
+            threshold = float("inf") if match is None else match[1] - self.max_tokens + 1
+            pending.sort(key=lambda candidate: (candidate[0], -candidate[1]))
+            while pending and pending[0][0] < threshold:
+                candidate = pending.pop(0)
+                if candidate[0] > last:
+                    last = candidate[1]
+                    yield candidate
+            if match is not None and match[0] > last:
+                pending.append(match)
+
+
+def build_automaton(generation=None):
+    """Compile the labels and exact synonyms of the non-obsolete terms.
+
+    Related, narrow and broad synonyms are left out: a mention of one does
+    not name the term itself.
+    """
+    terms = {}
+    names = []
+    rows = Term.objects.filter(is_obsolete=False).values_list("id", "uri", "label", "ontology_id")
+    for term_id, uri, label, ontology in rows.iterator(chunk_size=5000):
+        terms[term_id] = {"uri": uri, "label": label, "ontology": ontology}
+        names.append((term_id, label))
+    synonyms = TermSynonym.objects.filter(
+        term__is_obsolete=False,
+        kind__in=[TermSynonym.Kind.LABEL, TermSynonym.Kind.EXACT],
+    ).values_list("term_id", "text")
+    names += synonyms.iterator(chunk_size=5000)
+
+    labels = defaultdict(dict)
+    for term_id, name in names:
+        if term_id not in terms or not name or len(name) < settings.ANNOTATE_MIN_LABEL_LENGTH:
+            continue
+        tokens = tuple(fold_token(token) for token in WORD_RE.findall(name))
+        if tokens:
+            labels[tokens][term_id] = terms[term_id]
+
+    automaton = Automaton(generation)
+    for tokens, entry in labels.items():
+        automaton.add(tokens, list(entry.values()))
+    automaton.compile()
+    return automaton
+
+
+_automaton = None
+_lock = threading.Lock()
+
+
+def get_automaton():
+    """The automaton of this worker, rebuilt when the ontologies changed."""
+    global _automaton
+    generation = generation_token()
+    if _automaton is None or _automaton.generation != generation:
+        with _lock:
+            if _automaton is None or _automaton.generation != generation:
+                _automaton = build_automaton(generation)
+    return _automaton
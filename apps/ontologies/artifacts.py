@@ -0,0 +1,212 @@
+"""Local cache of downloaded ontologies and of their parsed content.
+
+Every URL gets a directory in the cache holding:
+
+- ``raw``: the last downloaded file, refreshed with a conditional GET
+  (ETag / Last-Modified) so an unchanged release is not downloaded again;
+- ``snapshot``: the term records extracted from ``raw``, so re-ingesting
+  or rebuilding the database does not parse the RDF again;
+- ``meta.json``: HTTP validators, content hash, ontology headers and usage.
+
+The snapshot is a gzip stream of length-prefixed ``marshal`` records, one
+tuple per term in ``SNAPSHOT_FIELDS`` order. It is written and read
+sequentially, so neither side holds more than one record in memory.
+"""
+
+import gzip
+import hashlib
+import json
+import marshal
+import os
+import shutil
+import struct
+import sys
+import time
+from pathlib import Path
+
+import requests
+from django.core.management.base import CommandError
+
+SNAPSHOT_VERSION = 3
+SNAPSHOT_FIELDS = ("uri", "label", "definition", "subClassOf", "relations", "synonyms", "is_obsolete")
+SNAPSHOT_MAGIC = b"ONTOSNAP"
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+RECORD_HEADER = struct.Struct("<I")
+
+
+def _snapshot_header():
+    # marshal is only stable within a Python version, keep it in the header
+    # and in meta.json, where has_snapshot checks it before the file is read
+    return {
+        "version": SNAPSHOT_VERSION,
+        "fields": list(SNAPSHOT_FIELDS),
+        "python": list(sys.version_info[:2]),
+    }
+
+
+def write_snapshot(path: Path, records):
+    """Write ``records`` to ``path`` atomically and return how many were written."""
+    count = 0
+    partial = path.with_suffix(".part")
+    with gzip.open(partial, "wb", compresslevel=6) as snapshot:
+        header = json.dumps(_snapshot_header()).encode()
+        snapshot.write(SNAPSHOT_MAGIC + RECORD_HEADER.pack(len(header)) + header)
+        for record in records:
+            data = marshal.dumps(tuple(record[field] for field in SNAPSHOT_FIELDS))
+            snapshot.write(RECORD_HEADER.pack(len(data)) + data)
+            count += 1
+        # a zero length marks a complete snapshot
+        snapshot.write(RECORD_HEADER.pack(0))
+    os.replace(partial, path)
+    return count
+
+
+def read_snapshot(path: Path):
+    """Yield the records of the snapshot at ``path``."""
+    with gzip.open(path, "rb") as snapshot:
+        if snapshot.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not an ontology snapshot")
+        (size,) = RECORD_HEADER.unpack(snapshot.read(RECORD_HEADER.size))
+        if json.loads(snapshot.read(size)) != _snapshot_header():
+            raise ValueError(f"{path} was written by an incompatible version")
+        while True:
+            (size,) = RECORD_HEADER.unpack(snapshot.read(RECORD_HEADER.size))
+            if size == 0:
+                return
+            yield dict(zip(SNAPSHOT_FIELDS, marshal.loads(snapshot.read(size))))
+
+
+class CacheEntry:
+    def __init__(self, directory: Path, url: str):
+        self.url = url
+        self.path = directory / hashlib.sha1(url.encode()).hexdigest()[:16]
+        self.raw_path = self.path / "raw"
+        self.snapshot_path = self.path / "snapshot"
+        self.meta_path = self.path / "meta.json"
+        try:
+            self.meta = json.loads(self.meta_path.read_text())
+        except (OSError, ValueError):
+            self.meta = {"url": url}
+
+    def save_meta(self):
+        self.meta["last_used"] = time.time()
+        partial = self.meta_path.with_suffix(".part")
+        partial.write_text(json.dumps(self.meta, indent=2))
+        os.replace(partial, self.meta_path)
+
+    def fetch(self, offline=False):
+        """Make ``raw`` current. Returns False when the cached copy was reused."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        cached = self.raw_path.exists() and "sha256" in self.meta
+        if offline:
+            if not cached:
+                raise CommandError(f"{self.url} is not in the ontology cache, cannot ingest offline.")
+            print(f"Offline: using the cached copy of {self.url}")
+            self.save_meta()
+            return False
+
+        headers = {}
+        if cached and self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if cached and self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+
+        print(f"Downloading ontology from {self.url}...")
+        digest = hashlib.sha256()
+        size = 0
+        partial = self.raw_path.with_suffix(".part")
+        try:
+            with requests.get(self.url, headers=headers, stream=True) as response:
+                response.raise_for_status()
+                if response.status_code == 304:
+                    print("Not modified since the last download, using the cached copy.")
+                    self.save_meta()
+                    return False
+                with open(partial, "wb") as destination:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        destination.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except requests.RequestException as e:
+            partial.unlink(missing_ok=True)
+            raise CommandError(f"Failed to fetch the ontology from {self.url}: {e}")
+
+        print(f"Downloaded {size / 1024 / 1024:.1f} MB")
+        self.meta.update({"etag": etag, "last_modified": last_modified})
+        if cached and self.meta["sha256"] == digest.hexdigest():
+            print("Content unchanged since the last download, using the cached snapshot.")
+            partial.unlink()
+            self.save_meta()
+            return False
+
+        os.replace(partial, self.raw_path)
+        self.snapshot_path.unlink(missing_ok=True)
+        self.meta.update({"sha256": digest.hexdigest(), "size": size})
+        self.meta.pop("snapshot", None)
+        self.save_meta()
+        return True
+
+    def has_snapshot(self):
+        """Whether the stored snapshot can be read by this version and Python."""
+        snapshot = self.meta.get("snapshot")
+        return (
+            snapshot is not None
+            and all(snapshot.get(key) == value for key, value in _snapshot_header().items())
+            and self.snapshot_path.exists()
+        )
+
+    def save_snapshot(self, records, ontologies):
+        """Store ``records``; ``ontologies`` is called once they are consumed."""
+        count = write_snapshot(self.snapshot_path, records)
+        self.meta["snapshot"] = {
+            **_snapshot_header(),
+            "terms": count,
+            "ontologies": ontologies(),
+        }
+        self.save_meta()
+        return count
+
+    @property
+    def ontologies(self):
+        return self.meta["snapshot"]["ontologies"]
+
+    def records(self):
+        return read_snapshot(self.snapshot_path)
+
+
+class OntologyCache:
+    def __init__(self, directory, max_bytes=None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def entry(self, url: str):
+        return CacheEntry(self.directory, url)
+
+    def evict(self):
+        """Drop the least recently used entries until the cache fits in ``max_bytes``."""
+        if self.max_bytes is None or not self.directory.exists():
+            return []
+
+        entries = []
+        for path in self.directory.iterdir():
+            if not path.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+            try:
+                last_used = json.loads((path / "meta.json").read_text())["last_used"]
+            except (OSError, ValueError, KeyError):
+                last_used = 0
+            entries.append((last_used, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted.append(path)
+        return evicted
@@ -0,0 +1,74 @@
+"""CURIE prefixes: ``FOODON:03301710`` <-> ``http://purl.obolibrary.org/obo/FOODON_03301710``.
+
+The prefixes live in the Prefix table and are cached like the ontology list
+(see generations), so expanding a CURIE costs no query.
+"""
+
+import re
+
+from django.core.cache import cache
+
+OBO_PURL = "http://purl.obolibrary.org/obo/"
+PREFIXES_KEY = "curie-prefixes"
+
+CURIE_RE = re.compile(r"^([A-Za-z][A-Za-z0-9.-]*)[:_]([A-Za-z0-9][A-Za-z0-9_.-]*)$")
+OBO_URI_RE = re.compile(rf"^{re.escape(OBO_PURL)}([A-Za-z][A-Za-z0-9]*)_[A-Za-z0-9]")
+
+
+def obo_prefix(uri):
+    """``(prefix, namespace)`` of an OBO PURL, or None."""
+    match = OBO_URI_RE.match(uri)
+    if match is None:
+        return None
+    prefix = match.group(1)
+    return prefix, f"{OBO_PURL}{prefix}_"
+
+
+def prefixes():
+    """Return ``{casefolded prefix: namespace}`` for every registered prefix."""
+    from .models import Prefix
+
+    found = cache.get(PREFIXES_KEY)
+    if found is None:
+        found = {prefix.casefold(): namespace for prefix, namespace in Prefix.objects.values_list("prefix", "namespace")}
+        cache.set(PREFIXES_KEY, found, timeout=None)
+    return found
+
+
+def forget_prefixes():
+    cache.delete(PREFIXES_KEY)
+
+
+def register_prefixes(uris):
+    """Add the OBO prefixes used by ``uris`` that are not registered yet."""
+    from .models import Prefix
+
+    known = prefixes()
+    new = {}
+    for uri in uris:
+        found = obo_prefix(uri)
+        if found and found[0].casefold() not in known:
+            new[found[0]] = found[1]
+    if new:
+        Prefix.objects.bulk_create(
+            [Prefix(prefix=prefix, namespace=namespace) for prefix, namespace in new.items()],
+            ignore_conflicts=True,
+        )
+        forget_prefixes()
+    return len(new)
+
+
+def expand_curie(identifier):
+    """``FOODON:03301710`` or ``FOODON_03301710`` as a URI, or None.
+
+    Registered prefixes are matched case-insensitively; an unknown prefix is
+    assumed to be an OBO one.
+    """
+    match = CURIE_RE.match(identifier)
+    if match is None:
+        return None
+    prefix, local_id = match.groups()
+    namespace = prefixes().get(prefix.casefold())
+    if namespace is None:
+        return f"{OBO_PURL}{prefix}_{local_id}"
+    return f"{namespace}{local_id}"
@@ -0,0 +1,246 @@
+"""Streaming export of the terms, for ``/terms/export/`` and ``export_terms``.
+
+Every term is exported with its ontology, its parents and its weights, in
+``(updated_at, id)`` order. The rows come from a server-side cursor
+``EXPORT_CHUNK_SIZE`` at a time and are written as they arrive, so memory use
+does not grow with the number of terms. Behind PgBouncer, where named cursors
+are disabled, each chunk is a keyset query on that order instead.
+
+``updated_since`` keeps the terms whose ``updated_at`` is at or after a
+watermark: the ``updated_at`` of the last term of the previous export. Ingest
+and the weight refreshes bump it, so an incremental export picks up every
+added, changed or obsoleted term. Terms deleted outright are not seen.
+
+``updated_at`` is set when the writing transaction starts, not when it
+commits, so a row committed after the previous export can carry an earlier
+time than its watermark. The filter therefore looks ``EXPORT_WATERMARK_LAG``
+seconds further back: the terms of that window are sent again (a mirror
+upserts them by URI), and no row is missed unless a write transaction ran
+for longer than the lag.
+"""
+
+import csv
+import io
+import json
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import connections, transaction
+from django.db.models import F, OuterRef, Q
+from django.db.models.functions import JSONObject
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Term, TermParent
+
+# the exported fields of a term, in order
+COLUMNS = (
+    "uri",
+    "label",
+    "definition",
+    "ontology",
+    "ontology_label",
+    "ontology_weight",
+    "weight",
+    "is_favorite",
+    "inherited_weight",
+    "static_score",
+    "is_obsolete",
+    "parents",
+    "created_at",
+    "updated_at",
+)
+PARENT_COLUMNS = ("uri", "label", "kind", "relation")  # of each of the parents
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parse_watermark(value):
+    """The datetime of an ISO 8601 date or datetime, in ``TIME_ZONE`` without an offset.
+
+    Raises ``ValueError`` when ``value`` is not one.
+    """
+    watermark = parse_datetime(value.strip())
+    if watermark is None:
+        raise ValueError(f"{value!r} is not an ISO 8601 date or datetime")
+    if timezone.is_naive(watermark):
+        watermark = timezone.make_aware(watermark)
+    return watermark
+
+
+def export_queryset(ontologies=(), updated_since=None):
+    """The ``values()`` rows of the exported terms, in export order."""
+    terms = Term.objects.all()
+    if ontologies:
+        terms = terms.filter(ontology__in=ontologies)
+    if updated_since is not None:
+        # rows committed after the watermark was read can be dated before it
+        terms = terms.filter(updated_at__gte=updated_since - timedelta(seconds=settings.EXPORT_WATERMARK_LAG))
+    # one probe of unique_term_parent per term, in the same statement
+    parents = TermParent.objects.filter(child=OuterRef("id")).order_by("kind", "parent_uri")
+    parents = parents.values(
+        json=JSONObject(uri="parent_uri", label="parent__label", kind="kind", relation="relation")
+    )
+    return terms.order_by("updated_at", "id").values(
+        "id",
+        *(column for column in COLUMNS if column not in ("ontology_label", "ontology_weight", "parents")),
+        ontology_label=F("ontology__label"),
+        ontology_weight=F("ontology__weight"),
+        parents=ArraySubquery(parents),
+    )
+
+
+def row_chunks(queryset, chunk_size):
+    """The rows of ``queryset``, ordered by ``(updated_at, id)``, in lists of ``chunk_size``."""
+    if connections[queryset.db].settings_dict["DISABLE_SERVER_SIDE_CURSORS"]:
+        yield from keyset_chunks(queryset, chunk_size)
+        return
+    # outside a transaction the cursor would be WITH HOLD, which Postgres
+    # materializes in full before the first row is read
+    with transaction.atomic(using=queryset.db):
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield chunk
+
+
+def keyset_chunks(queryset, chunk_size):
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            # the bound on updated_at alone is what the index can seek to
+            page = page.filter(updated_at__gte=last["updated_at"]).filter(
+                Q(updated_at__gt=last["updated_at"]) | Q(id__gt=last["id"])
+            )
+        chunk = list(page[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+
+
+def term_chunks(ontologies=(), updated_since=None, chunk_size=None):
+    """The exported terms, as lists of dicts with the ``COLUMNS``."""
+    queryset = export_queryset(ontologies, updated_since)
+    for rows in row_chunks(queryset, chunk_size or settings.EXPORT_CHUNK_SIZE):
+        yield [{column: row[column] for column in COLUMNS} for row in rows]
+
+
+def text_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def ndjson_chunks(chunks):
+    for terms in chunks:
+        lines = [json.dumps(term, default=text_value, separators=(",", ":")) + "\n" for term in terms]
+        yield "".join(lines).encode()
+
+
+def csv_chunks(chunks):
+    # parents do not fit in a cell, they are a JSON list
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for terms in chunks:
+        for term in terms:
+            writer.writerow(
+                [json.dumps(term["parents"]) if column == "parents" else text_value(term[column]) for column in COLUMNS]
+            )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ChunkSink:
+    """A file the Parquet writer writes to, emptied by ``take()`` after each row group.
+
+    ``tell()`` counts every byte written: the footer records the offset of
+    each row group.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    text = pa.string()
+    time = pa.timestamp("us", tz="UTC")
+    parent = pa.struct([(column, text) for column in PARENT_COLUMNS])
+    return pa.schema(
+        [
+            ("uri", text),
+            ("label", text),
+            ("definition", text),
+            ("ontology", text),
+            ("ontology_label", text),
+            ("ontology_weight", pa.float64()),
+            ("weight", pa.float64()),
+            ("is_favorite", pa.bool_()),
+            ("inherited_weight", pa.float64()),
+            ("static_score", pa.float64()),
+            ("is_obsolete", pa.bool_()),
+            ("parents", pa.list_(parent)),
+            ("created_at", time),
+            ("updated_at", time),
+        ]
+    )
+
+
+def parquet_chunks(chunks):
+    """One Parquet row group per chunk of terms."""
+    # imported here: pyarrow is slow to import and only the Parquet export needs it
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema()
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for terms in chunks:
+            writer.write_table(pa.Table.from_pylist(terms, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+WRITERS = {
+    "ndjson": ndjson_chunks,
+    "csv": csv_chunks,
+    "parquet": parquet_chunks,
+}
+
+
+def export_terms(format, chunks):
+    """``chunks`` of ``term_chunks()`` written as ``format``, as bytes."""
+    return WRITERS[format](chunks)
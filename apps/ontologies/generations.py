@@ -0,0 +1,73 @@
+"""Per-ontology data generations.
+
+Every ontology has a generation number stored in the cache. Anything derived
+from the catalogue (cached search results, HTTP validators...) embeds the
+generations it depends on in its cache key, so bumping a generation makes the
+stale entries unreachable instead of having to find and delete them.
+
+The cache must be shared by every process: ``ingest`` bumps the generations
+that the server workers read. ``settings.local`` uses the database cache and
+``settings.dev`` Redis; a per-process cache (LocMemCache) would keep serving
+stale results after an ingest.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+
+GENERATION_KEY = "ontology-generation:{}"
+ONTOLOGIES_KEY = "ontology-generation:ontologies"
+
+
+def _generation_key(ontology_uri):
+    # terms without an ontology share the generation of the empty URI
+    return GENERATION_KEY.format(ontology_uri or "")
+
+
+def _new_generation():
+    # seeded from the clock so a flushed cache never reuses an old generation
+    return time.time_ns()
+
+
+def ontology_uris():
+    from .models import Ontology
+
+    uris = cache.get(ONTOLOGIES_KEY)
+    if uris is None:
+        uris = [""] + sorted(Ontology.objects.values_list("uri", flat=True))
+        cache.set(ONTOLOGIES_KEY, uris, timeout=None)
+    return uris
+
+
+def forget_ontologies():
+    cache.delete(ONTOLOGIES_KEY)
+
+
+def bump_generation(ontology_uri=None):
+    """Invalidate everything derived from ``ontology_uri``."""
+    key = _generation_key(ontology_uri)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_generation(), timeout=None)
+
+
+def get_generations(uris=None):
+    """Return ``{ontology_uri: generation}`` for ``uris`` (all ontologies by default)."""
+    if uris is None:
+        uris = ontology_uris()
+    keys = {_generation_key(uri): uri for uri in uris}
+    found = cache.get_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: generation for key, generation in found.items()}
+
+
+def generation_token(uris=None):
+    """A short string that changes whenever one of the generations changes."""
+    generations = get_generations(uris)
+    state = ";".join(f"{uri}={generations[uri]}" for uri in sorted(generations))
+    return hashlib.sha1(state.encode()).hexdigest()[:16]
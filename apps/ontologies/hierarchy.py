@@ -0,0 +1,156 @@
+"""Maintenance of the TermClosure table."""
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Term, TermClosure, TermParent
+
+
+def rebuild_closure():
+    """Recompute the transitive closure of subClassOf from the ``is_a`` TermParent edges.
+
+    The closure is grown one level at a time from the depth-0 self links, so
+    each pair is first reached through its shortest path and cycles stop on
+    the unique constraint. Parents that are not ingested terms are ignored.
+    Everything runs in one transaction and readers keep seeing the previous
+    closure until it commits.
+    """
+    closure = TermClosure._meta.db_table
+    term = Term._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE term_edges ON COMMIT DROP AS
+            SELECT child_id AS child, parent_id AS parent
+            FROM {TermParent._meta.db_table}
+            WHERE kind = %s AND parent_id IS NOT NULL
+            """,
+            [TermParent.Kind.IS_A],
+        )
+        cursor.execute("CREATE INDEX ON term_edges (child)")
+        cursor.execute("ANALYZE term_edges")
+
+        cursor.execute(f"DELETE FROM {closure}")
+        cursor.execute(
+            f"INSERT INTO {closure} (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM {term}"
+        )
+        rows = cursor.rowcount
+
+        depth = 0
+        while True:
+            cursor.execute(
+                f"""
+                INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+                SELECT DISTINCT e.parent, c.descendant_id, %s
+                FROM {closure} c
+                JOIN term_edges e ON e.child = c.ancestor_id
+                WHERE c.depth = %s
+                ON CONFLICT (ancestor_id, descendant_id) DO NOTHING
+                """,
+                [depth + 1, depth],
+            )
+            if cursor.rowcount == 0:
+                break
+            rows += cursor.rowcount
+            depth += 1
+
+    return rows, depth
+
+
+def refresh_closure(root):
+    """Recompute the closure rows of the term id ``root`` and its descendants.
+
+    Run after the ``is_a`` edges of ``root`` changed: only the ancestors of
+    that subtree can differ, so its rows are deleted and grown again level by
+    level from the edges, like ``rebuild_closure`` does for every term.
+    Returns the number of rows written.
+    """
+    closure = TermClosure._meta.db_table
+    parent = TermParent._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH RECURSIVE subtree(id) AS (
+                SELECT %s::bigint
+                UNION
+                SELECT e.child_id
+                FROM {parent} e
+                JOIN subtree s ON e.parent_id = s.id
+                WHERE e.kind = %s
+            )
+            SELECT id FROM subtree
+            """,
+            [root, TermParent.Kind.IS_A],
+        )
+        subtree = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f"DELETE FROM {closure} WHERE descendant_id = ANY(%s)", [subtree])
+        cursor.execute(
+            f"""
+            INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+            SELECT id, id, 0 FROM unnest(%s::bigint[]) AS s(id)
+            """,
+            [subtree],
+        )
+        rows = cursor.rowcount
+
+        depth = 0
+        while True:
+            cursor.execute(
+                f"""
+                INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+                SELECT DISTINCT e.parent_id, c.descendant_id, %s
+                FROM {closure} c
+                JOIN {parent} e ON e.child_id = c.ancestor_id
+                WHERE c.depth = %s AND c.descendant_id = ANY(%s)
+                  AND e.kind = %s AND e.parent_id IS NOT NULL
+                ON CONFLICT (ancestor_id, descendant_id) DO NOTHING
+                """,
+                [depth + 1, depth, subtree, TermParent.Kind.IS_A],
+            )
+            if cursor.rowcount == 0:
+                break
+            rows += cursor.rowcount
+            depth += 1
+
+    return rows
+
+
+def refresh_inherited_weights(root=None):
+    """Recompute ``Term.inherited_weight`` for the term id ``root`` and its descendants (all terms by default).
+
+    An ancestor passes on the part of its weight above 1, plus
+    ``HIERARCHY_FAVORITE_BOOST`` if it is a favorite, multiplied by
+    ``HIERARCHY_BOOST_DECAY`` for every subClassOf step. A term keeps the
+    strongest boost among its ancestors. Only rows whose value changes are
+    written, with their ``updated_at``.
+    """
+    closure = TermClosure._meta.db_table
+    term = Term._meta.db_table
+    if root is None:
+        scope, params = f"SELECT id FROM {term}", []
+    else:
+        scope, params = f"SELECT descendant_id FROM {closure} WHERE ancestor_id = %s", [root]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH boosts AS (
+                SELECT s.id, COALESCE(MAX(
+                    (GREATEST(COALESCE(a.weight, 1.0), 1.0) - 1.0
+                     + CASE WHEN a.is_favorite THEN %s ELSE 0.0 END)
+                    * power(%s, c.depth)
+                ), 0.0) AS boost
+                FROM ({scope}) AS s(id)
+                LEFT JOIN {closure} c ON c.descendant_id = s.id AND c.depth > 0
+                LEFT JOIN {term} a ON a.id = c.ancestor_id
+                GROUP BY s.id
+            )
+            UPDATE {term} t
+            SET inherited_weight = boosts.boost, updated_at = now()
+            FROM boosts
+            WHERE t.id = boosts.id AND t.inherited_weight IS DISTINCT FROM boosts.boost
+            """,
+            [settings.HIERARCHY_FAVORITE_BOOST, settings.HIERARCHY_BOOST_DECAY, *params],
+        )
+        return cursor.rowcount
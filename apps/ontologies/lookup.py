@@ -0,0 +1,56 @@
+"""Exact resolution of a name or identifier to terms, for ``/lookup/``.
+
+A query is tried as a URI, as a CURIE (``FOODON:03301710``) or bare
+identifier (``FOODON_03301710``) expanded with the Prefix table, and as a normalized
+label, synonym or xref. Each is one primary key or index probe; no text
+search is involved.
+"""
+
+import re
+
+from .curies import expand_curie
+from .models import Term, TermSynonym, normalize_text
+
+URI_RE = re.compile(r"^https?://\S+$")
+
+# how a term was found, best first
+MATCH_ORDER = ("uri", "curie", "label", "exact", "xref", "related", "narrow", "broad")
+
+
+def resolve(query, limit):
+    """Return the terms named by ``query``, best matches first.
+
+    Each result is a dict with the term's ``uri``, ``label``, ``ontology``
+    and ``is_obsolete``, plus ``match``: the kind and text that matched.
+    """
+    query = query.strip()
+    found = {}
+
+    def keep(uri, kind, text):
+        if uri not in found or MATCH_ORDER.index(kind) < MATCH_ORDER.index(found[uri]["kind"]):
+            found[uri] = {"kind": kind, "text": text}
+
+    if URI_RE.match(query):
+        identifiers = {query: "uri"}
+    else:
+        expanded = expand_curie(query)
+        identifiers = {expanded: "curie"} if expanded else {}
+    for uri in Term.objects.filter(uri__in=identifiers).values_list("uri", flat=True):
+        keep(uri, identifiers[uri], query)
+
+    synonyms = TermSynonym.objects.filter(normalized=normalize_text(query)).values_list(
+        "term__uri", "kind", "text"
+    )
+    for uri, kind, text in synonyms:
+        keep(uri, kind, text)
+
+    terms = Term.objects.filter(uri__in=found).values("uri", "label", "ontology", "is_obsolete")
+    results = [{**term, "match": found[term["uri"]]} for term in terms]
+    results.sort(
+        key=lambda term: (
+            MATCH_ORDER.index(term["match"]["kind"]),
+            term["is_obsolete"],
+            term["uri"],
+        )
+    )
+    return results[:limit]
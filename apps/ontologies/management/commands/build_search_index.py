@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.ontologies.search_index import update_index
+
+
+class Command(BaseCommand):
+    help = "Build the memory-mapped search index used by SEARCH_BACKEND=memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            type=str,
+            default=None,
+            help=f"Where to write the index (default: SEARCH_INDEX_PATH, {settings.SEARCH_INDEX_PATH})",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        # in turn with the rebuilds of the server workers
+        docs, tokens = update_index(options["path"], force=True)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {docs} terms ({tokens} tokens) in {time.monotonic() - started:.1f}s"
+            )
+        )
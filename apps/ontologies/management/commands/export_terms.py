@@ -0,0 +1,79 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ontologies import export
+
+
+class Command(BaseCommand):
+    help = "Stream every term, with its ontology, parents and weights, as NDJSON, CSV or Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(export.FORMATS), default="ndjson")
+        parser.add_argument(
+            "--output",
+            type=str,
+            default="-",
+            help="File to write (default: standard output)",
+        )
+        parser.add_argument(
+            "--ontology",
+            action="append",
+            default=[],
+            help="Only export the terms of this ontology URI (repeatable)",
+        )
+        parser.add_argument(
+            "--updated-since",
+            type=str,
+            default=None,
+            help="Only export the terms updated at or after this ISO 8601 date or datetime, "
+            "e.g. the watermark printed by the previous export, less EXPORT_WATERMARK_LAG seconds "
+            f"({settings.EXPORT_WATERMARK_LAG}) to catch the rows committed late",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.EXPORT_CHUNK_SIZE,
+            help=f"Terms fetched and written at a time (default: EXPORT_CHUNK_SIZE, {settings.EXPORT_CHUNK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options["updated_since"]:
+            try:
+                updated_since = export.parse_watermark(options["updated_since"])
+            except ValueError as e:
+                raise CommandError(f"--updated-since: {e}")
+
+        started = time.monotonic()
+        counts = {"terms": 0, "watermark": None}
+
+        def counted(chunks):
+            for terms in chunks:
+                counts["terms"] += len(terms)
+                counts["watermark"] = terms[-1]["updated_at"]
+                yield terms
+
+        chunks = counted(export.term_chunks(options["ontology"], updated_since, options["chunk_size"]))
+        to_stdout = options["output"] == "-"
+        output = sys.stdout.buffer if to_stdout else open(options["output"], "wb")
+        try:
+            for data in export.export_terms(options["format"], chunks):
+                output.write(data)
+        finally:
+            if to_stdout:
+                output.flush()
+            else:
+                output.close()
+
+        watermark = counts["watermark"].isoformat() if counts["watermark"] else "unchanged"
+        # the data may be on standard output, the summary goes next to it
+        log = self.stderr if to_stdout else self.stdout
+        log.write(
+            self.style.SUCCESS(
+                f"Exported {counts['terms']} terms in {time.monotonic() - started:.1f}s, "
+                f"next --updated-since: {watermark}"
+            )
+        )
@@ -1,26 +1,102 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from apps.ontologies.artifacts import OntologyCache
+from apps.ontologies.curies import register_prefixes
+from apps.ontologies.generations import bump_generation
+from apps.ontologies.hierarchy import rebuild_closure, refresh_inherited_weights
 from apps.ontologies.models import Ontology, Term
-from rdflib import Graph, URIRef
+from apps.ontologies.parents import link_parents, term_edges, write_parents
+from apps.ontologies.rdfxml import (
+    OBO_IN_OWL,
+    RESTRICTION_QUANTIFIERS,
+    SYNONYM_PROPERTIES,
+    RDFXMLReader,
+    unique_synonyms,
+)
+from apps.ontologies.scores import refresh_static_scores
+from apps.ontologies.search_index import update_index
+from apps.ontologies.synonyms import write_synonyms
+from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+from rdflib import BNode, Graph, URIRef
 from rdflib.namespace import OWL, RDF, DCTERMS, RDFS
-import requests
 
+IAO_DEFINITION = URIRef("http://purl.obolibrary.org/obo/IAO_0000115")
+SYNONYM_PREDICATES = {URIRef(OBO_IN_OWL + name): kind for name, kind in SYNONYM_PROPERTIES.items()}
+QUANTIFIER_PREDICATES = {OWL[name]: kind for name, kind in RESTRICTION_QUANTIFIERS.items()}
+
+TERM_UPDATE_FIELDS = [
+    "ontology",
+    "label",
+    "definition",
+    "subClassOf",
+    "is_obsolete",
+    "content_hash",
+    "updated_at",
+]
+
+# temporary table holding the URIs seen during a --sync run
+SEEN_TABLE = "ingest_seen_terms"
+
+# command options forwarded to ingest_url, possibly in a worker process
+INGEST_OPTIONS = (
+    "format",
+    "batch_size",
+    "stream",
+    "max_memory",
+    "sync",
+    "cache_dir",
+    "no_cache",
+    "offline",
+)
+
+
+def peak_memory_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
-def load_owl_from_url(url: str):
+
+@contextmanager
+def stage(stages, name):
+    """Record the duration of a stage, and the peak memory of the process once it is done, in ``stages``."""
+    started = time.monotonic()
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        raise CommandError(f"Failed to fetch the ontology from {url}: {e}")
-    return response.text
+        yield
+    finally:
+        stages[name] = {
+            "seconds": round(time.monotonic() - started, 3),
+            "peak_memory_mb": round(peak_memory_mb(), 1),
+        }
 
 
-def parse_ontology(text_data: str, format="application/rdf+xml"):
+def parse_ontology(source, format="application/rdf+xml"):
     graph = Graph()
-    graph.parse(data=text_data, format=format)
+    graph.parse(source, format=format)
     return graph
 
 
-def create_ontologies(graph: Graph):
+def get_or_create_ontology(uri: str, label: str):
+    ontology, created = Ontology.objects.get_or_create(uri=uri, defaults={"label": label})
+    if created:
+        print(f"Created ontology: {ontology.label} ({ontology.uri})")
+    else:
+        print(f"Ontology already exists: {ontology.label} ({ontology.uri})")
+    return ontology
+
+
+def extract_ontologies(graph: Graph):
     result = []
     for subject in graph.subjects(RDF.type, OWL.Ontology):
         uri = str(subject)
@@ -30,72 +106,404 @@ def create_ontologies(graph: Graph):
             label = str(o)
             break
 
-        ontology, created = Ontology.objects.get_or_create(
-            uri=uri, defaults={"label": label}
-        )
-        if created:
-            print(f"Created ontology: {ontology.label} ({ontology.uri})")
-        else:
-            print(f"Ontology already exists: {ontology.label} ({ontology.uri})")
-        result.append(ontology)
+        result.append({"uri": uri, "label": label})
     return result
 
 
-def create_terms(graph: Graph, ontology: Ontology):
-    count = 0
-    for subject in graph.subjects(RDF.type, OWL.Class):
+def owning_ontology(headers):
+    """The header of the ontology that owns the terms of a file, or None without one.
 
-        uri = str(subject)
-        label = ""
-        definition = ""
+    A file can declare several ``owl:Ontology`` headers. Its terms are written
+    once, under the first by URI, so the stream and graph parsers agree.
+    """
+    return min(headers, key=lambda header: header["uri"], default=None)
 
-        for s, p, o in graph.triples((subject, RDFS.label, None)):
-            label = str(o)
-            break
 
-        for s, p, o in graph.triples(
-            (subject, URIRef("http://purl.obolibrary.org/obo/IAO_0000115"), None)
-        ):
-            definition = str(o)
-            break
+def extract_synonyms(graph: Graph, subject):
+    synonyms = [
+        (str(o), "label", getattr(o, "language", None) or "")
+        for o in graph.objects(subject, RDFS.label)
+    ]
+    for predicate, kind in SYNONYM_PREDICATES.items():
+        synonyms += [
+            (str(o), kind, getattr(o, "language", None) or "")
+            for o in graph.objects(subject, predicate)
+        ]
+    return unique_synonyms(synonyms)
+
+
+def extract_relations(graph: Graph, subject):
+    """``(kind, property, target)`` of the subClassOf restrictions on named classes of ``subject``."""
+    relations = []
+    for restriction in graph.objects(subject, RDFS.subClassOf):
+        if not isinstance(restriction, BNode) or (restriction, RDF.type, OWL.Restriction) not in graph:
+            continue
+        prop = graph.value(restriction, OWL.onProperty)
+        for predicate, kind in QUANTIFIER_PREDICATES.items():
+            target = graph.value(restriction, predicate)
+            if isinstance(prop, URIRef) and isinstance(target, URIRef):
+                relations.append((kind, str(prop), str(target)))
+    return relations
+
+
+def extract_terms(graph: Graph):
+    """Walk every owl:Class once and yield its label, definition, parents, restrictions and synonyms."""
+    for subject in set(graph.subjects(RDF.type, OWL.Class)):
+        if not isinstance(subject, URIRef):
+            # anonymous classes (unions, restrictions...) are not terms
+            continue
+
+        yield {
+            "uri": str(subject),
+            "label": str(next(graph.objects(subject, RDFS.label), "")),
+            "definition": str(next(graph.objects(subject, IAO_DEFINITION), "")),
+            "subClassOf": [
+                str(o)
+                for o in graph.objects(subject, RDFS.subClassOf)
+                if isinstance(o, URIRef)
+            ],
+            "relations": extract_relations(graph, subject),
+            "synonyms": extract_synonyms(graph, subject),
+            "is_obsolete": any(
+                str(o).lower() == "true" for o in graph.objects(subject, OWL.deprecated)
+            ),
+        }
+
+
+def term_hash(record, ontology: Ontology):
+    """Fingerprint of everything ingest writes for a term, used by --sync."""
+    content = [
+        ontology.uri if ontology else None,
+        record["label"],
+        record["definition"],
+        sorted(record["subClassOf"]),
+        sorted(record["relations"]),
+        sorted(record["synonyms"]),
+        record["is_obsolete"],
+    ]
+    return hashlib.sha1(json.dumps(content).encode()).hexdigest()
+
+
+def start_sync():
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {SEEN_TABLE} (uri text PRIMARY KEY)")
+        cursor.execute(f"TRUNCATE {SEEN_TABLE}")
+
+
+def mark_seen(uris):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEEN_TABLE} SELECT unnest(%s::text[]) ON CONFLICT DO NOTHING",
+            [uris],
+        )
+
+
+def obsolete_unseen(ontology: Ontology):
+    """Mark the terms of ``ontology`` missing from this release as obsolete."""
+    with connection.cursor() as cursor:
+        # the hash is cleared so that a term coming back is written again
+        cursor.execute(
+            f"""
+            UPDATE {Term._meta.db_table} t
+            SET is_obsolete = true, content_hash = '', updated_at = now()
+            WHERE t.ontology_id IS NOT DISTINCT FROM %s
+              AND NOT t.is_obsolete
+              AND NOT EXISTS (SELECT 1 FROM {SEEN_TABLE} s WHERE s.uri = t.uri)
+            """,
+            [ontology.uri if ontology else None],
+        )
+        obsoleted = cursor.rowcount
+        cursor.execute(f"DROP TABLE {SEEN_TABLE}")
+    return obsoleted
+
+
+def write_terms(
+    records, ontology: Ontology, batch_size: int = 5000, max_memory=None, sync=False
+):
+    """Upsert term records, their synonyms and edges in batches, leaving weights and favorites untouched.
+
+    With ``sync``, the content hash of every record is compared with the
+    stored one and only new or changed terms are written; terms of the
+    ontology that are missing from ``records`` are marked obsolete.
+
+    When ``max_memory`` (in MB) is given, the peak resident size of the process
+    is checked after every batch and the ingest aborts once it is exceeded.
+    """
+    stats = Counter()
+    started = time.monotonic()
+    batch = []
+    synonyms = {}
+    relations = {}
+
+    def flush():
+        terms = batch
+        if sync:
+            uris = [term.uri for term in batch]
+            mark_seen(uris)
+            stored = dict(
+                Term.objects.filter(uri__in=uris).values_list("uri", "content_hash")
+            )
+            terms = [term for term in batch if stored.get(term.uri) != term.content_hash]
+            stats["created"] += sum(term.uri not in stored for term in terms)
+            stats["updated"] += sum(term.uri in stored for term in terms)
+            stats["unchanged"] += len(batch) - len(terms)
+
+        if terms:
+            # a stable row order keeps parallel ingests sharing terms from deadlocking
+            terms.sort(key=lambda term: term.uri)
+            with transaction.atomic():
+                Term.objects.bulk_create(
+                    terms,
+                    update_conflicts=True,
+                    unique_fields=["uri"],
+                    update_fields=TERM_UPDATE_FIELDS,
+                )
+                # the upsert sets the id of new and existing terms alike
+                write_synonyms({term.id: synonyms[term.uri] for term in terms})
+                write_parents({term.id: term_edges(term.subClassOf, relations[term.uri]) for term in terms})
+            register_prefixes(term.uri for term in terms)
+        stats["written"] += len(terms)
+        stats["synonyms"] += sum(len(synonyms[term.uri]) for term in terms)
+
+        elapsed = time.monotonic() - started
+        print(
+            f"Processed {stats['processed']} terms "
+            f"({stats['processed'] / max(elapsed, 1e-6):.0f} rows/s)..."
+        )
+        batch.clear()
+        synonyms.clear()
+        relations.clear()
+        if max_memory is not None and peak_memory_mb() > max_memory:
+            raise CommandError(
+                f"Peak memory {peak_memory_mb():.0f} MB exceeded the {max_memory} MB limit."
+            )
+
+    if sync:
+        start_sync()
+    for record in records:
+        content_hash = term_hash(record, ontology)
+        synonyms[record["uri"]] = record.pop("synonyms")
+        relations[record["uri"]] = record.pop("relations")
+        batch.append(Term(ontology=ontology, content_hash=content_hash, **record))
+        stats["processed"] += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    if sync:
+        stats["obsoleted"] = obsolete_unseen(ontology)
+        print(
+            f"Sync summary: {stats['created']} new, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['obsoleted']} obsoleted"
+        )
+
+    elapsed = time.monotonic() - started
+    return stats, elapsed
+
+
+def finish_ingest(ontology_uris):
+    """Rebuild derived data once every term of ``ontology_uris`` is written.
+
+    Returns the ``stage`` timings of each step.
+    """
+    stages = {}
+    with stage(stages, "link_parents"):
+        print(f"Linked {link_parents()} edges to parents ingested after their children.")
+    print("Building the class hierarchy closure...")
+    with stage(stages, "closure"):
+        rows, depth = rebuild_closure()
+    print(f"Stored {rows} ancestor links, {depth} levels deep, in {stages['closure']['seconds']:.1f}s")
+    with stage(stages, "inherited_weights"):
+        print(f"Updated the inherited weight of {refresh_inherited_weights()} terms.")
+    with stage(stages, "static_scores"):
+        print(f"Updated the static score of {refresh_static_scores(ontologies=ontology_uris)} terms.")
+    # bulk_create skips the post_save signals, invalidate cached results here
+    for uri in ontology_uris:
+        bump_generation(uri)
+    if settings.SEARCH_BACKEND == "memory":
+        with stage(stages, "search_index"):
+            docs, tokens = update_index(force=True)
+        print(f"Indexed {docs} terms ({tokens} tokens) in memory in {stages['search_index']['seconds']:.1f}s")
+    return stages
+
+
+def snapshot_ontology(entry, options):
+    """Parse the downloaded file of ``entry`` into its term snapshot."""
+    print("Parsing ontology...")
+    started = time.monotonic()
+    if options["stream"]:
+        with open(entry.raw_path, "rb") as source:
+            reader = RDFXMLReader(source)
+            count = entry.save_snapshot(reader.terms(), lambda: reader.ontologies)
+    else:
+        graph = parse_ontology(str(entry.raw_path), format=options["format"])
+        count = entry.save_snapshot(extract_terms(graph), lambda: extract_ontologies(graph))
+        del graph
+    print(f"Extracted {count} terms in {time.monotonic() - started:.1f}s")
 
-        term, created = Term.objects.get_or_create(
-            uri=uri,
-            ontology=ontology,
-            label=label,
-            definition=definition,
+
+def write_ontology(entry, options):
+    """Write the terms of the snapshot of ``entry`` under its owning ontology."""
+    header = owning_ontology(entry.ontologies)
+    ontology = get_or_create_ontology(**header) if header else None
+    if ontology is not None:
+        print(f"Creating terms for ontology: {ontology.label} ({ontology.uri})")
+    stats, elapsed = write_terms(
+        entry.records(),
+        ontology,
+        batch_size=options["batch_size"],
+        max_memory=options["max_memory"],
+        sync=options["sync"],
+    )
+    count = stats["processed"]
+    print(f"Wrote {count} terms in {elapsed:.1f}s ({count / max(elapsed, 1e-6):.0f} rows/s)")
+    return ontology, stats
+
+
+def ingest_url(url: str, options: dict):
+    """Download, parse and write one ontology file.
+
+    Returns a picklable summary so that it can run in a worker process.
+    """
+    started = time.monotonic()
+    stages = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        cache = OntologyCache(scratch if options["no_cache"] else options["cache_dir"])
+        entry = cache.entry(url)
+        with stage(stages, "download"):
+            entry.fetch(offline=options["offline"])
+        if entry.has_snapshot():
+            print("Using the cached snapshot, skipping parsing.")
+        else:
+            with stage(stages, "parse"):
+                snapshot_ontology(entry, options)
+        with stage(stages, "write_terms"):
+            ontology, stats = write_ontology(entry, options)
+
+    if options["max_memory"] is not None and peak_memory_mb() > options["max_memory"]:
+        raise CommandError(
+            f"Peak memory {peak_memory_mb():.0f} MB exceeded the {options['max_memory']} MB limit."
         )
+    return {
+        "url": url,
+        "ontologies": [ontology.uri if ontology else None],
+        "stats": dict(stats),
+        "elapsed": time.monotonic() - started,
+        "peak_memory": peak_memory_mb(),
+        "stages": stages,
+    }
+
+
+class PrefixedOutput:
+    """Prefix every line written by a worker with the name of its ontology file."""
+
+    def __init__(self, stream, prefix):
+        self.stream = stream
+        self.prefix = prefix
+        self.at_line_start = True
+
+    def write(self, text):
+        for line in text.splitlines(keepends=True):
+            if self.at_line_start:
+                self.stream.write(self.prefix)
+            self.stream.write(line)
+            self.at_line_start = line.endswith("\n")
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
 
-        count += 1
-        if count % 100 == 0:
-            print(f"Processed {count} terms...")
-    print(f"Created {count} terms for ontology: {ontology.label} ({ontology.uri})")
+def ingest_worker(url: str, options: dict):
+    name = url.rstrip("/").rsplit("/", 1)[-1]
+    sys.stdout = PrefixedOutput(sys.__stdout__, f"[{name}] ")
+    try:
+        return ingest_url(url, options)
+    finally:
+        sys.stdout.flush()
+        connections.close_all()
+
+
+def read_manifest(path: str):
+    """One URL per line; blank lines and lines starting with # are ignored."""
+    try:
+        with open(path) as manifest:
+            lines = [line.strip() for line in manifest]
+    except OSError as e:
+        raise CommandError(f"Failed to read the manifest {path}: {e}")
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def report(results, elapsed):
+    print("")
+    print(f"{'ontology file':<40} {'terms':>10} {'written':>10} {'seconds':>9} {'rows/s':>9} {'peak MB':>8}")
+    for result in results:
+        stats = result["stats"]
+        name = result["url"].rstrip("/").rsplit("/", 1)[-1]
+        processed = stats.get("processed", 0)
+        print(
+            f"{name[:40]:<40} {processed:>10} {stats.get('written', 0):>10} "
+            f"{result['elapsed']:>9.1f} {processed / max(result['elapsed'], 1e-6):>9.0f} "
+            f"{result['peak_memory']:>8.0f}"
+        )
+    total = sum(result["stats"].get("processed", 0) for result in results)
+    print(
+        f"Ingested {total} terms from {len(results)} files in {elapsed:.1f}s "
+        f"({total / max(elapsed, 1e-6):.0f} rows/s overall)"
+    )
 
 
-def assign_subclasses(graph: Graph):
-    term_count = 0
-    subclass_count = 0
-    for term in Term.objects.filter(subClassOf__isnull=True):
-        term_count += 1
-        subclasses = list(graph.objects(URIRef(term.uri), RDFS.subClassOf))
-        if subclasses:
-            subclass_count += len(subclasses)
-            term.subClassOf = [str(subclass) for subclass in subclasses]
-            term.save()
-        if term_count % 100 == 0:
-            print(f"Processed {term_count} terms...")
+def write_metrics(path, results, stages):
+    """Write the stage timings of this run as a Prometheus textfile (for node_exporter's textfile collector).
 
-    print(f"Assigned {subclass_count} subclasses to {term_count} terms.")
+    Stages of an ontology file are labelled with its name, the ones run once
+    for every file (the closure...) with an empty ``file``.
+    """
+    registry = CollectorRegistry()
+    seconds = Gauge(
+        "ontology_ingest_stage_seconds", "Duration of an ingest stage", ["file", "stage"], registry=registry
+    )
+    memory = Gauge(
+        "ontology_ingest_stage_peak_memory_bytes",
+        "Peak resident memory of the ingest process once a stage is done",
+        ["file", "stage"],
+        registry=registry,
+    )
+    terms = Gauge("ontology_ingest_terms", "Terms read from an ontology file", ["file"], registry=registry)
+    runs = [(result["url"].rstrip("/").rsplit("/", 1)[-1], result) for result in results]
+    for name, file_stages in [*((name, result["stages"]) for name, result in runs), ("", stages)]:
+        for stage_name, measured in file_stages.items():
+            seconds.labels(name, stage_name).set(measured["seconds"])
+            memory.labels(name, stage_name).set(measured["peak_memory_mb"] * 1024 * 1024)
+    for name, result in runs:
+        terms.labels(name).set(result["stats"].get("processed", 0))
+    Gauge(
+        "ontology_ingest_last_run_timestamp_seconds", "End of the last ingest run", registry=registry
+    ).set_to_current_time()
+    write_to_textfile(path, registry)
 
 
 class Command(BaseCommand):
-    help = "Import an ontology from a URL"
+    help = "Import one or more ontologies from URLs"
 
     def add_arguments(self, parser):
         parser.add_argument(
             "url",
             type=str,
-            help="The URL of the ontology to import",
+            nargs="*",
+            help="The URLs of the ontologies to import",
+        )
+        parser.add_argument(
+            "--manifest",
+            type=str,
+            default=None,
+            help="A file listing ontology URLs to import, one per line",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of ontologies ingested in parallel (default: one per CPU, up to the number of URLs)",
         )
         parser.add_argument(
             "--format",
@@ -103,16 +511,118 @@ class Command(BaseCommand):
             default="application/rdf+xml",
             help="The format of the ontology (default: application/rdf+xml)",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of terms written per bulk upsert (default: 5000)",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Download to disk and parse RDF/XML incrementally instead of building an in-memory graph",
+        )
+        parser.add_argument(
+            "--max-memory",
+            type=int,
+            default=None,
+            help="Abort if the peak resident memory exceeds this many MB (checked after every batch)",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help=(
+                "Only write terms whose content changed since the last ingest and mark "
+                "terms missing from this release as obsolete"
+            ),
+        )
+        parser.add_argument(
+            "--cache-dir",
+            type=str,
+            default=settings.ONTOLOGY_CACHE_DIR,
+            help="Where downloads and parsed snapshots are kept (default: ONTOLOGY_CACHE_DIR)",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Download and parse into a temporary directory instead of the cache",
+        )
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="Do not download anything, ingest the cached copies only",
+        )
 
     def handle(self, *args, **options):
-        print(f"Fetching ontology from {options['url']}...")
-        text_data = load_owl_from_url(options["url"])
-        print("Parsing ontology...")
-        graph = parse_ontology(text_data, format=options["format"])
-        print("Creating ontologies...")
-        ontologies = create_ontologies(graph)
-        for ontology in ontologies:
-            print(f"Creating terms for ontology: {ontology.label} ({ontology.uri})")
-            create_terms(graph, ontology)
-        print("Assigning subclasses to terms...")
-        assign_subclasses(graph)
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        if options["stream"] and options["format"] != "application/rdf+xml":
+            raise CommandError("--stream only supports the application/rdf+xml format.")
+        if options["offline"] and options["no_cache"]:
+            raise CommandError("--offline needs the cache, it cannot be used with --no-cache.")
+
+        urls = list(options["url"])
+        if options["manifest"]:
+            urls += read_manifest(options["manifest"])
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            raise CommandError("Provide at least one URL or a --manifest.")
+
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be a positive integer.")
+        workers = options["workers"] or min(len(urls), os.cpu_count() or 1)
+        ingest_options = {key: options[key] for key in INGEST_OPTIONS}
+
+        started = time.monotonic()
+        results = []
+        failures = []
+        if workers == 1 or len(urls) == 1:
+            for url in urls:
+                try:
+                    results.append(ingest_url(url, ingest_options))
+                except Exception as e:
+                    # like the pool: report the file and go on with the others
+                    failures.append((url, e))
+                    print(f"Failed to ingest {url}: {e}")
+        else:
+            print(f"Ingesting {len(urls)} ontology files with {workers} workers...")
+            # children must open their own connections instead of sharing ours,
+            # and their own pool (DB_POOL): its threads do not survive the fork
+            connections.close_all()
+            connection.close_pool()
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = {
+                    pool.submit(ingest_worker, url, ingest_options): url for url in urls
+                }
+                for future in as_completed(futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        failures.append((futures[future], e))
+                        print(f"Failed to ingest {futures[future]}: {e}")
+
+        changed = [
+            result
+            for result in results
+            if result["stats"].get("written") or result["stats"].get("obsoleted")
+        ]
+        stages = {}
+        if changed:
+            stages = finish_ingest({uri for result in changed for uri in result["ontologies"]})
+        else:
+            print("No changes, skipping the hierarchy rebuild.")
+        report(results, time.monotonic() - started)
+        if settings.INGEST_METRICS_FILE:
+            write_metrics(settings.INGEST_METRICS_FILE, results, stages)
+
+        if not options["no_cache"]:
+            cache = OntologyCache(options["cache_dir"], settings.ONTOLOGY_CACHE_MAX_MB * 1024 * 1024)
+            for path in cache.evict():
+                print(f"Evicted {path} from the ontology cache")
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} of {len(urls)} ontology files failed: "
+                + ", ".join(url for url, _ in failures)
+            )
@@ -0,0 +1,77 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+BACKFILL_BATCH_SIZE = 5000
+
+CREATE_SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector(uri text, label text, definition text)
+RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('english', coalesce(label, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(definition, '')), 'C')
+        || setweight(to_tsvector('simple', regexp_replace(coalesce(uri, ''), '^.*[/#]', '')), 'D')
+$$;
+
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := ontologies_term_search_vector(NEW.uri, NEW.label, NEW.definition);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER ontologies_term_search_vector_update
+    BEFORE INSERT OR UPDATE OF uri, label, definition ON ontologies_term
+    FOR EACH ROW EXECUTE FUNCTION ontologies_term_search_vector_trigger();
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS ontologies_term_search_vector_update ON ontologies_term;
+DROP FUNCTION IF EXISTS ontologies_term_search_vector_trigger();
+DROP FUNCTION IF EXISTS ontologies_term_search_vector(text, text, text);
+"""
+
+
+def backfill_search_vector(apps, schema_editor):
+    # The migration is not atomic, so every batch commits on its own and
+    # only holds row locks on the rows it updates.
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                """
+                UPDATE ontologies_term
+                SET search_vector = ontologies_term_search_vector(uri, label, definition)
+                WHERE uri IN (
+                    SELECT uri FROM ontologies_term
+                    WHERE search_vector IS NULL
+                    LIMIT %s
+                )
+                """,
+                [BACKFILL_BATCH_SIZE],
+            )
+            if cursor.rowcount < BACKFILL_BATCH_SIZE:
+                break
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('ontologies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='term',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, help_text='Weighted label (A), definition (C) and URI fragment (D), maintained by a database trigger', null=True),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='term',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='ontologies_term_search_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:41
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('ontologies', '0002_term_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='term',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('label'), name='gin_trgm_ops'), name='ontologies_term_label_trgm'),
+        ),
+    ]
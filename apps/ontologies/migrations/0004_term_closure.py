@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0003_term_label_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(help_text='Length of the shortest subClassOf path from descendant to ancestor')),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='ontologies.term')),
+                ('descendant', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='ontologies.term')),
+            ],
+            options={
+                'verbose_name_plural': 'Term closures',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='ontologies__descend_6425dd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_term_closure')],
+            },
+        ),
+    ]
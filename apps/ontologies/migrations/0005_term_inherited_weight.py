@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0004_term_closure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='term',
+            name='inherited_weight',
+            field=models.FloatField(default=0.0, editable=False, help_text='Boost inherited from favorite or weighted ancestors, maintained from the closure'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0005_term_inherited_weight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='term',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Fingerprint of the ingested content, used by ingest --sync', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='term',
+            name='is_obsolete',
+            field=models.BooleanField(default=False, help_text='Deprecated in, or missing from, the latest ingested release'),
+        ),
+    ]
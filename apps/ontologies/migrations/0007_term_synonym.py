@@ -0,0 +1,112 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:03
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Synonyms join the search vector with weight B. The trigger reads them from
+# ontologies_termsynonym, and ingest refreshes the vector of each batch once
+# its synonyms are written (see apps.ontologies.synonyms).
+CREATE_SEARCH_VECTOR_SQL = """
+DROP FUNCTION IF EXISTS ontologies_term_search_vector(text, text, text);
+
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector(
+    uri text, label text, definition text, synonyms text DEFAULT ''
+)
+RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('english', coalesce(label, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(synonyms, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(definition, '')), 'C')
+        || setweight(to_tsvector('simple', regexp_replace(coalesce(uri, ''), '^.*[/#]', '')), 'D')
+$$;
+
+-- every name of the term but its main label and its xrefs
+CREATE OR REPLACE FUNCTION ontologies_term_synonyms(term_uri text, term_label text)
+RETURNS text LANGUAGE sql STABLE AS $$
+    SELECT string_agg(s.text, ' ')
+    FROM ontologies_termsynonym s
+    WHERE s.term_id = term_uri
+      AND s.kind <> 'xref'
+      AND NOT (s.kind = 'label' AND s.text = term_label)
+$$;
+
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := ontologies_term_search_vector(
+        NEW.uri, NEW.label, NEW.definition, ontologies_term_synonyms(NEW.uri, NEW.label)
+    );
+    RETURN NEW;
+END
+$$;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := ontologies_term_search_vector(NEW.uri, NEW.label, NEW.definition);
+    RETURN NEW;
+END
+$$;
+
+DROP FUNCTION IF EXISTS ontologies_term_synonyms(text, text);
+DROP FUNCTION IF EXISTS ontologies_term_search_vector(text, text, text, text);
+
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector(uri text, label text, definition text)
+RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('english', coalesce(label, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(definition, '')), 'C')
+        || setweight(to_tsvector('simple', regexp_replace(coalesce(uri, ''), '^.*[/#]', '')), 'D')
+$$;
+"""
+
+
+def normalize_text(text):
+    # frozen copy of apps.ontologies.models.normalize_text
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+
+def backfill_labels(apps, schema_editor):
+    """Store the current labels, so lookups work before the next ingest."""
+    Term = apps.get_model("ontologies", "Term")
+    TermSynonym = apps.get_model("ontologies", "TermSynonym")
+    batch = []
+    for uri, label in Term.objects.exclude(label="").exclude(label=None).values_list("uri", "label").iterator(
+        chunk_size=BACKFILL_BATCH_SIZE
+    ):
+        batch.append(TermSynonym(term_id=uri, text=label, normalized=normalize_text(label), kind="label"))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            TermSynonym.objects.bulk_create(batch)
+            batch = []
+    TermSynonym.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0006_term_sync_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermSynonym',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('normalized', models.TextField(editable=False, help_text='Text compared by exact lookups, see normalize_text')),
+                ('kind', models.CharField(choices=[('label', 'Label'), ('exact', 'Exact synonym'), ('related', 'Related synonym'), ('narrow', 'Narrow synonym'), ('broad', 'Broad synonym'), ('xref', 'Cross-reference')], max_length=16)),
+                ('lang', models.CharField(blank=True, default='', max_length=16)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synonyms', to='ontologies.term')),
+            ],
+            options={
+                'verbose_name_plural': 'Term synonyms',
+                'indexes': [models.Index(fields=['normalized'], name='ontologies_synonym_norm_idx')],
+            },
+        ),
+        migrations.RunSQL(CREATE_SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        migrations.RunPython(backfill_labels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,193 @@
+# Generated by Django 5.1.15 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Terms get an integer primary key and every table referencing them switches
+# from the URI to that key: a closure row shrinks from two URIs to two bigints
+# and hierarchy joins compare integers. The URI column stays, unique, as the
+# natural key used by ingest and the API.
+#
+# The referencing columns are converted in place with ALTER COLUMN ... TYPE,
+# which rewrites each table once, instead of an UPDATE leaving every old row
+# behind as a dead tuple.
+#
+# The closure loses its foreign key constraints: it is derived from the term
+# table by rebuild_closure, and checking millions of inserted rows against
+# the terms they were just joined from took a third of the rebuild.
+TO_INTEGER_KEYS_SQL = """
+DO $$
+DECLARE fk record;
+BEGIN
+    FOR fk IN
+        SELECT conname, conrelid::regclass AS tbl FROM pg_constraint
+        WHERE confrelid = 'ontologies_term'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.tbl, fk.conname);
+    END LOOP;
+END
+$$;
+
+ALTER TABLE ontologies_term ADD COLUMN id bigint GENERATED BY DEFAULT AS IDENTITY;
+ALTER TABLE ontologies_term DROP CONSTRAINT ontologies_term_pkey;
+ALTER TABLE ontologies_term ADD CONSTRAINT ontologies_term_pkey PRIMARY KEY (id);
+ALTER TABLE ontologies_term ADD CONSTRAINT ontologies_term_uri_key UNIQUE (uri);
+
+CREATE FUNCTION ontologies_term_id_of(term_uri text) RETURNS bigint LANGUAGE sql STABLE AS $$
+    SELECT id FROM ontologies_term WHERE uri = term_uri
+$$;
+
+ALTER TABLE ontologies_termclosure
+    ALTER COLUMN ancestor_id TYPE bigint USING ontologies_term_id_of(ancestor_id),
+    ALTER COLUMN descendant_id TYPE bigint USING ontologies_term_id_of(descendant_id);
+DROP INDEX IF EXISTS ontologies_termsynonym_term_id_5ca9ef74_like;
+ALTER TABLE ontologies_termsynonym
+    ALTER COLUMN term_id TYPE bigint USING ontologies_term_id_of(term_id);
+
+DROP FUNCTION ontologies_term_id_of(text);
+
+ALTER TABLE ontologies_termsynonym
+    ADD CONSTRAINT ontologies_termsynonym_term_id_fk_ontologies_term_id
+    FOREIGN KEY (term_id) REFERENCES ontologies_term (id) DEFERRABLE INITIALLY DEFERRED;
+
+DROP FUNCTION ontologies_term_synonyms(text, text);
+
+CREATE FUNCTION ontologies_term_synonyms(term_id bigint, term_label text)
+RETURNS text LANGUAGE sql STABLE AS $$
+    SELECT string_agg(s.text, ' ')
+    FROM ontologies_termsynonym s
+    WHERE s.term_id = ontologies_term_synonyms.term_id
+      AND s.kind <> 'xref'
+      AND NOT (s.kind = 'label' AND s.text = term_label)
+$$;
+
+-- identity defaults are applied before BEFORE triggers run, NEW.id is set
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := ontologies_term_search_vector(
+        NEW.uri, NEW.label, NEW.definition, ontologies_term_synonyms(NEW.id, NEW.label)
+    );
+    RETURN NEW;
+END
+$$;
+"""
+
+TO_URI_KEYS_SQL = """
+DROP FUNCTION ontologies_term_synonyms(bigint, text);
+
+ALTER TABLE ontologies_termsynonym
+    DROP CONSTRAINT ontologies_termsynonym_term_id_fk_ontologies_term_id;
+
+CREATE FUNCTION ontologies_term_uri_of(term_id bigint) RETURNS varchar(200) LANGUAGE sql STABLE AS $$
+    SELECT uri FROM ontologies_term WHERE id = term_id
+$$;
+
+ALTER TABLE ontologies_termclosure
+    ALTER COLUMN ancestor_id TYPE varchar(200) USING ontologies_term_uri_of(ancestor_id),
+    ALTER COLUMN descendant_id TYPE varchar(200) USING ontologies_term_uri_of(descendant_id);
+ALTER TABLE ontologies_termsynonym
+    ALTER COLUMN term_id TYPE varchar(200) USING ontologies_term_uri_of(term_id);
+CREATE INDEX ontologies_termsynonym_term_id_5ca9ef74_like
+    ON ontologies_termsynonym (term_id varchar_pattern_ops);
+
+DROP FUNCTION ontologies_term_uri_of(bigint);
+
+ALTER TABLE ontologies_term DROP CONSTRAINT ontologies_term_uri_key;
+ALTER TABLE ontologies_term DROP CONSTRAINT ontologies_term_pkey;
+ALTER TABLE ontologies_term ADD CONSTRAINT ontologies_term_pkey PRIMARY KEY (uri);
+ALTER TABLE ontologies_term DROP COLUMN id;
+
+ALTER TABLE ontologies_termclosure
+    ADD CONSTRAINT ontologies_termclosu_ancestor_id_e5dafa89_fk_ontologie
+    FOREIGN KEY (ancestor_id) REFERENCES ontologies_term (uri) DEFERRABLE INITIALLY DEFERRED,
+    ADD CONSTRAINT ontologies_termclosu_descendant_id_8e6003c0_fk_ontologie
+    FOREIGN KEY (descendant_id) REFERENCES ontologies_term (uri) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE ontologies_termsynonym
+    ADD CONSTRAINT ontologies_termsynonym_term_id_5ca9ef74_fk_ontologies_term_uri
+    FOREIGN KEY (term_id) REFERENCES ontologies_term (uri) DEFERRABLE INITIALLY DEFERRED;
+
+CREATE FUNCTION ontologies_term_synonyms(term_uri text, term_label text)
+RETURNS text LANGUAGE sql STABLE AS $$
+    SELECT string_agg(s.text, ' ')
+    FROM ontologies_termsynonym s
+    WHERE s.term_id = term_uri
+      AND s.kind <> 'xref'
+      AND NOT (s.kind = 'label' AND s.text = term_label)
+$$;
+
+CREATE OR REPLACE FUNCTION ontologies_term_search_vector_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := ontologies_term_search_vector(
+        NEW.uri, NEW.label, NEW.definition, ontologies_term_synonyms(NEW.uri, NEW.label)
+    );
+    RETURN NEW;
+END
+$$;
+"""
+
+# the OBO prefixes of the terms already stored, later ones are added by ingest
+REGISTER_PREFIXES_SQL = """
+INSERT INTO ontologies_prefix (prefix, namespace)
+SELECT DISTINCT m[1], 'http://purl.obolibrary.org/obo/' || m[1] || '_'
+FROM ontologies_term
+CROSS JOIN LATERAL regexp_match(uri, '^http://purl\\.obolibrary\\.org/obo/([A-Za-z][A-Za-z0-9]*)_[A-Za-z0-9]') AS m
+WHERE m IS NOT NULL
+ON CONFLICT DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0007_term_synonym'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='term',
+            name='ontologies__uri_809f49_idx',
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(TO_INTEGER_KEYS_SQL, TO_URI_KEYS_SQL),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='term',
+                    name='uri',
+                    field=models.URLField(unique=True),
+                ),
+                migrations.AddField(
+                    model_name='term',
+                    name='id',
+                    field=models.BigAutoField(primary_key=True, serialize=False),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name='termclosure',
+                    name='ancestor',
+                    field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='ontologies.term'),
+                ),
+                migrations.AlterField(
+                    model_name='termclosure',
+                    name='descendant',
+                    field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='ontologies.term'),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Prefix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=64, unique=True)),
+                ('namespace', models.URLField(unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Prefixes',
+                'ordering': ['prefix'],
+            },
+        ),
+        migrations.RunSQL(REGISTER_PREFIXES_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Older ingests stored the blank node ids of restrictions in subClassOf;
+# they are not URIs and cannot be saved back through the admin or the API.
+# The restrictions themselves come back as TermParent edges on the next ingest.
+CLEAN_SUBCLASSOF_SQL = """
+UPDATE ontologies_term
+SET "subClassOf" = ARRAY(SELECT parent FROM unnest("subClassOf") AS parent WHERE parent ~ '^[A-Za-z][A-Za-z0-9+.-]*:')
+WHERE EXISTS (SELECT 1 FROM unnest("subClassOf") AS parent WHERE parent !~ '^[A-Za-z][A-Za-z0-9+.-]*:');
+"""
+
+BACKFILL_EDGES_SQL = """
+INSERT INTO ontologies_termparent (child_id, parent_id, parent_uri, relation, kind)
+SELECT DISTINCT t.id, p.id, edge.parent, '', 'is_a'
+FROM ontologies_term t
+CROSS JOIN LATERAL unnest(t."subClassOf") AS edge(parent)
+LEFT JOIN ontologies_term p ON p.uri = edge.parent
+ON CONFLICT DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0008_term_integer_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermParent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parent_uri', models.URLField()),
+                ('relation', models.URLField(blank=True, default='', help_text='Property of a restriction, empty for is_a edges')),
+                ('kind', models.CharField(choices=[('is_a', 'Is a'), ('some', 'Some values from'), ('only', 'All values from')], default='is_a', max_length=8)),
+                ('child', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='parent_links', to='ontologies.term')),
+                ('parent', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='child_links', to='ontologies.term')),
+            ],
+            options={
+                'verbose_name_plural': 'Term parents',
+                'indexes': [models.Index(fields=['parent', 'kind'], name='ontologies_parent_parent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('child', 'kind', 'relation', 'parent_uri'), name='unique_term_parent')],
+            },
+        ),
+        migrations.RunSQL(CLEAN_SUBCLASSOF_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_EDGES_SQL, migrations.RunSQL.noop),
+    ]
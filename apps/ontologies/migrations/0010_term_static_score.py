@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+# Only the terms of weighted ontologies or weighted terms differ from the default.
+BACKFILL_STATIC_SCORE_SQL = """
+UPDATE ontologies_term t
+SET static_score = COALESCE(o.weight, 1.0) * COALESCE(t.weight, 1.0)
+FROM ontologies_term s
+LEFT JOIN ontologies_ontology o ON o.uri = s.ontology_id
+WHERE t.id = s.id
+  AND t.static_score IS DISTINCT FROM COALESCE(o.weight, 1.0) * COALESCE(t.weight, 1.0);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0009_term_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='term',
+            name='static_score',
+            field=models.FloatField(default=1.0, editable=False, help_text='Ontology weight x term weight, multiplied by the text rank at search time'),
+        ),
+        migrations.RunSQL(BACKFILL_STATIC_SCORE_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 10:49
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('ontologies', '0010_term_static_score'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='term',
+            index=models.Index(fields=['updated_at', 'id'], name='ontologies_term_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:21
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('ontologies', '0011_term_updated_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='termsynonym',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('text'), name='gin_trgm_ops'), name='ontologies_synonym_text_trgm'),
+        ),
+    ]
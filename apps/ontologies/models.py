@@ -1,5 +1,19 @@
+import unicodedata
+
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Lower
+
+# Text search configuration used by the search_vector trigger
+# (see migration 0002) and by the queries that match against it.
+SEARCH_CONFIG = "english"
+
+
+def normalize_text(text):
+    """Form in which labels, synonyms and lookups are compared for equality."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
 
 
 class BaseModel(models.Model):
@@ -23,15 +37,42 @@ class Ontology(BaseModel):
         return self.label or self.uri
 
 
+class Prefix(models.Model):
+    """A CURIE prefix and the namespace it stands for (``FOODON`` for ``.../obo/FOODON_``).
+
+    ``ingest`` registers the OBO prefixes of the terms it writes; others can
+    be added through the admin. ``/lookup/`` expands CURIEs with this table.
+    """
+
+    class Meta:
+        verbose_name_plural = "Prefixes"
+        ordering = ["prefix"]
+
+    prefix = models.CharField(max_length=64, unique=True)
+    namespace = models.URLField(unique=True)
+
+    def __str__(self):
+        return f"{self.prefix}: {self.namespace}"
+
+
 class Term(BaseModel):
     class Meta:
         verbose_name_plural = "Terms"
         indexes = [
-            models.Index(fields=["uri"]),
             models.Index(fields=["ontology"]),
+            # the order of exports, and their updated_at watermark
+            models.Index(fields=["updated_at", "id"], name="ontologies_term_updated_idx"),
+            GinIndex(fields=["search_vector"], name="ontologies_term_search_idx"),
+            GinIndex(
+                OpClass(Lower("label"), name="gin_trgm_ops"),
+                name="ontologies_term_label_trgm",
+            ),
         ]
 
-    uri = models.URLField(primary_key=True)
+    # the closure and synonym tables reference terms by this integer key,
+    # the URI stays the natural key of ingest and of the API
+    id = models.BigAutoField(primary_key=True)
+    uri = models.URLField(unique=True)
     ontology = models.ForeignKey(
         Ontology,
         related_name="terms",
@@ -50,8 +91,176 @@ class Term(BaseModel):
         help_text="List of URIs for parent classes (subClassOf relationships)",
     )
 
+    is_obsolete = models.BooleanField(
+        default=False,
+        help_text="Deprecated in, or missing from, the latest ingested release",
+    )
+    content_hash = models.CharField(
+        max_length=40,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Fingerprint of the ingested content, used by ingest --sync",
+    )
+
     weight = models.FloatField(default=1.0, blank=True, null=True)
     is_favorite = models.BooleanField(default=False)
+    inherited_weight = models.FloatField(
+        default=0.0,
+        editable=False,
+        help_text="Boost inherited from favorite or weighted ancestors, maintained from the closure",
+    )
+    static_score = models.FloatField(
+        default=1.0,
+        editable=False,
+        help_text="Ontology weight x term weight, multiplied by the text rank at search time",
+    )
+
+    search_vector = SearchVectorField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Weighted label (A), definition (C) and URI fragment (D), maintained by a database trigger",
+    )
 
     def __str__(self):
         return self.label or self.uri
+
+
+class TermClosure(models.Model):
+    """Transitive closure of subClassOf, rebuilt by ``ingest``.
+
+    Saving a term with new parents refreshes the rows of its subtree.
+
+    There is one row per (ancestor, descendant) pair, including every term
+    with itself at depth 0, so ancestor and descendant queries are a single
+    indexed lookup instead of a walk up or down the hierarchy.
+    """
+
+    class Meta:
+        verbose_name_plural = "Term closures"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="unique_term_closure"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["descendant", "depth"]),
+        ]
+
+    ancestor = models.ForeignKey(
+        Term,
+        related_name="descendant_links",
+        on_delete=models.CASCADE,
+        db_index=False,  # covered by unique_term_closure
+        db_constraint=False,  # derived from Term by rebuild_closure
+    )
+    descendant = models.ForeignKey(
+        Term,
+        related_name="ancestor_links",
+        on_delete=models.CASCADE,
+        db_index=False,  # covered by the (descendant, depth) index
+        db_constraint=False,
+    )
+    depth = models.PositiveIntegerField(
+        help_text="Length of the shortest subClassOf path from descendant to ancestor"
+    )
+
+    def __str__(self):
+        return f"{self.descendant_id} -> {self.ancestor_id} ({self.depth})"
+
+
+class TermParent(models.Model):
+    """A ``subClassOf`` edge of a term, written by ``ingest``.
+
+    Named parents are ``is_a`` edges. Restrictions (``RO_0001000 some X``)
+    keep their property in ``relation`` and their quantifier in ``kind``.
+    ``parent_uri`` always holds the target; ``parent`` links it once that
+    target is an ingested term. The closure is built from the ``is_a`` edges.
+    """
+
+    class Kind(models.TextChoices):
+        IS_A = "is_a", "Is a"
+        SOME = "some", "Some values from"
+        ONLY = "only", "All values from"
+
+    class Meta:
+        verbose_name_plural = "Term parents"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["child", "kind", "relation", "parent_uri"], name="unique_term_parent"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["parent", "kind"], name="ontologies_parent_parent_idx"),
+        ]
+
+    child = models.ForeignKey(
+        Term,
+        related_name="parent_links",
+        on_delete=models.CASCADE,
+        db_index=False,  # covered by unique_term_parent
+    )
+    parent = models.ForeignKey(
+        Term,
+        related_name="child_links",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        db_index=False,  # covered by ontologies_parent_parent_idx
+    )
+    parent_uri = models.URLField()
+    relation = models.URLField(
+        blank=True,
+        default="",
+        help_text="Property of a restriction, empty for is_a edges",
+    )
+    kind = models.CharField(max_length=8, choices=Kind.choices, default=Kind.IS_A)
+
+    def __str__(self):
+        relation = f"{self.relation} {self.kind}" if self.relation else self.kind
+        return f"{self.child_id} {relation} {self.parent_uri}"
+
+
+class TermSynonym(models.Model):
+    """A label, synonym or cross-reference of a term, written by ``ingest``.
+
+    Every ``rdfs:label`` (in any language) is stored alongside the oboInOwl
+    synonyms and xrefs, so ``/lookup/`` resolves any name of a term with a
+    single probe of the index on ``normalized``.
+    """
+
+    class Kind(models.TextChoices):
+        LABEL = "label", "Label"
+        EXACT = "exact", "Exact synonym"
+        RELATED = "related", "Related synonym"
+        NARROW = "narrow", "Narrow synonym"
+        BROAD = "broad", "Broad synonym"
+        XREF = "xref", "Cross-reference"
+
+    class Meta:
+        verbose_name_plural = "Term synonyms"
+        indexes = [
+            models.Index(fields=["normalized"], name="ontologies_synonym_norm_idx"),
+            # the prefixes of /autocomplete/
+            GinIndex(
+                OpClass(Lower("text"), name="gin_trgm_ops"),
+                name="ontologies_synonym_text_trgm",
+            ),
+        ]
+
+    term = models.ForeignKey(Term, related_name="synonyms", on_delete=models.CASCADE)
+    text = models.TextField()
+    normalized = models.TextField(
+        editable=False,
+        help_text="Text compared by exact lookups, see normalize_text",
+    )
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    lang = models.CharField(max_length=16, blank=True, default="")
+
+    def save(self, *args, **kwargs):
+        self.normalized = normalize_text(self.text)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.text} ({self.get_kind_display()})"
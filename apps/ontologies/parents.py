@@ -0,0 +1,62 @@
+"""Bulk maintenance of the TermParent edge table."""
+
+from django.db import connection
+
+from .models import Term, TermParent
+
+
+def term_edges(parents, relations=()):
+    """The ``(kind, relation, parent_uri)`` edges of a term: its named parents, then its restrictions."""
+    return [(TermParent.Kind.IS_A, "", uri) for uri in parents] + [tuple(edge) for edge in relations]
+
+
+def write_parents(edges, kinds=None):
+    """Replace the edges of the terms in ``edges`` ({term id: [(kind, relation, parent_uri)]}).
+
+    Only edges of ``kinds`` are replaced when given. Targets that are already
+    ingested are linked right away, the others by ``link_parents``.
+    """
+    rows = [
+        (child, parent_uri, relation, kind)
+        for child, links in edges.items()
+        for kind, relation, parent_uri in dict.fromkeys(links)
+    ]
+    stale = TermParent.objects.filter(child_id__in=list(edges))
+    if kinds is not None:
+        stale = stale.filter(kind__in=kinds)
+    stale.delete()
+    if not rows:
+        return 0
+
+    children, parent_uris, relations, row_kinds = (list(column) for column in zip(*rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {TermParent._meta.db_table} (child_id, parent_id, parent_uri, relation, kind)
+            SELECT e.child, p.id, e.parent_uri, e.relation, e.kind
+            FROM unnest(%s::bigint[], %s::text[], %s::text[], %s::text[])
+                AS e(child, parent_uri, relation, kind)
+            LEFT JOIN {Term._meta.db_table} p ON p.uri = e.parent_uri
+            ON CONFLICT DO NOTHING
+            """,
+            [children, parent_uris, relations, row_kinds],
+        )
+        return cursor.rowcount
+
+
+def link_parents():
+    """Point the edges whose target was ingested after them at that term.
+
+    ``ingest`` runs this once every ontology is written, since a parent can
+    come in a later batch or from another ontology.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {TermParent._meta.db_table} e
+            SET parent_id = t.id
+            FROM {Term._meta.db_table} t
+            WHERE e.parent_id IS NULL AND t.uri = e.parent_uri
+            """
+        )
+        return cursor.rowcount
@@ -0,0 +1,170 @@
+"""Incremental RDF/XML reader for OWL ontologies.
+
+The reader walks the document with ``iterparse`` and only keeps the node
+element currently being read, so memory stays flat regardless of the size of
+the ontology. It understands the subset of RDF/XML that OWL serializers
+(OWL API, ROBOT, Protégé) emit for class declarations, which is what the
+ingest pipeline needs.
+"""
+
+from urllib.parse import urljoin
+from xml.etree.ElementTree import iterparse
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL = "http://www.w3.org/2002/07/owl#"
+DCTERMS = "http://purl.org/dc/terms/"
+XML = "http://www.w3.org/XML/1998/namespace"
+OBO = "http://purl.obolibrary.org/obo/"
+OBO_IN_OWL = "http://www.geneontology.org/formats/oboInOwl#"
+
+# quantifiers of the subClassOf restrictions kept as TermParent edges, by kind
+RESTRICTION_QUANTIFIERS = {"someValuesFrom": "some", "allValuesFrom": "only"}
+
+# oboInOwl annotation properties kept as synonyms, by TermSynonym kind
+SYNONYM_PROPERTIES = {
+    "hasExactSynonym": "exact",
+    "hasRelatedSynonym": "related",
+    "hasNarrowSynonym": "narrow",
+    "hasBroadSynonym": "broad",
+    "hasDbXref": "xref",
+}
+
+RDF_ABOUT = f"{{{RDF}}}about"
+RDF_ID = f"{{{RDF}}}ID"
+RDF_RESOURCE = f"{{{RDF}}}resource"
+RDF_TYPE = f"{{{RDF}}}type"
+RDF_DESCRIPTION = f"{{{RDF}}}Description"
+XML_BASE = f"{{{XML}}}base"
+XML_LANG = f"{{{XML}}}lang"
+
+OWL_CLASS = f"{{{OWL}}}Class"
+OWL_CLASS_URI = f"{OWL}Class"
+OWL_ONTOLOGY = f"{{{OWL}}}Ontology"
+OWL_DEPRECATED = f"{{{OWL}}}deprecated"
+OWL_RESTRICTION = f"{{{OWL}}}Restriction"
+OWL_ON_PROPERTY = f"{{{OWL}}}onProperty"
+QUANTIFIER_TAGS = {f"{{{OWL}}}{name}": kind for name, kind in RESTRICTION_QUANTIFIERS.items()}
+RDFS_LABEL = f"{{{RDFS}}}label"
+RDFS_SUBCLASSOF = f"{{{RDFS}}}subClassOf"
+DCTERMS_TITLE = f"{{{DCTERMS}}}title"
+IAO_DEFINITION = f"{{{OBO}}}IAO_0000115"
+SYNONYM_TAGS = {f"{{{OBO_IN_OWL}}}{name}": kind for name, kind in SYNONYM_PROPERTIES.items()}
+
+
+def unique_synonyms(synonyms):
+    """``(text, kind, lang)`` tuples without blanks or duplicates, in order."""
+    return [synonym for synonym in dict.fromkeys(synonyms) if synonym[0].strip()]
+
+
+class RDFXMLReader:
+    """Stream ontology headers and named classes out of an RDF/XML file.
+
+    ``terms()`` yields one record per named ``owl:Class`` with the same keys
+    as ``extract_terms`` in the ingest command. Ontology headers found along
+    the way are appended to ``ontologies``; serializers write them before the
+    first class, so they are known by the time the first term is yielded.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.base = ""
+        self.ontologies = []
+
+    def terms(self):
+        depth = 0
+        root = None
+        for event, elem in iterparse(self.source, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                    self.base = elem.get(XML_BASE, "")
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            # elem is a top-level node element: read it, then drop it
+            if elem.tag == OWL_ONTOLOGY:
+                self.ontologies.append(self._ontology(elem))
+            elif self._is_class(elem):
+                record = self._term(elem)
+                if record is not None:
+                    yield record
+            root.clear()
+
+    def _uri(self, elem):
+        if elem.get(RDF_ABOUT) is not None:
+            return urljoin(self.base, elem.get(RDF_ABOUT))
+        if elem.get(RDF_ID) is not None:
+            return f"{self.base}#{elem.get(RDF_ID)}"
+        return None
+
+    def _is_class(self, elem):
+        if elem.tag == OWL_CLASS:
+            return True
+        if elem.tag == RDF_DESCRIPTION:
+            return any(
+                child.tag == RDF_TYPE and child.get(RDF_RESOURCE) == OWL_CLASS_URI
+                for child in elem
+            )
+        return False
+
+    def _ontology(self, elem):
+        title = next((c.text or "" for c in elem if c.tag == DCTERMS_TITLE), "")
+        return {"uri": self._uri(elem) or self.base, "label": title}
+
+    def _restrictions(self, elem):
+        """``(kind, property, target)`` of a ``subClassOf`` restriction on a named class.
+
+        Nested class expressions (unions, intersections...) are left out.
+        """
+        edges = []
+        for restriction in elem:
+            if restriction.tag != OWL_RESTRICTION:
+                continue
+            prop = next((c.get(RDF_RESOURCE) for c in restriction if c.tag == OWL_ON_PROPERTY), None)
+            for child in restriction:
+                if child.tag in QUANTIFIER_TAGS and prop and child.get(RDF_RESOURCE):
+                    target = urljoin(self.base, child.get(RDF_RESOURCE))
+                    edges.append((QUANTIFIER_TAGS[child.tag], urljoin(self.base, prop), target))
+        return edges
+
+    def _term(self, elem):
+        uri = self._uri(elem)
+        if uri is None:
+            return None
+
+        label = None
+        definition = None
+        parents = []
+        relations = []
+        synonyms = []
+        obsolete = False
+        for child in elem:
+            if child.tag == RDFS_LABEL:
+                if label is None:
+                    label = child.text or ""
+                synonyms.append((child.text or "", "label", child.get(XML_LANG, "")))
+            elif child.tag in SYNONYM_TAGS:
+                synonyms.append((child.text or "", SYNONYM_TAGS[child.tag], child.get(XML_LANG, "")))
+            elif child.tag == IAO_DEFINITION and definition is None:
+                definition = child.text or ""
+            elif child.tag == RDFS_SUBCLASSOF and child.get(RDF_RESOURCE):
+                parents.append(urljoin(self.base, child.get(RDF_RESOURCE)))
+            elif child.tag == RDFS_SUBCLASSOF:
+                relations += self._restrictions(child)
+            elif child.tag == OWL_DEPRECATED:
+                obsolete = (child.text or "").strip().lower() == "true"
+
+        return {
+            "uri": uri,
+            "label": label or "",
+            "definition": definition or "",
+            "subClassOf": parents,
+            "relations": relations,
+            "synonyms": unique_synonyms(synonyms),
+            "is_obsolete": obsolete,
+        }
@@ -0,0 +1,42 @@
+"""Maintenance of ``Term.static_score``, the query-independent part of the search ranking."""
+
+from django.db import connection
+
+from .models import Ontology, Term
+
+
+def refresh_static_scores(ontologies=None, ids=None, detached=False):
+    """Recompute ``Term.static_score`` as ontology weight x term weight.
+
+    Only the terms of the ontology URIs ``ontologies``, the term ids ``ids``,
+    or the terms without an ontology when ``detached``, are recomputed when
+    given (all terms otherwise). A missing weight counts as 1. Only rows
+    whose value changes are written, with their ``updated_at``.
+    """
+    term = Term._meta.db_table
+    if ids is not None:
+        scope, params = "t.id = ANY(%s)", [list(ids)]
+    elif ontologies is not None:
+        scope, params = "t.ontology_id = ANY(%s)", [list(ontologies)]
+    elif detached:
+        scope, params = "t.ontology_id IS NULL", []
+    else:
+        scope, params = "TRUE", []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH scores AS (
+                SELECT t.id, COALESCE(o.weight, 1.0) * COALESCE(t.weight, 1.0) AS score
+                FROM {term} t
+                LEFT JOIN {Ontology._meta.db_table} o ON o.uri = t.ontology_id
+                WHERE {scope}
+            )
+            UPDATE {term} t
+            SET static_score = scores.score, updated_at = now()
+            FROM scores
+            WHERE t.id = scores.id AND t.static_score IS DISTINCT FROM scores.score
+            """,
+            params,
+        )
+        return cursor.rowcount
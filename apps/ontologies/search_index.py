@@ -0,0 +1,420 @@
+"""Read-only inverted index over the terms, served from a memory-mapped file.
+
+``build_index`` writes a snapshot of every searchable term to a single file,
+and ``get_index`` maps it into the process. Pages of the file are shared by
+every worker on the host, and a query only touches the postings of its own
+tokens, so answering it needs neither the database nor the ORM.
+
+Layout (little endian, sections aligned on 8 bytes)::
+
+    header     MAGIC, counts, section offsets, then the generation token
+               the index was built from (see HEADER)
+    docs       uint64[n_docs + 1] offsets into the JSON blob of each document,
+               a term row shaped like ``values()`` (see ``serialize_terms``)
+    boosts     float32[n_docs]   static score (ontology weight x term weight)
+    favorites  uint8[n_docs]
+    vocab      uint64[n_tokens + 1] offsets into the sorted, \\0-separated tokens
+    postings   uint64[n_tokens + 1] offsets into the two arrays below
+    post_docs  uint32[n_postings]
+    post_wts   float32[n_postings]
+
+The file is replaced atomically with ``os.replace``; readers notice the new
+file (inode and mtime) and remap it on their next query.
+
+Edits rebuild it through ``schedule_rebuild``, which waits for a burst of
+edits to settle, and ``update_index``, which lets one process build at a
+time (a lock file next to the index) and skips the build when the index
+already holds the current generation.
+"""
+
+import json
+import math
+import mmap
+import os
+import fcntl
+import re
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models.functions import Collate
+
+from .generations import generation_token
+
+MAGIC = b"OSIDX003"
+HEADER = struct.Struct("<8s13Q16s")
+
+# how much a token found in each field is worth
+FIELD_WEIGHTS = {"label": 1.0, "synonyms": 0.6, "definition": 0.2, "uri": 0.1}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# how often readers check whether the index file was swapped, in seconds
+RELOAD_INTERVAL = 1.0
+
+
+def fold_token(token):
+    """Lowercase ``token``, with a naive plural folding ("cheeses" -> "cheese")."""
+    token = token.lower()
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [fold_token(token) for token in TOKEN_RE.findall((text or "").lower())]
+
+
+def _align(handle):
+    handle.write(b"\0" * (-handle.tell() % 8))
+    return handle.tell()
+
+
+def _write_array(handle, typecode, values):
+    offset = _align(handle)
+    array(typecode, values).tofile(handle)
+    return offset
+
+
+def build_index(path=None):
+    """Write the index of all non-obsolete terms to ``path`` and swap it in."""
+    from .models import Term, TermSynonym
+
+    path = Path(path or settings.SEARCH_INDEX_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # read before the rows: an edit committed meanwhile makes the index stale
+    generation = generation_token()
+
+    blob = bytearray()
+    doc_offsets = array("Q", [0])
+    boosts = array("f")
+    favorites = array("B")
+    postings = defaultdict(dict)
+
+    # every name but the main label and the xrefs, as in the search vector
+    synonyms = defaultdict(list)
+    rows = (
+        TermSynonym.objects.filter(term__is_obsolete=False)
+        .exclude(kind=TermSynonym.Kind.XREF)
+        .values_list("term_id", "text")
+    )
+    for term_id, text in rows.iterator(chunk_size=5000):
+        synonyms[term_id].append(text)
+
+    terms = (
+        Term.objects.filter(is_obsolete=False)
+        # bytewise order, the same as comparing the URIs as Python strings
+        .order_by(Collate("uri", "C"))
+        .values(
+            "id",
+            "uri",
+            "label",
+            "definition",
+            "subClassOf",
+            "weight",
+            "is_favorite",
+            "is_obsolete",
+            "ontology__uri",
+            "ontology__label",
+            "static_score",
+        )
+    )
+    for doc_id, term in enumerate(terms.iterator(chunk_size=5000)):
+        term_id = term.pop("id")
+        static_score = term.pop("static_score")
+        blob += json.dumps(term, separators=(",", ":")).encode()
+        doc_offsets.append(len(blob))
+        boosts.append(static_score)
+        favorites.append(1 if term["is_favorite"] else 0)
+
+        fields = {
+            "label": term["label"],
+            "synonyms": " ".join(text for text in synonyms.pop(term_id, ()) if text != term["label"]),
+            "definition": term["definition"],
+            "uri": re.sub(r"^.*[/#]", "", term["uri"]),
+        }
+        for field, text in fields.items():
+            for token in tokenize(text):
+                weights = postings[token]
+                weights[doc_id] = weights.get(doc_id, 0.0) + FIELD_WEIGHTS[field]
+
+    tokens = sorted(postings)
+    vocab = bytearray()
+    vocab_offsets = array("Q", [0])
+    posting_offsets = array("Q", [0])
+    post_docs = array("I")
+    post_weights = array("f")
+    for token in tokens:
+        vocab += token.encode() + b"\0"
+        vocab_offsets.append(len(vocab))
+        for doc_id, weight in sorted(postings[token].items()):
+            post_docs.append(doc_id)
+            post_weights.append(weight)
+        posting_offsets.append(len(post_docs))
+
+    # a file of our own: concurrent builds (ingest, a signal in every worker)
+    # must not write into each other's partial index before the swap
+    fd, partial = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        with open(fd, "wb") as handle:
+            # readable by the server workers, like a file created with open()
+            os.fchmod(handle.fileno(), 0o644)
+            handle.write(b"\0" * HEADER.size)
+            sections = [
+                _write_array(handle, "Q", doc_offsets),
+                _write_array(handle, "B", blob),
+                _write_array(handle, "f", boosts),
+                _write_array(handle, "B", favorites),
+                _write_array(handle, "Q", vocab_offsets),
+                _write_array(handle, "B", vocab),
+                _write_array(handle, "Q", posting_offsets),
+                _write_array(handle, "I", post_docs),
+                _write_array(handle, "f", post_weights),
+            ]
+            handle.seek(0)
+            handle.write(
+                HEADER.pack(
+                    MAGIC,
+                    len(boosts),
+                    len(tokens),
+                    len(post_docs),
+                    int(time.time()),
+                    *sections,
+                    generation.encode(),
+                )
+            )
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
+    return len(boosts), len(tokens)
+
+
+def _identity(stat):
+    return f"{stat.st_ino:x}-{stat.st_mtime_ns:x}"
+
+
+class SearchIndex:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self.identity = _identity(os.fstat(handle.fileno()))
+            self.mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mm)
+
+        (
+            magic,
+            self.n_docs,
+            self.n_tokens,
+            n_postings,
+            self.built_at,
+            docs,
+            blob,
+            boosts,
+            favorites,
+            vocab_offsets,
+            vocab,
+            posting_offsets,
+            post_docs,
+            post_weights,
+            generation,
+        ) = HEADER.unpack_from(self.mm)
+        self.generation = generation.decode()
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a search index")
+
+        self.doc_offsets = view[docs: docs + 8 * (self.n_docs + 1)].cast("Q")
+        self.blob = blob
+        self.boosts = view[boosts: boosts + 4 * self.n_docs].cast("f")
+        self.favorites = view[favorites: favorites + self.n_docs]
+        self.vocab_offsets = view[vocab_offsets: vocab_offsets + 8 * (self.n_tokens + 1)].cast("Q")
+        self.vocab = vocab
+        self.posting_offsets = view[
+            posting_offsets: posting_offsets + 8 * (self.n_tokens + 1)
+        ].cast("Q")
+        self.post_docs = view[post_docs: post_docs + 4 * n_postings].cast("I")
+        self.post_weights = view[post_weights: post_weights + 4 * n_postings].cast("f")
+
+    def _token(self, index):
+        start = self.vocab + self.vocab_offsets[index]
+        end = self.vocab + self.vocab_offsets[index + 1] - 1
+        return self.mm[start:end]
+
+    def _find(self, token):
+        """Binary search of ``token`` in the sorted vocabulary."""
+        token = token.encode()
+        low, high = 0, self.n_tokens
+        while low < high:
+            middle = (low + high) // 2
+            if self._token(middle) < token:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.n_tokens and self._token(low) == token:
+            return low
+        return None
+
+    def document(self, doc_id):
+        start = self.blob + self.doc_offsets[doc_id]
+        end = self.blob + self.doc_offsets[doc_id + 1]
+        return json.loads(self.mm[start:end])
+
+    def uri(self, doc_id):
+        return self.document(doc_id)["uri"]
+
+    def search(self, query):
+        """Return a ``Match`` for every document containing all the tokens of ``query``."""
+        scores = None
+        for token in dict.fromkeys(tokenize(query)):
+            index = self._find(token)
+            if index is None:
+                return []
+            start, end = self.posting_offsets[index], self.posting_offsets[index + 1]
+            idf = math.log(1 + self.n_docs / (end - start))
+            docs = self.post_docs[start:end]
+            weights = self.post_weights[start:end]
+            if scores is None:
+                scores = {doc: weight * idf for doc, weight in zip(docs, weights)}
+            else:
+                matches = dict(zip(docs, weights))
+                scores = {
+                    doc: score + matches[doc] * idf
+                    for doc, score in scores.items()
+                    if doc in matches
+                }
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        return [
+            Match(self, doc_id, bool(self.favorites[doc_id]), score * self.boosts[doc_id])
+            for doc_id, score in scores.items()
+        ]
+
+
+class Match:
+    """A search hit. Documents are numbered in URI order, so ``doc_id`` breaks ties."""
+
+    __slots__ = ("index", "doc_id", "is_favorite", "score")
+
+    def __init__(self, index, doc_id, is_favorite, score):
+        self.index = index
+        self.doc_id = doc_id
+        self.is_favorite = is_favorite
+        self.score = score
+
+    @property
+    def uri(self):
+        return self.index.uri(self.doc_id)
+
+    def sort_key(self):
+        return (not self.is_favorite, -self.score, self.doc_id)
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index():
+    """The index of this process, remapped when the file has been swapped."""
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < RELOAD_INTERVAL:
+        return _index
+    with _lock:
+        _checked_at = now
+        path = Path(settings.SEARCH_INDEX_PATH)
+        try:
+            identity = _identity(path.stat())
+        except FileNotFoundError:
+            _index = None
+            return None
+        if _index is None or _index.identity != identity:
+            try:
+                _index = SearchIndex(path)
+            except ValueError:
+                # written by another version, wait for the next rebuild
+                _index = None
+        return _index
+
+
+def _index_generation(path):
+    """The generation token ``path`` was built from, None without a readable index."""
+    try:
+        with open(path, "rb") as handle:
+            header = handle.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < HEADER.size or not header.startswith(MAGIC):
+        return None
+    return HEADER.unpack(header)[-1].decode()
+
+
+def update_index(path=None, force=False):
+    """Build the index at ``path`` unless it holds the current generation (always with ``force``).
+
+    Builders take turns on a lock file next to the index, so the processes of
+    a host never build at once, and whoever waited skips a build that the one
+    before it already covered. Returns ``build_index``'s counts, or None when
+    the index was current.
+    """
+    path = Path(path or settings.SEARCH_INDEX_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if not force and _index_generation(path) == generation_token():
+                return None
+            return build_index(path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+_rebuild_lock = threading.Lock()
+_rebuild_pending = False
+_rebuilding = False
+
+
+def schedule_rebuild():
+    """Update the index in a background thread once no edit came for ``SEARCH_INDEX_REBUILD_DELAY`` seconds."""
+    global _rebuild_pending, _rebuilding
+    if settings.SEARCH_BACKEND != "memory":
+        return
+    with _rebuild_lock:
+        _rebuild_pending = True
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_rebuild_when_idle, daemon=True).start()
+
+
+def _rebuild_when_idle():
+    global _rebuild_pending, _rebuilding
+    from django.db import connection
+
+    try:
+        while True:
+            # an edit during the wait starts it over, a burst ends in one build
+            with _rebuild_lock:
+                _rebuild_pending = False
+            time.sleep(settings.SEARCH_INDEX_REBUILD_DELAY)
+            with _rebuild_lock:
+                if _rebuild_pending:
+                    continue
+            update_index()
+            with _rebuild_lock:
+                if not _rebuild_pending:
+                    _rebuilding = False
+                    return
+    except BaseException:
+        with _rebuild_lock:
+            _rebuilding = False
+        raise
+    finally:
+        connection.close()
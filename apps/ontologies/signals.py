@@ -0,0 +1,123 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .curies import forget_prefixes
+from .generations import bump_generation, forget_ontologies
+from .hierarchy import refresh_closure, refresh_inherited_weights
+from .models import Ontology, Prefix, Term, TermParent, TermSynonym
+from .parents import term_edges, write_parents
+from .scores import refresh_static_scores
+from .search_index import schedule_rebuild
+from .synonyms import refresh_search_vectors
+
+
+def bump_on_commit(*ontology_uris):
+    # once the rows are visible: a read in between must not cache the old
+    # data under the new generation (the admin saves the inlines after the term)
+    for uri in dict.fromkeys(ontology_uris):
+        transaction.on_commit(partial(bump_generation, uri))
+
+
+@receiver(pre_save, sender=Term)
+def remember_term_weights(sender, instance, **kwargs):
+    previous = (
+        Term.objects.filter(pk=instance.pk)
+        .values_list("weight", "is_favorite", "subClassOf", "ontology_id", "label")
+        .first()
+    )
+    instance._previous_weights = previous[:2] if previous else None
+    instance._previous_parents = previous[2] if previous else None
+    instance._previous_ontology = previous[3] if previous else instance.ontology_id
+    instance._previous_label = previous[4] if previous else None
+
+
+@receiver(post_save, sender=Term)
+def term_saved(sender, instance, created=False, **kwargs):
+    moved = created or getattr(instance, "_previous_parents", None) != instance.subClassOf
+    if created:
+        # edges ingested before this term existed can now point at it
+        TermParent.objects.filter(parent__isnull=True, parent_uri=instance.uri).update(parent=instance)
+    if moved:
+        # ingest writes the edges and the closure in bulk; keep them in step with an edit
+        write_parents({instance.id: term_edges(instance.subClassOf or [])}, kinds=[TermParent.Kind.IS_A])
+        refresh_closure(instance.id)
+    weights = (instance.weight, instance.is_favorite)
+    if moved or getattr(instance, "_previous_weights", None) != weights:
+        # descendants inherit part of the weight, refresh that subtree only
+        refresh_inherited_weights(root=instance.id)
+    # a no-op unless the weight or the ontology changed, and safe after a save(update_fields=...)
+    refresh_static_scores(ids=[instance.id])
+    previous_label = getattr(instance, "_previous_label", None)
+    if previous_label and previous_label != instance.label:
+        # one by one, so that synonym_changed refreshes the vector; the old label
+        # must stop matching in /search/, /lookup/ and /annotate/
+        for synonym in instance.synonyms.filter(kind=TermSynonym.Kind.LABEL, text=previous_label):
+            synonym.delete()
+    if instance.label and not instance.synonyms.filter(kind=TermSynonym.Kind.LABEL, text=instance.label).exists():
+        # keep the label resolvable by /lookup/ after an edit through the API or admin
+        TermSynonym.objects.create(term=instance, text=instance.label, kind=TermSynonym.Kind.LABEL)
+    bump_on_commit(instance.ontology_id, getattr(instance, "_previous_ontology", instance.ontology_id))
+    transaction.on_commit(schedule_rebuild)
+
+
+@receiver(pre_delete, sender=Term)
+def remember_term_children(sender, instance, **kwargs):
+    # the delete detaches their edges (SET_NULL)
+    instance._previous_children = list(
+        instance.child_links.filter(kind=TermParent.Kind.IS_A).values_list("child_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Term)
+def term_deleted(sender, instance, **kwargs):
+    # the subtrees below it lose the ancestors they had through the term; the
+    # children deleted along with it (a queryset delete) are already gone
+    children = Term.objects.filter(id__in=getattr(instance, "_previous_children", ()))
+    for child in children.values_list("id", flat=True):
+        refresh_closure(child)
+        refresh_inherited_weights(root=child)
+    bump_on_commit(instance.ontology_id)
+    transaction.on_commit(schedule_rebuild)
+
+
+@receiver(pre_save, sender=Ontology)
+def remember_ontology_weight(sender, instance, **kwargs):
+    instance._previous_weight = (
+        Ontology.objects.filter(pk=instance.pk).values_list("weight", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Ontology)
+def ontology_saved(sender, instance, created, **kwargs):
+    if not created and getattr(instance, "_previous_weight", None) != instance.weight:
+        refresh_static_scores(ontologies=[instance.uri])
+
+
+@receiver(post_delete, sender=Ontology)
+def ontology_deleted(sender, instance, **kwargs):
+    # its terms were detached (SET_NULL) with a bulk update, they now count at weight 1
+    refresh_static_scores(detached=True)
+
+
+@receiver([post_save, post_delete], sender=Ontology)
+def ontology_changed(sender, instance, **kwargs):
+    forget_ontologies()
+    bump_on_commit(instance.uri)
+    transaction.on_commit(schedule_rebuild)
+
+
+@receiver([post_save, post_delete], sender=TermSynonym)
+def synonym_changed(sender, instance, **kwargs):
+    # ingest writes synonyms in bulk and refreshes the vectors itself
+    refresh_search_vectors([instance.term_id])
+    ontology = Term.objects.filter(pk=instance.term_id).values_list("ontology_id", flat=True).first()
+    bump_on_commit(ontology)
+    transaction.on_commit(schedule_rebuild)
+
+
+@receiver([post_save, post_delete], sender=Prefix)
+def prefix_changed(sender, instance, **kwargs):
+    forget_prefixes()
@@ -0,0 +1,46 @@
+"""Bulk maintenance of TermSynonym rows and of the search vectors using them."""
+
+from django.db import connection
+
+from .models import Term, TermSynonym, normalize_text
+
+# longer values are dropped, they are not names and would not fit in the index
+MAX_SYNONYM_LENGTH = 1000
+
+
+def write_synonyms(synonyms, batch_size=5000):
+    """Replace the synonyms of the terms in ``synonyms`` ({term id: [(text, kind, lang)]})."""
+    ids = list(synonyms)
+    with connection.cursor() as cursor:
+        # not QuerySet.delete(): that would send a post_delete signal per row
+        cursor.execute(f"DELETE FROM {TermSynonym._meta.db_table} WHERE term_id = ANY(%s)", [ids])
+    TermSynonym.objects.bulk_create(
+        [
+            TermSynonym(term_id=term_id, text=text, normalized=normalize_text(text), kind=kind, lang=lang)
+            for term_id, rows in synonyms.items()
+            for text, kind, lang in rows
+            if len(text) <= MAX_SYNONYM_LENGTH
+        ],
+        batch_size=batch_size,
+    )
+    refresh_search_vectors(ids)
+
+
+def refresh_search_vectors(ids):
+    """Recompute the search vector of the terms ``ids`` from their current synonyms.
+
+    The trigger of migration 0002/0007/0008 only fires when a term row changes,
+    so this runs after the synonyms of terms are rewritten.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {Term._meta.db_table}
+            SET search_vector = ontologies_term_search_vector(
+                uri, label, definition, ontologies_term_synonyms(id, label)
+            )
+            WHERE id = ANY(%s)
+            """,
+            [list(ids)],
+        )
+        return cursor.rowcount
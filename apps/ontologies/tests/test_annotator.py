@@ -0,0 +1,43 @@
+from apps.ontologies.annotator import Automaton, build_automaton
+
+
+def automaton(*labels):
+    built = Automaton()
+    for label in labels:
+        built.add(tuple(label.split()), [{"label": label}])
+    built.compile()
+    return built
+
+
+def spans(automaton, chunks, longest=True):
+    return [(span["start"], span["end"], span["text"]) for span in automaton.annotate(chunks, longest)]
+
+
+def test_labels_match_whole_words_only():
+    labels = automaton("cheese")
+    assert spans(labels, ["cheesecake and cheese"]) == [(15, 21, "cheese")]
+
+
+def test_overlapping_mentions_resolve_leftmost_longest():
+    labels = automaton("blue", "blue cheese", "cheese")
+    text = ["some blue cheese, a cheese"]
+    assert spans(labels, text) == [(5, 16, "blue cheese"), (20, 26, "cheese")]
+    assert spans(labels, text, longest=False) == [
+        (5, 9, "blue"),
+        (5, 16, "blue cheese"),
+        (10, 16, "cheese"),
+        (20, 26, "cheese"),
+    ]
+
+
+def test_words_split_across_chunks_still_match():
+    labels = automaton("blue cheese")
+    assert spans(labels, ["a bl", "ue che", "ese"]) == [(2, 13, "blue cheese")]
+
+
+def test_build_automaton_uses_labels_and_exact_synonyms(food):
+    labels = build_automaton()
+    text = ["Fromage, yoghurt and aged cheese make a curd."]
+    found = [(span["text"], [term["label"] for term in span["terms"]]) for span in labels.annotate(text)]
+    # related synonyms and obsolete terms are left out
+    assert found == [("Fromage", ["cheese"]), ("yoghurt", ["yogurt"]), ("cheese", ["cheese"])]
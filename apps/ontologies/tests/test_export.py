@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pyarrow.parquet as pq
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from apps.ontologies import export
+from apps.ontologies.models import Term
+from conftest import FOOD_ONTOLOGY, OBO, food_uri
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def exported(format, **options):
+    return b"".join(export.export_terms(format, export.term_chunks(**options)))
+
+
+def ndjson(data):
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+def date_terms(*labels):
+    """Give the terms ``labels`` an ``updated_at`` one minute apart, from T0."""
+    for minutes, label in enumerate(labels):
+        Term.objects.filter(label=label).update(updated_at=T0 + timedelta(minutes=minutes))
+
+
+def test_ndjson_export(food):
+    terms = {term["uri"]: term for term in ndjson(exported("ndjson"))}
+    assert len(terms) == 8
+
+    yogurt = terms[food_uri(5)]
+    assert list(yogurt) == list(export.COLUMNS)
+    assert yogurt["label"] == "yogurt"
+    assert (yogurt["ontology"], yogurt["ontology_label"]) == (FOOD_ONTOLOGY, "Food test ontology")
+    assert yogurt["parents"] == [
+        {"uri": food_uri(2), "label": "dairy product", "kind": "is_a", "relation": ""},
+        {"uri": food_uri(6), "label": "milk", "kind": "some", "relation": f"{OBO}RO_0001000"},
+    ]
+
+
+def test_csv_export(food):
+    rows = list(csv.DictReader(io.StringIO(exported("csv").decode())))
+    assert len(rows) == 8
+    cheese = next(row for row in rows if row["uri"] == food_uri(3))
+    assert json.loads(cheese["parents"]) == [
+        {"uri": food_uri(2), "label": "dairy product", "kind": "is_a", "relation": ""}
+    ]
+    assert cheese["is_favorite"] == "False"
+
+
+def test_parquet_export(food):
+    table = pq.read_table(io.BytesIO(exported("parquet", chunk_size=3)))
+    assert table.num_rows == 8
+    assert table.schema == export.parquet_schema()
+    # one row group per chunk
+    assert pq.ParquetFile(io.BytesIO(exported("parquet", chunk_size=3))).num_row_groups == 3
+
+
+def test_terms_are_exported_in_updated_at_order(food):
+    date_terms("milk", "cheese", "apple")
+    uris = [term["uri"] for term in ndjson(exported("ndjson"))]
+    assert uris[:3] == [food_uri(6), food_uri(3), food_uri(7)]
+
+
+def test_updated_since_keeps_the_terms_at_or_after_the_watermark(food, settings):
+    settings.EXPORT_WATERMARK_LAG = 0
+    date_terms("milk", "cheese", "apple")
+    Term.objects.exclude(label__in=["milk", "cheese", "apple"]).update(updated_at=T0 - timedelta(days=1))
+
+    terms = ndjson(exported("ndjson", updated_since=T0 + timedelta(minutes=1)))
+    assert [term["label"] for term in terms] == ["cheese", "apple"]
+    terms = ndjson(exported("ndjson", ontologies=[FOOD_ONTOLOGY], updated_since=T0))
+    assert [term["label"] for term in terms] == ["milk", "cheese", "apple"]
+
+
+def test_updated_since_looks_back_by_the_watermark_lag(food, settings):
+    settings.EXPORT_WATERMARK_LAG = 90
+    date_terms("milk", "cheese", "apple")
+    Term.objects.exclude(label__in=["milk", "cheese", "apple"]).update(updated_at=T0 - timedelta(days=1))
+
+    # cheese could have been committed after an export that ended on apple
+    terms = ndjson(exported("ndjson", updated_since=T0 + timedelta(minutes=2)))
+    assert [term["label"] for term in terms] == ["cheese", "apple"]
+
+
+def test_keyset_chunks_match_the_cursor(food, monkeypatch):
+    date_terms("milk", "cheese", "apple")
+    cursor = list(export.term_chunks(chunk_size=3))
+    monkeypatch.setitem(connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", True)
+    assert list(export.term_chunks(chunk_size=3)) == cursor
+    assert [len(chunk) for chunk in cursor] == [3, 3, 2]
+
+
+def test_parse_watermark():
+    assert export.parse_watermark("2026-01-01T00:00:00+00:00") == T0
+    assert export.parse_watermark("2026-01-01T00:00:00").tzinfo is not None
+    with pytest.raises(ValueError):
+        export.parse_watermark("yesterday")
+
+
+def test_export_terms_command(food, tmp_path):
+    output = tmp_path / "terms.ndjson"
+    log = io.StringIO()
+    call_command("export_terms", output=str(output), stdout=log)
+
+    terms = ndjson(output.read_bytes())
+    assert len(terms) == 8
+    assert f"next --updated-since: {terms[-1]['updated_at']}" in log.getvalue()
+
+    with pytest.raises(CommandError, match="--updated-since"):
+        call_command("export_terms", output=str(output), updated_since="yesterday")
@@ -0,0 +1,33 @@
+import multiprocessing
+
+import pytest
+from django.db import connections
+
+from apps.ontologies.generations import bump_generation, generation_token
+from conftest import FOOD_ONTOLOGY
+
+
+def bump_in_child():
+    connections.close_all()
+    bump_generation()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bumps_are_seen_by_other_processes():
+    # ingest bumps the generations in its own process, the server reads them in its workers
+    token = generation_token()
+    connections.close_all()
+    child = multiprocessing.get_context("fork").Process(target=bump_in_child)
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+    assert generation_token() != token
+
+
+@pytest.mark.django_db
+def test_bumps_change_only_their_ontology():
+    token = generation_token([FOOD_ONTOLOGY])
+    bump_generation("http://example.org/other.owl")
+    assert generation_token([FOOD_ONTOLOGY]) == token
+    bump_generation(FOOD_ONTOLOGY)
+    assert generation_token([FOOD_ONTOLOGY]) != token
@@ -0,0 +1,56 @@
+import pytest
+
+from apps.ontologies.hierarchy import rebuild_closure, refresh_inherited_weights
+from apps.ontologies.models import Term, TermClosure, TermParent
+from apps.ontologies.parents import write_parents
+
+
+def closure():
+    return set(TermClosure.objects.values_list("descendant__label", "ancestor__label", "depth"))
+
+
+# the closure of the ingest is rebuilt: its temporary table lives until the commit
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_closure_links_every_ancestor_once(food):
+    TermClosure.objects.all().delete()
+    rows, depth = rebuild_closure()
+
+    assert depth == 3
+    assert rows == TermClosure.objects.count() == 21
+    assert {(ancestor, depth) for descendant, ancestor, depth in closure() if descendant == "blue cheese"} == {
+        ("blue cheese", 0),
+        ("cheese", 1),
+        ("dairy product", 2),
+        ("food", 3),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_closure_keeps_the_shortest_path_and_stops_on_cycles(food):
+    # blue cheese is also a direct child of food, and food a child of blue cheese
+    write_parents(
+        {
+            food["blue cheese"].id: [(TermParent.Kind.IS_A, "", food["cheese"].uri), (TermParent.Kind.IS_A, "", food["food"].uri)],
+            food["food"].id: [(TermParent.Kind.IS_A, "", food["blue cheese"].uri)],
+        }
+    )
+    TermClosure.objects.all().delete()
+    rebuild_closure()
+
+    links = closure()
+    assert ("blue cheese", "food", 1) in links
+    assert ("food", "blue cheese", 1) in links
+    assert ("blue cheese", "blue cheese", 0) in links
+    assert TermClosure.objects.filter(descendant=food["blue cheese"], ancestor=food["food"]).count() == 1
+
+
+def test_refresh_inherited_weights_of_a_subtree(food):
+    Term.objects.filter(pk=food["dairy product"].pk).update(weight=5.0, is_favorite=True)
+    assert refresh_inherited_weights(root=food["cheese"].id) == 3
+
+    inherited = dict(Term.objects.values_list("label", "inherited_weight"))
+    # (5 - 1 + favorite boost 1) x 0.5 per step
+    assert inherited["cheese"] == 2.5
+    assert inherited["blue cheese"] == inherited["aged cheese"] == 1.25
+    # outside of the subtree refreshed
+    assert inherited["yogurt"] == 0.0
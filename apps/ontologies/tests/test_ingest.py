@@ -0,0 +1,191 @@
+import os
+import time
+
+import pytest
+from django.core.management.base import CommandError
+
+from apps.ontologies import artifacts
+from apps.ontologies.models import Ontology, Prefix, Term, TermClosure, TermParent, TermSynonym
+from conftest import DRINK_ONTOLOGY, FOOD_ONTOLOGY, OBO, food_uri
+
+
+def stored_terms():
+    """Everything ingest writes for a term, by URI."""
+    terms = {}
+    for term in Term.objects.prefetch_related("synonyms", "parent_links"):
+        terms[term.uri] = {
+            "label": term.label,
+            "definition": term.definition,
+            "ontology": term.ontology_id,
+            "subClassOf": sorted(term.subClassOf),
+            "is_obsolete": term.is_obsolete,
+            "synonyms": sorted((s.text, s.kind, s.lang) for s in term.synonyms.all()),
+            "parents": sorted(
+                (p.kind, p.relation, p.parent_uri, p.parent_id is not None) for p in term.parent_links.all()
+            ),
+        }
+    return terms
+
+
+def publish(ontology_dir, name, replace):
+    """Edit a served ontology file, dated later so the conditional GET downloads it again."""
+    path = ontology_dir / name
+    text = path.read_text()
+    for old, new in replace.items():
+        assert old in text
+        text = text.replace(old, new)
+    path.write_text(text)
+    later = time.time() + 10
+    os.utime(path, (later, later))
+
+
+def test_ingest_writes_terms_synonyms_and_edges(food):
+    ontology = Ontology.objects.get()
+    assert (ontology.uri, ontology.label) == (FOOD_ONTOLOGY, "Food test ontology")
+    assert len(food) == 8
+
+    cheese = stored_terms()[food_uri(3)]
+    assert cheese["label"] == "cheese"
+    assert cheese["definition"] == "A dairy product made by curdling milk."
+    assert cheese["ontology"] == FOOD_ONTOLOGY
+    assert cheese["subClassOf"] == [food_uri(2)]
+    assert cheese["synonyms"] == [
+        ("FOODON:00001013", "xref", ""),
+        ("cheese", "label", "en"),
+        ("curd", "related", ""),
+        ("fromage", "label", "fr"),
+    ]
+    assert food["aged cheese"].is_obsolete
+    assert Prefix.objects.filter(prefix="FOOD", namespace=f"{OBO}FOOD_").exists()
+
+
+def test_ingest_stores_restrictions_as_edges(food):
+    edges = TermParent.objects.filter(child=food["yogurt"]).order_by("kind")
+    assert [(edge.kind, edge.relation, edge.parent_id) for edge in edges] == [
+        (TermParent.Kind.IS_A, "", food["dairy product"].id),
+        (TermParent.Kind.SOME, f"{OBO}RO_0001000", food["milk"].id),
+    ]
+
+
+def test_ingest_builds_the_closure(food):
+    ancestors = TermClosure.objects.filter(descendant=food["blue cheese"]).order_by("depth")
+    assert [(link.ancestor.label, link.depth) for link in ancestors] == [
+        ("blue cheese", 0),
+        ("cheese", 1),
+        ("dairy product", 2),
+        ("food", 3),
+    ]
+    # restrictions are not subClassOf steps
+    assert not TermClosure.objects.filter(descendant=food["yogurt"], ancestor=food["milk"]).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_and_graph_ingests_store_the_same_terms(ingest):
+    ingest("food.owl", stream=True, no_cache=True)
+    streamed = stored_terms()
+    Term.objects.all().delete()
+    ingest("food.owl", no_cache=True)
+    assert stored_terms() == streamed
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_only_writes_changes_and_obsoletes_missing_terms(ingest, ontology_dir, capsys):
+    ingest("food.owl", sync=True)
+    assert "Sync summary: 8 new, 0 updated, 0 unchanged, 0 obsoleted" in capsys.readouterr().out
+
+    publish(
+        ontology_dir,
+        "food.owl",
+        {
+            ">apple<": ">green apple<",
+            # the class of milk is dropped from the release
+            '<owl:Class rdf:about="http://purl.obolibrary.org/obo/FOOD_0000006">': "<owl:Class>",
+        },
+    )
+    ingest("food.owl", sync=True)
+    assert "Sync summary: 0 new, 1 updated, 6 unchanged, 1 obsoleted" in capsys.readouterr().out
+    assert Term.objects.get(uri=food_uri(7)).label == "green apple"
+    assert Term.objects.get(uri=food_uri(6)).is_obsolete
+
+    ingest("food.owl", sync=True)
+    output = capsys.readouterr().out
+    assert "Sync summary: 0 new, 0 updated, 7 unchanged, 0 obsoleted" in output
+    assert "No changes, skipping the hierarchy rebuild." in output
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cached_snapshot_is_ingested_offline(ingest, capsys):
+    ingest("food.owl")
+    assert "Using the cached snapshot" not in capsys.readouterr().out
+    Term.objects.all().delete()
+
+    ingest("food.owl", offline=True)
+    assert "Using the cached snapshot, skipping parsing." in capsys.readouterr().out
+    assert Term.objects.count() == 8
+
+
+@pytest.mark.django_db(transaction=True)
+def test_snapshots_of_another_python_are_parsed_again(ingest, monkeypatch, capsys):
+    ingest("food.owl")
+    Term.objects.all().delete()
+
+    # marshal records written by another Python cannot be read
+    header = artifacts._snapshot_header()
+    monkeypatch.setattr(artifacts, "_snapshot_header", lambda: {**header, "python": [9, 99]})
+    ingest("food.owl", offline=True)
+    output = capsys.readouterr().out
+    assert "Using the cached snapshot" not in output
+    assert "Parsing ontology..." in output
+    assert Term.objects.count() == 8
+
+    ingest("food.owl", offline=True)
+    assert "Using the cached snapshot, skipping parsing." in capsys.readouterr().out
+
+
+@pytest.mark.django_db(transaction=True)
+def test_workers_ingest_files_in_parallel(ingest, capsys):
+    ingest("food.owl", "drink.owl", workers=2)
+    assert "with 2 workers" in capsys.readouterr().out
+    assert set(Ontology.objects.values_list("uri", flat=True)) == {FOOD_ONTOLOGY, DRINK_ONTOLOGY}
+
+    # the parent in the other file is linked once both are written
+    milkshake = Term.objects.get(label="milkshake")
+    ancestors = TermClosure.objects.filter(descendant=milkshake, depth__gt=0)
+    assert set(ancestors.values_list("ancestor__label", flat=True)) == {"beverage", "milk", "food"}
+
+
+def test_failed_files_are_reported_after_the_others(db, ingest):
+    with pytest.raises(CommandError, match="1 of 2 ontology files failed"):
+        ingest("food.owl", "missing.owl", workers=1)
+    assert Term.objects.count() == 8
+    assert TermSynonym.objects.filter(text="fromage").exists()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("stream", [True, False])
+def test_terms_are_written_once_under_one_owning_ontology(ingest, ontology_dir, capsys, stream):
+    text = (ontology_dir / "drink.owl").read_text()
+    header = '<owl:Ontology rdf:about="http://purl.obolibrary.org/obo/drink.owl">'
+    # a second header, first in the document but not by URI
+    extra = '<owl:Ontology rdf:about="http://purl.obolibrary.org/obo/drink/extra.owl"/>\n    '
+    (ontology_dir / "drinks.owl").write_text(text.replace(header, extra + header))
+
+    ingest("drinks.owl", stream=stream, sync=True)
+    assert "Sync summary: 2 new, 0 updated, 0 unchanged, 0 obsoleted" in capsys.readouterr().out
+    assert list(Ontology.objects.values_list("uri", flat=True)) == [DRINK_ONTOLOGY]
+    assert set(Term.objects.values_list("ontology", flat=True)) == {DRINK_ONTOLOGY}
+
+    ingest("drinks.owl", stream=stream, sync=True)
+    assert "Sync summary: 0 new, 0 updated, 2 unchanged, 0 obsoleted" in capsys.readouterr().out
+
+
+def test_unexpected_errors_are_reported_per_file_without_workers(db, ingest, ontology_dir):
+    (ontology_dir / "broken.owl").write_text("<rdf:RDF")
+    with pytest.raises(CommandError, match="1 of 2 ontology files failed: .*broken.owl"):
+        ingest("broken.owl", "food.owl", workers=1)
+    assert Term.objects.count() == 8
+
+
+def test_workers_must_be_positive(db, ingest):
+    with pytest.raises(CommandError, match="--workers must be a positive integer."):
+        ingest("food.owl", workers=0)
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+
+from apps.ontologies import search_index
+from apps.ontologies.generations import bump_generation, generation_token
+from apps.ontologies.search_index import SearchIndex, build_index, update_index
+from conftest import FOOD_ONTOLOGY, food_uri
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_builds_swap_in_whole_indexes(food, tmp_path):
+    path = tmp_path / "index" / "search.idx"
+    errors = []
+
+    def build():
+        try:
+            build_index(path)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    # ingest and the signals of every worker can rebuild at the same time
+    threads = [threading.Thread(target=build) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [entry.name for entry in path.parent.iterdir()] == ["search.idx"]
+    index = SearchIndex(path)
+    # aged cheese is obsolete
+    assert index.n_docs == 7
+    assert {match.uri for match in index.search("cheese")} == {food_uri(3), food_uri(4), food_uri(5)}
+
+
+@pytest.mark.django_db
+def test_update_skips_an_index_of_the_current_generation(food, tmp_path):
+    path = tmp_path / "search.idx"
+
+    assert update_index(path)[0] == 7
+    assert SearchIndex(path).generation == generation_token()
+    assert update_index(path) is None
+    assert update_index(path, force=True)[0] == 7
+
+    bump_generation(FOOD_ONTOLOGY)
+    assert update_index(path) is not None
+    assert SearchIndex(path).generation == generation_token()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_updates_build_once(food, tmp_path, monkeypatch):
+    path = tmp_path / "search.idx"
+    builds = []
+    build = search_index.build_index
+
+    def counted_build(path):
+        builds.append(path)
+        return build(path)
+
+    monkeypatch.setattr(search_index, "build_index", counted_build)
+
+    def update():
+        try:
+            update_index(path)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=update) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # the builders took turns and the later ones found the index current
+    assert builds == [path]
+
+
+def test_a_burst_of_edits_rebuilds_once(settings, monkeypatch):
+    settings.SEARCH_BACKEND = "memory"
+    settings.SEARCH_INDEX_REBUILD_DELAY = 0.2
+    updates = []
+    monkeypatch.setattr(search_index, "update_index", lambda: updates.append(time.monotonic()))
+
+    started = time.monotonic()
+    for _ in range(20):
+        search_index.schedule_rebuild()
+        time.sleep(0.01)
+    deadline = time.monotonic() + 5
+    while search_index._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert len(updates) == 1
+    assert updates[0] - started >= 0.2 + 0.19
@@ -0,0 +1,108 @@
+from django.contrib.postgres.search import SearchQuery
+
+from apps.ontologies.generations import generation_token
+from apps.ontologies.models import SEARCH_CONFIG, Ontology, Term, TermParent, TermSynonym
+from conftest import DRINK_ONTOLOGY, OBO, food_uri
+
+
+def matches(query):
+    search = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    return set(Term.objects.filter(search_vector=search).values_list("label", flat=True))
+
+
+def test_weight_edit_refreshes_scores_and_inherited_weights(food):
+    cheese = food["cheese"]
+    cheese.weight = 3.0
+    cheese.save()
+
+    scores = dict(Term.objects.values_list("label", "static_score"))
+    inherited = dict(Term.objects.values_list("label", "inherited_weight"))
+    assert scores["cheese"] == 3.0
+    assert scores["blue cheese"] == 1.0
+    # the part of the weight above 1, halved for every subClassOf step
+    assert inherited["blue cheese"] == 1.0
+    assert inherited["cheese"] == 0.0
+    assert inherited["yogurt"] == 0.0
+
+
+def test_ontology_weight_edit_refreshes_scores(food):
+    ontology = food["cheese"].ontology
+    ontology.weight = 2.0
+    ontology.save()
+    assert set(Term.objects.values_list("static_score", flat=True)) == {2.0}
+
+
+def test_synonym_edits_update_the_search_vector(food):
+    synonym = TermSynonym.objects.create(term=food["cheese"], text="formaggio", kind=TermSynonym.Kind.EXACT)
+    assert matches("formaggio") == {"cheese"}
+
+    synonym.delete()
+    assert matches("formaggio") == set()
+
+
+def test_label_edit_adds_a_label_synonym(food):
+    cheese = food["cheese"]
+    cheese.label = "hard cheese"
+    cheese.save()
+    assert cheese.synonyms.filter(kind=TermSynonym.Kind.LABEL, text="hard cheese", normalized="hard cheese").exists()
+    assert matches("hard") == {"hard cheese"}
+
+
+def test_subclassof_edit_rewrites_the_is_a_edges(food):
+    yogurt = food["yogurt"]
+    yogurt.subClassOf = [food_uri(6)]
+    yogurt.save()
+
+    edges = TermParent.objects.filter(child=yogurt)
+    assert set(edges.values_list("kind", "parent_uri")) == {
+        (TermParent.Kind.IS_A, food_uri(6)),
+        # restrictions are left alone
+        (TermParent.Kind.SOME, food_uri(6)),
+    }
+
+
+def test_edits_bump_the_generation_once_committed(food, django_capture_on_commit_callbacks):
+    before = generation_token()
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        food["apple"].save()
+    assert generation_token() == before
+
+    for callback in callbacks:
+        callback()
+    assert generation_token() != before
+
+
+def test_renamed_terms_stop_matching_their_old_label(food, api, admin_api, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = admin_api.put(f"/terms/{food['cheese'].pk}/", {"label": "queso"}, format="json")
+    assert response.status_code == 200, response.content
+    assert set(food["cheese"].synonyms.filter(kind=TermSynonym.Kind.LABEL).values_list("text", flat=True)) == {
+        "queso",
+        # the label in another language is kept
+        "fromage",
+    }
+
+    def lookup(query):
+        return [term["label"] for term in api.get("/lookup/", {"query": query}).json()]
+
+    assert lookup("cheese") == []
+    assert lookup("queso") == ["queso"]
+
+    results = api.get("/search/", {"query": "cheese"}).json()["results"]
+    assert food_uri(3) not in {term["uri"] for term in results}
+    assert matches("queso") == {"queso"}
+
+    response = admin_api.post("/annotate/", {"text": "cheese or queso"}, format="json")
+    assert [span["text"] for span in response.json()["annotations"]] == ["queso"]
+
+
+def test_ontology_delete_rescores_only_its_detached_terms(food):
+    drink = Ontology.objects.create(uri=DRINK_ONTOLOGY, label="Drink", weight=3.0)
+    beverage = Term.objects.create(uri=f"{OBO}DRINK_0000001", label="beverage", ontology=drink)
+    assert Term.objects.get(pk=beverage.pk).static_score == 3.0
+    # a stale score elsewhere shows which rows the refresh touched
+    Term.objects.filter(label="cheese").update(static_score=5.0)
+
+    drink.delete()
+    assert Term.objects.get(pk=beverage.pk).static_score == 1.0
+    assert Term.objects.get(label="cheese").static_score == 5.0
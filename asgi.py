@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.base")
+# serve /search/, /search/batch/ and /autocomplete/ with the async views
+os.environ.setdefault("ASYNC_VIEWS", "True")
+# the sync code of each request runs in a thread of its own, where persistent
+# connections would never be reused: pool them instead
+os.environ.setdefault("DB_POOL", "True")
 
 application = get_asgi_application()
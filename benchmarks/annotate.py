@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# flake8: noqa
+"""Measure /annotate/ throughput in MB of text per second.
+
+Sends a text (a file, or a synthetic recipe-like text of --size-mb) to a
+running server, as JSON or as a streamed text/plain body, and reports the
+throughput and the number of spans found.
+
+    python benchmarks/annotate.py --url http://localhost:8080 --user admin:secret --size-mb 20 --stream
+
+/annotate/ needs an authenticated user, sent with basic authentication.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import requests
+
+DEFAULT_WORDS = [
+    "the", "recipe", "calls", "for", "two", "cups", "of", "whole", "milk", "and",
+    "grated", "cheddar", "cheese", "with", "a", "pinch", "salt", "butter", "apple",
+    "chicken", "breast", "rice", "tomato", "sauce", "dairy", "product", "yogurt",
+]
+
+
+def synthetic_text(size, words, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(5, 20))) + ". "
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def annotate(url, auth, text, stream):
+    started = time.perf_counter()
+    if stream:
+        response = requests.post(
+            f"{url}/annotate/",
+            # the server reads the body chunk by chunk and streams spans back
+            data=text.encode(),
+            headers={"Content-Type": "text/plain; charset=utf-8"},
+            auth=auth,
+            stream=True,
+        )
+        response.raise_for_status()
+        spans = sum(1 for line in response.iter_lines() if line)
+    else:
+        response = requests.post(f"{url}/annotate/", json={"text": text}, auth=auth)
+        response.raise_for_status()
+        spans = len(response.json()["annotations"])
+    return time.perf_counter() - started, spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080", help="base URL of the API")
+    parser.add_argument("--user", required=True, help="USER:PASSWORD of an API user")
+    parser.add_argument("--file", default=None, help="text file to annotate (default: synthetic text)")
+    parser.add_argument("--size-mb", type=float, default=1.0, help="size of the synthetic text")
+    parser.add_argument("--stream", action="store_true", help="send text/plain and stream NDJSON back")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as source:
+            text = source.read()
+    else:
+        text = synthetic_text(int(args.size_mb * 1024 * 1024), DEFAULT_WORDS)
+    size_mb = len(text.encode()) / 1024 / 1024
+
+    auth = tuple(args.user.split(":", 1))
+    runs = [annotate(args.url, auth, text, args.stream) for _ in range(args.repeat)]
+    elapsed = statistics.median(seconds for seconds, _ in runs)
+
+    report = {
+        "mode": "stream" if args.stream else "json",
+        "size_mb": round(size_mb, 2),
+        "spans": runs[0][1],
+        "seconds": round(elapsed, 3),
+        "throughput_mb_s": round(size_mb / elapsed, 2),
+    }
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for key, value in report.items():
+            print(f"{key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# flake8: noqa
+"""Measure /autocomplete/ latency under concurrent typeahead traffic.
+
+Every client replays the keystrokes of a word ("c", "ch", "che"...) against a
+running server, and the script reports p50/p95/p99 latency and throughput.
+
+    python benchmarks/autocomplete.py --url http://localhost:8080 --clients 100
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_WORDS = ["cheese", "milk", "yogurt", "butter", "apple", "chicken", "rice", "tomato"]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def run_client(url, words, rounds, path):
+    session = requests.Session()
+    latencies = []
+    errors = 0
+    for _ in range(rounds):
+        for word in words:
+            for end in range(1, len(word) + 1):
+                started = time.perf_counter()
+                try:
+                    response = session.get(f"{url}{path}", params={"query": word[:end]})
+                    response.raise_for_status()
+                except requests.RequestException:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080", help="base URL of the API")
+    parser.add_argument("--path", default="/autocomplete/", help="endpoint to benchmark")
+    parser.add_argument("--clients", type=int, default=100, help="concurrent clients")
+    parser.add_argument("--rounds", type=int, default=3, help="times each client replays the word list")
+    parser.add_argument("--words", nargs="+", default=DEFAULT_WORDS, help="words to type")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(
+            pool.map(
+                lambda _: run_client(args.url, args.words, args.rounds, args.path),
+                range(args.clients),
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for client, _ in results for latency in client]
+    errors = sum(errors for _, errors in results)
+    if not latencies:
+        raise SystemExit("No successful requests, is the server running?")
+
+    report = {
+        "endpoint": args.path,
+        "clients": args.clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for key, value in report.items():
+            print(f"{key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# flake8: noqa
+"""Compare the sync (WSGI) and async (ASGI) servers under many concurrent clients.
+
+Every client keeps a connection open and sends search requests one after the
+other for --duration seconds; the script reports throughput, latency
+percentiles and the status codes (503: no slot freed up, 504: timed out).
+The clients are coroutines, so 500 of them fit in this one process.
+
+With --compare, the script starts ``gunicorn wsgi`` (sync workers) and then
+``gunicorn -k uvicorn_worker.UvicornWorker asgi`` (async views) with the same
+--workers and the settings of the environment, and loads each in turn:
+
+    DJANGO_SETTINGS_MODULE=settings.local python benchmarks/load.py --compare --clients 500 --workers 4
+
+Without it, load a server that is already running with --url. Disable the
+search cache (SEARCH_CACHE_TIMEOUT=0) to measure the database path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+REPO = Path(__file__).resolve().parent.parent
+DEFAULT_WORDS = ["cheese", "milk", "yogurt", "butter", "apple", "chicken", "rice", "tomato", "bread", "wine"]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; return its status and whether the server closes the connection."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    version, status = status_line.split()[:2]
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.read()
+        return int(status), True
+    closes = headers.get("connection") == "close" or version == b"HTTP/1.0"
+    return int(status), closes
+
+
+async def client(url, args, deadline, latencies, statuses, seed):
+    parts = urlsplit(url)
+    rng = random.Random(seed)
+    connection = None
+    while time.monotonic() < deadline:
+        params = {"query": rng.choice(args.words), "limit": args.limit}
+        request = f"GET {parts.path.rstrip('/')}{args.path}?{urlencode(params)} HTTP/1.1\r\nHost: {parts.netloc}\r\n\r\n"
+        started = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            reader, writer = connection
+            writer.write(request.encode())
+            status, closes = await asyncio.wait_for(read_response(reader), args.timeout)
+        except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            statuses["error"] += 1
+            closes = True
+        else:
+            statuses[status] += 1
+            if status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+        if closes and connection is not None:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def load(url, args):
+    latencies = []
+    statuses = Counter()
+    started = time.monotonic()
+    deadline = started + args.duration
+    await asyncio.gather(
+        *(client(url, args, deadline, latencies, statuses, seed) for seed in range(args.clients))
+    )
+    elapsed = time.monotonic() - started
+    report = {
+        "clients": args.clients,
+        "requests": sum(statuses.values()),
+        "ok": len(latencies),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+    }
+    if latencies:
+        report.update({
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(max(latencies), 2),
+        })
+    return report
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(kind, workers, port):
+    command = [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--bind", f"127.0.0.1:{port}"]
+    # keep the 500 queued clients of the sync server from timing its workers out
+    command += ["--timeout", "120", "--backlog", "4096"]
+    if kind == "async":
+        command += ["-k", "uvicorn_worker.UvicornWorker", "asgi"]
+    else:
+        command += ["wsgi"]
+    env = {**os.environ, "ASYNC_VIEWS": str(kind == "async")}
+    server = subprocess.Popen(command, cwd=REPO, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"The {kind} server did not start.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080", help="base URL of a running server")
+    parser.add_argument("--compare", action="store_true", help="start a sync and an async server and load both")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes of each server, with --compare")
+    parser.add_argument("--path", default="/search/", help="endpoint to load")
+    parser.add_argument("--clients", type=int, default=500, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds a client waits for a response")
+    parser.add_argument("--limit", type=int, default=20, help="results per search")
+    parser.add_argument("--words", nargs="+", default=DEFAULT_WORDS, help="queries to send")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    reports = {}
+    if args.compare:
+        for kind in ("sync", "async"):
+            port = free_port()
+            server = serve(kind, args.workers, port)
+            try:
+                print(f"Loading the {kind} server with {args.clients} clients...", file=sys.stderr)
+                reports[kind] = asyncio.run(load(f"http://127.0.0.1:{port}", args))
+            finally:
+                server.terminate()
+                server.wait()
+    else:
+        reports[args.url] = asyncio.run(load(args.url, args))
+
+    if args.json:
+        print(json.dumps(reports))
+        return
+    for name, report in reports.items():
+        print(name)
+        for key, value in report.items():
+            print(f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# flake8: noqa
+"""Compare the cost of serializing term results, per 1,000 results.
+
+Runs against the configured database, on the first --count terms:
+
+- serializer: TermSerializer on model instances, one ontology query per row
+- select_related: TermSerializer with the ontology joined in
+- values: values() rows shaped by serialize_terms (the search/list path)
+- values_compact: the same with compact=true
+
+    DJANGO_SETTINGS_MODULE=settings.local python benchmarks/serialization.py --count 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.local")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from apps.api import serializers
+from apps.ontologies.models import Term
+
+
+def serializer(count):
+    return serializers.TermSerializer(Term.objects.all()[:count], many=True).data
+
+
+def select_related(count):
+    terms = Term.objects.select_related("ontology")[:count]
+    return serializers.TermSerializer(terms, many=True).data
+
+
+def values(count, compact=False):
+    fields = serializers.TERM_FIELDS
+    rows = Term.objects.values(*serializers.term_columns(fields))[:count]
+    results, ontologies = serializers.serialize_terms(rows, fields, compact)
+    return {"ontologies": ontologies, "results": results} if compact else results
+
+
+STRATEGIES = {
+    "serializer": serializer,
+    "select_related": select_related,
+    "values": values,
+    "values_compact": lambda count: values(count, compact=True),
+}
+
+
+def measure(strategy, count, repeat):
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            data = strategy(count)
+            body = JSONRenderer().render(data)
+            timings.append(time.perf_counter() - started)
+    return timings, len(queries), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000, help="results serialized per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per strategy")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    count = min(args.count, Term.objects.count())
+    if not count:
+        raise SystemExit("No terms in the database, ingest an ontology first.")
+
+    report = {"results": count, "strategies": {}}
+    for name, strategy in STRATEGIES.items():
+        timings, queries, size = measure(strategy, count, args.repeat)
+        report["strategies"][name] = {
+            "ms_per_1000": round(statistics.median(timings) * 1000 * 1000 / count, 2),
+            "queries": queries,
+            "bytes": size,
+        }
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"{count} results, median of {args.repeat} runs")
+        for name, result in report["strategies"].items():
+            print(
+                f"{name:>15}: {result['ms_per_1000']:>9} ms/1000 results"
+                f" {result['queries']:>6} queries {result['bytes']:>10} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# flake8: noqa
+"""Report the on-disk size of the term tables and the latency of hierarchy queries.
+
+Runs against the configured database (ingest FoodOn, or any ontology,
+first) so the storage layout of two revisions can be compared:
+
+- sizes: heap, index and total size of the term, closure and synonym tables
+- queries: median latency of the hierarchy endpoints and of a subtree
+  search, on --samples terms picked at random
+- rebuild: with --rebuild, the time taken by rebuild_closure() and
+  refresh_inherited_weights()
+
+Sizes include dead tuples, run VACUUM FULL on a database that has been
+rebuilt before comparing them.
+
+    DJANGO_SETTINGS_MODULE=settings.local python benchmarks/storage.py --samples 200 --rebuild
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.local")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from apps.api import views
+from apps.ontologies.hierarchy import rebuild_closure, refresh_inherited_weights
+from apps.ontologies.models import Term, TermClosure, TermSynonym
+
+factory = APIRequestFactory()
+
+ENDPOINTS = {
+    "ancestors": (views.TermAncestorsView, lambda uris: {"uri": uris[0]}),
+    "descendants": (views.TermDescendantsView, lambda uris: {"uri": uris[0], "limit": 100}),
+    "depth": (views.TermDepthView, lambda uris: {"uri": uris[0]}),
+    "lca": (views.LowestCommonAncestorView, lambda uris: {"uri": uris[:2]}),
+    "subtree_search": (views.SearchView, lambda uris: {"query": "term", "subtree": uris[0]}),
+}
+
+
+def table_sizes():
+    sizes = {}
+    with connection.cursor() as cursor:
+        for model in (Term, TermClosure, TermSynonym):
+            table = model._meta.db_table
+            cursor.execute(
+                "SELECT pg_table_size(%s), pg_indexes_size(%s), pg_total_relation_size(%s),"
+                " (SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass)",
+                [table] * 4,
+            )
+            heap, indexes, total, rows = cursor.fetchone()
+            sizes[table] = {"rows": rows, "table_mb": mb(heap), "indexes_mb": mb(indexes), "total_mb": mb(total)}
+    return sizes
+
+
+def mb(size):
+    return round(size / 1024 / 1024, 1)
+
+
+def query_latencies(samples, seed=0):
+    uris = list(Term.objects.order_by("uri").values_list("uri", flat=True))
+    rng = random.Random(seed)
+    picks = [rng.sample(uris, 2) for _ in range(samples)]
+
+    latencies = {}
+    for name, (view, params) in ENDPOINTS.items():
+        handler = view.as_view()
+        timings = []
+        for pair in picks:
+            request = factory.get("/", params(pair))
+            started = time.perf_counter()
+            response = handler(request)
+            response.render()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        latencies[name] = {
+            "p50_ms": round(statistics.median(timings) * 1000, 2),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 2),
+        }
+    return latencies
+
+
+def rebuild_timings():
+    started = time.perf_counter()
+    rows, depth = rebuild_closure()
+    closure = time.perf_counter() - started
+    started = time.perf_counter()
+    refresh_inherited_weights()
+    weights = time.perf_counter() - started
+    return {"closure_rows": rows, "closure_depth": depth, "closure_s": round(closure, 2), "weights_s": round(weights, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200, help="terms queried per endpoint")
+    parser.add_argument("--rebuild", action="store_true", help="also time a closure and weight rebuild")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if Term.objects.count() < 2:
+        raise SystemExit("No terms in the database, ingest an ontology first.")
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    report = {"sizes": table_sizes(), "queries": query_latencies(args.samples)}
+    # last: a rebuild leaves the replaced closure rows as dead tuples
+    if args.rebuild:
+        report["rebuild"] = rebuild_timings()
+
+    if args.json:
+        print(json.dumps(report))
+        return
+    for table, size in report["sizes"].items():
+        print(
+            f"{table:>28}: {size['rows']:>10} rows {size['table_mb']:>9} MB table"
+            f" {size['indexes_mb']:>9} MB indexes {size['total_mb']:>9} MB total"
+        )
+    for name, latency in report["queries"].items():
+        print(f"{name:>28}: p50 {latency['p50_ms']:>8} ms  p95 {latency['p95_ms']:>8} ms")
+    for key, value in report.get("rebuild", {}).items():
+        print(f"{key:>28}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# flake8: noqa
+"""Benchmark ingest and search on a synthetic ontology, in a scratch database.
+
+Generates an ontology with synthetic_owl.py (cached in --workdir), ingests it
+into ``test_<database>``, created from the migrations and dropped at the end
+like the test database, and reports:
+
+- ingest: seconds and peak resident memory of every stage of ``ingest``
+  (download, parse, write_terms, link_parents, closure, inherited_weights,
+  static_scores, search_index), the peak being the high-water mark of the
+  process once the stage is done
+- search: p50/p95/p99 latency and throughput of /search/ at --concurrency,
+  through the WSGI handler and with the result cache disabled
+- lookup: p50/p99 latency of sequential /lookup/ requests by URI, a single
+  index lookup where opening the database connection shows (run it with
+  DB_CONN_MAX_AGE=0, then with DB_POOL=True, to see what reusing them saves)
+- export: seconds, throughput and size of /terms/export/ in every format,
+  and the peak of Python allocations while streaming NDJSON, which should
+  not grow with --classes
+- database: size of the scratch database once loaded
+
+Nothing is downloaded, the ontology is served from a local HTTP server.
+Search runs in this process, so throughput is bounded by one Python process;
+use autocomplete.py-style load against a deployed server for capacity
+planning. With --output the report is saved as JSON, which --baseline
+compares against, to spot regressions between two commits:
+
+    DJANGO_SETTINGS_MODULE=settings.local python benchmarks/suite.py --classes 100000 --output before.json
+    git checkout my-branch
+    DJANGO_SETTINGS_MODULE=settings.local python benchmarks/suite.py --classes 100000 --baseline before.json
+"""
+import argparse
+import contextlib
+import datetime
+import functools
+import http.server
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.local")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from apps.ontologies import export
+from apps.ontologies.models import Term
+from apps.ontologies.management.commands.ingest import finish_ingest, ingest_url
+from synthetic_owl import class_uri, sample_queries, write_ontology
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(dirty)
+
+
+def ontology_file(workdir, classes, depth, seed):
+    path = workdir / f"synthetic-{classes}-{depth}-{seed}.owl"
+    if not path.exists():
+        print(f"Generating {classes} classes into {path}...", file=sys.stderr)
+        partial = path.with_suffix(".part")
+        with open(partial, "w", encoding="utf-8") as output:
+            write_ontology(output, classes, depth, seed=seed)
+        os.replace(partial, path)
+    return path
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve(directory):
+    """Serve ``directory`` on a free local port, yield its base URL."""
+    handler = functools.partial(QuietHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run_ingest(url, args):
+    options = {
+        "format": "application/rdf+xml",
+        "batch_size": args.batch_size,
+        "stream": args.stream,
+        "max_memory": None,
+        "sync": False,
+        "cache_dir": None,
+        "no_cache": True,
+        "offline": False,
+    }
+    log = sys.stderr if args.verbose else io.StringIO()
+    started = time.monotonic()
+    with contextlib.redirect_stdout(log):
+        result = ingest_url(url, options)
+        stages = {**result["stages"], **finish_ingest(set(result["ontologies"]))}
+    return {
+        "terms": result["stats"].get("processed", 0),
+        "seconds": round(time.monotonic() - started, 3),
+        "stages": stages,
+    }
+
+
+def run_search(args):
+    queries = sample_queries(args.queries, seed=args.seed)
+
+    def client(number):
+        session = Client()
+        latencies = []
+        errors = 0
+        try:
+            for request in range(args.requests // args.concurrency):
+                query = queries[(number + request * args.concurrency) % len(queries)]
+                started = time.perf_counter()
+                response = session.get("/search/", {"query": query, "limit": args.limit})
+                # the test client keeps its connection, a server closes it per DB_CONN_MAX_AGE
+                close_old_connections()
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code != 200
+        finally:
+            # every thread has its own connection
+            connections.close_all()
+        return latencies, errors
+
+    # one pass over the queries first, so that every run starts from warm buffers
+    warmup = Client()
+    for query in queries:
+        warmup.get("/search/", {"query": query, "limit": args.limit})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(client, range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+    return {
+        "backend": settings.SEARCH_BACKEND,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def run_lookup(args):
+    session = Client()
+    latencies = []
+    for request in range(args.requests // 4):
+        started = time.perf_counter()
+        session.get("/lookup/", {"query": class_uri(request % args.classes)})
+        close_old_connections()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def run_export(args):
+    """Stream /terms/export/ in every format; the peak is traced on a second NDJSON pass."""
+    session = Client()
+    terms = Term.objects.count()
+    report = {}
+    for format in export.FORMATS:
+        started = time.perf_counter()
+        response = session.get("/terms/export/", {"format": format})
+        size = sum(len(chunk) for chunk in response.streaming_content)
+        response.close()
+        elapsed = time.perf_counter() - started
+        report[format] = {
+            "seconds": round(elapsed, 3),
+            "terms_per_s": round(terms / elapsed),
+            "size_mb": round(size / 1024 / 1024, 1),
+        }
+    tracemalloc.start()
+    response = session.get("/terms/export/")
+    for _ in response.streaming_content:
+        pass
+    response.close()
+    report["ndjson"]["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    tracemalloc.stop()
+    return report
+
+
+def database_size():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_database_size(current_database()), current_setting('server_version')")
+        size, version = cursor.fetchone()
+    return round(size / 1024 / 1024, 1), version
+
+
+def run(args):
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    path = ontology_file(workdir, args.classes, args.depth, args.seed)
+
+    commit, dirty = git_revision()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "classes": args.classes,
+            "depth": args.depth,
+            "seed": args.seed,
+            "db_pool": settings.DB_POOL,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "prepared_statements": settings.DB_PREPARED_STATEMENTS,
+        },
+    }
+
+    database = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        # the memory backend must not replace the index of the real database
+        with override_settings(
+            SEARCH_INDEX_PATH=str(workdir / "search.idx"),
+            SEARCH_CACHE_TIMEOUT=args.cache_timeout,
+            ALLOWED_HOSTS=["testserver"],
+        ):
+            print("Ingesting...", file=sys.stderr)
+            with serve(workdir) as base_url:
+                report["ingest"] = run_ingest(f"{base_url}/{path.name}", args)
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM ANALYZE")
+            report["database_mb"], report["meta"]["postgres"] = database_size()
+            print(f"Searching with {args.concurrency} clients...", file=sys.stderr)
+            report["search"] = run_search(args)
+            report["lookup"] = run_lookup(args)
+            print("Exporting...", file=sys.stderr)
+            report["export"] = run_export(args)
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(database, verbosity=0, keepdb=args.keep_db)
+    return report
+
+
+def flatten(report, prefix=""):
+    values = {}
+    for key, value in report.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def compare(report, baseline):
+    """Print every metric next to its baseline value, with the ratio."""
+    current = flatten({key: value for key, value in report.items() if key != "meta"})
+    previous = flatten({key: value for key, value in baseline.items() if key != "meta"})
+    print(f"baseline {baseline['meta'].get('commit')} -> current {report['meta'].get('commit')}")
+    for key in ("db_pool", "conn_max_age", "prepared_statements"):
+        if baseline["meta"].get(key) != report["meta"].get(key):
+            print(f"{key:>48}: {baseline['meta'].get(key)} -> {report['meta'].get(key)}")
+    for key, value in current.items():
+        if key not in previous:
+            print(f"{key:>48}: {value} (new)")
+            continue
+        ratio = f"x{value / previous[key]:.2f}" if previous[key] else ""
+        print(f"{key:>48}: {previous[key]:>10} -> {value:>10} {ratio}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=10_000, help="classes in the synthetic ontology (10k to 2M)")
+    parser.add_argument("--depth", type=int, default=8, help="approximate depth of its class tree")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the ontology and of the queries")
+    parser.add_argument("--workdir", default=str(Path(tempfile.gettempdir()) / "ontology-benchmarks"), help="where generated ontologies are kept")
+    parser.add_argument("--batch-size", type=int, default=5000, help="ingest --batch-size")
+    parser.add_argument("--stream", action="store_true", help="ingest with --stream")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent search clients")
+    parser.add_argument("--requests", type=int, default=2000, help="search requests in total")
+    parser.add_argument("--queries", type=int, default=200, help="distinct search queries")
+    parser.add_argument("--limit", type=int, default=20, help="results per search")
+    parser.add_argument("--cache-timeout", type=int, default=0, help="SEARCH_CACHE_TIMEOUT during the run (0 disables the cache)")
+    parser.add_argument("--keep-db", action="store_true", help="keep the scratch database")
+    parser.add_argument("--verbose", action="store_true", help="show the ingest output")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--baseline", help="compare with a report written by --output")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(report))
+    elif args.baseline:
+        compare(report, json.loads(Path(args.baseline).read_text()))
+    else:
+        for key, value in flatten(report).items():
+            print(f"{key:>48}: {value}")
+
+
+if __name__ == "__main__":
+    main()
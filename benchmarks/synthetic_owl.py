@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# flake8: noqa
+"""Generate a synthetic OWL ontology (RDF/XML) of a given size and depth.
+
+The classes form a tree of about --depth levels, with a fraction of them
+given a second parent and an ``RO_0001000 some`` restriction. Labels,
+definitions and synonyms are drawn from a pseudo-word vocabulary with
+Zipf-distributed frequencies, so some words match a large share of the terms
+and others a handful, like the words of a real ontology. The output only
+depends on the arguments and --seed.
+
+    python benchmarks/synthetic_owl.py --classes 100000 --depth 8 --output synthetic.owl
+"""
+import argparse
+import itertools
+import math
+import random
+from xml.sax.saxutils import escape
+
+OBO = "http://purl.obolibrary.org/obo/"
+ONTOLOGY_URI = f"{OBO}synth.owl"
+RELATION = f"{OBO}RO_0001000"
+
+SYLLABLES = [
+    "ba", "ca", "da", "fe", "go", "ha", "ki", "lo", "ma", "ne", "po", "ra",
+    "si", "ta", "vu", "xe", "yo", "ze", "bri", "cla", "dro", "fli", "gru", "ple",
+]
+
+HEADER = """<?xml version="1.0"?>
+<rdf:RDF xmlns:obo="http://purl.obolibrary.org/obo/"
+     xmlns:owl="http://www.w3.org/2002/07/owl#"
+     xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+     xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"
+     xmlns:dcterms="http://purl.org/dc/terms/"
+     xmlns:oboInOwl="http://www.geneontology.org/formats/oboInOwl#">
+    <owl:Ontology rdf:about="{uri}">
+        <dcterms:title xml:lang="en">{title}</dcterms:title>
+    </owl:Ontology>
+"""
+
+
+def class_uri(index):
+    return f"{OBO}SYNTH_{index:07d}"
+
+
+def vocabulary(size):
+    """``size`` distinct pseudo-words of two to four syllables, in a fixed order."""
+    words = []
+    for length in (2, 3, 4):
+        for syllables in itertools.product(SYLLABLES, repeat=length):
+            words.append("".join(syllables))
+            if len(words) == size:
+                return words
+    raise ValueError(f"Cannot make {size} distinct words.")
+
+
+class Words:
+    """Draw words from ``vocabulary`` with Zipf frequencies (the n-th word is n times rarer than the first)."""
+
+    def __init__(self, words, rng):
+        self.words = words
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    def sample(self, count):
+        return self.rng.choices(self.words, cum_weights=self.cumulative, k=count)
+
+
+def branching(classes, depth):
+    """Children per class for a complete tree of ``classes`` nodes about ``depth`` levels deep."""
+    return max(2, math.ceil(classes ** (1 / max(depth, 1))))
+
+
+def write_ontology(output, classes, depth, seed=0, vocabulary_size=5000, extra_parents=0.05, restrictions=0.05, synonyms=0.3):
+    """Write the ontology to the text file ``output``; returns the number of classes."""
+    rng = random.Random(seed)
+    words = Words(vocabulary(vocabulary_size), rng)
+    fanout = branching(classes, depth)
+
+    output.write(HEADER.format(uri=ONTOLOGY_URI, title=f"Synthetic ontology ({classes} classes)"))
+    for index in range(classes):
+        lines = [f'    <owl:Class rdf:about="{class_uri(index)}">']
+        if index:
+            parent = (index - 1) // fanout
+            lines.append(f'        <rdfs:subClassOf rdf:resource="{class_uri(parent)}"/>')
+            if rng.random() < extra_parents:
+                # any earlier class keeps the graph acyclic
+                other = rng.randrange(index)
+                if other != parent:
+                    lines.append(f'        <rdfs:subClassOf rdf:resource="{class_uri(other)}"/>')
+            if rng.random() < restrictions:
+                lines += [
+                    "        <rdfs:subClassOf>",
+                    "            <owl:Restriction>",
+                    f'                <owl:onProperty rdf:resource="{RELATION}"/>',
+                    f'                <owl:someValuesFrom rdf:resource="{class_uri(rng.randrange(classes))}"/>',
+                    "            </owl:Restriction>",
+                    "        </rdfs:subClassOf>",
+                ]
+        label = " ".join(words.sample(rng.randint(1, 3)))
+        definition = " ".join(words.sample(rng.randint(6, 16)))
+        lines.append(f'        <rdfs:label xml:lang="en">{escape(label)}</rdfs:label>')
+        lines.append(f"        <obo:IAO_0000115>{escape(definition.capitalize())}.</obo:IAO_0000115>")
+        if rng.random() < synonyms:
+            synonym = " ".join(words.sample(rng.randint(1, 3)))
+            lines.append(f"        <oboInOwl:hasExactSynonym>{escape(synonym)}</oboInOwl:hasExactSynonym>")
+            lines.append(f"        <oboInOwl:hasDbXref>SYN:{index}</oboInOwl:hasDbXref>")
+        lines.append("    </owl:Class>\n")
+        output.write("\n".join(lines))
+    output.write("</rdf:RDF>\n")
+    return classes
+
+
+def sample_queries(count, seed=0, vocabulary_size=5000):
+    """Search queries over the vocabulary: mostly one word, some two words, frequent and rare ones alike."""
+    rng = random.Random(seed)
+    words = vocabulary(vocabulary_size)
+    queries = []
+    for _ in range(count):
+        # log-uniform ranks, from words in most labels to words in a few
+        ranks = [int(math.exp(rng.uniform(0, math.log(vocabulary_size)))) for _ in range(rng.choice((1, 1, 1, 2)))]
+        queries.append(" ".join(words[rank - 1] for rank in ranks))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=100_000, help="number of classes")
+    parser.add_argument("--depth", type=int, default=8, help="approximate depth of the class tree")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", default="synthetic.owl", help="file to write")
+    args = parser.parse_args()
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        write_ontology(output, args.classes, args.depth, seed=args.seed)
+    print(f"Wrote {args.classes} classes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Fixtures shared by the tests of every app.
+
+The tests run against Postgres, in the test database of pytest-django: the
+search vector trigger, the closure and the trigram lookups all need it.
+Ontologies are ingested from ``apps/ontologies/tests/data`` over a local
+HTTP server, the way ``ingest`` fetches them in production.
+"""
+
+import functools
+import http.server
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+DATA_DIR = Path(__file__).resolve().parent / "apps" / "ontologies" / "tests" / "data"
+OBO = "http://purl.obolibrary.org/obo/"
+FOOD_ONTOLOGY = f"{OBO}food.owl"
+DRINK_ONTOLOGY = f"{OBO}drink.owl"
+
+
+def food_uri(number):
+    return f"{OBO}FOOD_{number:07d}"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(django_db_blocker):
+    # generations, the ontology list and the prefixes would outlive the rolled back rows;
+    # the cache is a table of the test database (settings.local)
+    with django_db_blocker.unblock():
+        cache.clear()
+    yield
+    with django_db_blocker.unblock():
+        cache.clear()
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def ontology_dir(tmp_path):
+    """A copy of the test ontologies, which a test may edit to publish a new release."""
+    directory = tmp_path / "www"
+    shutil.copytree(DATA_DIR, directory)
+    return directory
+
+
+@pytest.fixture
+def ontology_server(ontology_dir):
+    """Base URL of a local HTTP server serving ``ontology_dir``."""
+    handler = functools.partial(QuietHandler, directory=str(ontology_dir))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def ingest(ontology_server, cache_dir):
+    """Run the ingest command on files of ``ontology_dir``, with a cache of its own."""
+
+    def run(*names, **options):
+        urls = [f"{ontology_server}/{name}" for name in names]
+        options.setdefault("cache_dir", str(cache_dir))
+        call_command("ingest", *urls, **options)
+
+    return run
+
+
+@pytest.fixture
+def food(db, ingest):
+    """The terms of ``food.owl``, by label."""
+    from apps.ontologies.models import Term
+
+    ingest("food.owl")
+    return {term.label: term for term in Term.objects.select_related("ontology")}
+
+
+@pytest.fixture
+def api():
+    return APIClient()
+
+
+@pytest.fixture
+def admin_api(admin_user):
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    return client
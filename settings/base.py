@@ -12,6 +12,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 THIRD_PARTY_APPS = [
     "rest_framework",
@@ -25,6 +26,8 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    # first, so that it times the whole request
+    "apps.api.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -81,6 +84,93 @@ USE_TZ = True
 USE_THOUSAND_SEPARATOR = True
 THOUSAND_SEPARATOR = " "
 
+# Ingest: downloaded ontologies and their parsed snapshots
+ONTOLOGY_CACHE_DIR = os.environ.get("ONTOLOGY_CACHE_DIR", str(BASE_DIR / "cache" / "ontologies"))
+ONTOLOGY_CACHE_MAX_MB = int(os.environ.get("ONTOLOGY_CACHE_MAX_MB", "4096"))
+
+# Search
+SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_PAGE_SIZE = int(os.environ.get("SEARCH_MAX_PAGE_SIZE", "100"))
+SEARCH_CACHE_TIMEOUT = int(os.environ.get("SEARCH_CACHE_TIMEOUT", "300"))  # seconds
+# "postgres", or "memory" to answer plain queries from a memory-mapped index
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "postgres")
+SEARCH_BATCH_LIMIT = int(os.environ.get("SEARCH_BATCH_LIMIT", "5"))  # default top-k per query
+SEARCH_BATCH_MAX_QUERIES = int(os.environ.get("SEARCH_BATCH_MAX_QUERIES", "50000"))
+SEARCH_BATCH_CHUNK_SIZE = int(os.environ.get("SEARCH_BATCH_CHUNK_SIZE", "500"))  # queries per SQL statement
+SEARCH_BATCH_THROTTLE_RATE = os.environ.get("SEARCH_BATCH_THROTTLE_RATE", "30/min")  # batches per user, DRF rate syntax
+SEARCH_INDEX_PATH = os.environ.get("SEARCH_INDEX_PATH", str(BASE_DIR / "cache" / "search.idx"))
+SEARCH_INDEX_REBUILD_DELAY = float(os.environ.get("SEARCH_INDEX_REBUILD_DELAY", "5"))  # seconds without edits before the memory index is rebuilt
+# Boost that descendants inherit from weighted or favorite ancestors
+HIERARCHY_FAVORITE_BOOST = float(os.environ.get("HIERARCHY_FAVORITE_BOOST", "1.0"))
+HIERARCHY_BOOST_DECAY = float(os.environ.get("HIERARCHY_BOOST_DECAY", "0.5"))  # per subClassOf step
+HIERARCHY_UNDER_BOOST = float(os.environ.get("HIERARCHY_UNDER_BOOST", "2.0"))  # for search ?under=
+HIERARCHY_MAX_RESULTS = int(os.environ.get("HIERARCHY_MAX_RESULTS", "1000"))
+HIERARCHY_EMBED_MAX_CHILDREN = int(os.environ.get("HIERARCHY_EMBED_MAX_CHILDREN", "100"))  # per term, ?embed=children
+AUTOCOMPLETE_LIMIT = int(os.environ.get("AUTOCOMPLETE_LIMIT", "10"))
+AUTOCOMPLETE_MAX_LIMIT = int(os.environ.get("AUTOCOMPLETE_MAX_LIMIT", "50"))
+LOOKUP_MAX_RESULTS = int(os.environ.get("LOOKUP_MAX_RESULTS", "100"))
+ANNOTATE_MIN_LABEL_LENGTH = int(os.environ.get("ANNOTATE_MIN_LABEL_LENGTH", "3"))  # shorter labels are not matched
+ANNOTATE_MAX_CHARS = int(os.environ.get("ANNOTATE_MAX_CHARS", "1000000"))  # JSON requests, text/plain ones are capped by ANNOTATE_MAX_BYTES
+ANNOTATE_CHUNK_SIZE = int(os.environ.get("ANNOTATE_CHUNK_SIZE", "65536"))  # bytes scanned at a time when streaming
+ANNOTATE_SPOOL_SIZE = int(os.environ.get("ANNOTATE_SPOOL_SIZE", str(8 * 1024 * 1024)))  # streamed bodies past this go to disk
+ANNOTATE_MAX_BYTES = int(os.environ.get("ANNOTATE_MAX_BYTES", str(256 * 1024 * 1024)))  # larger text/plain bodies get a 413
+ANNOTATE_THROTTLE_RATE = os.environ.get("ANNOTATE_THROTTLE_RATE", "60/min")  # requests per user, DRF rate syntax
+# seconds a browser or shared cache reuses /terms/, /ontologies/ and /search/ before revalidating its ETag
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", "60"))
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))  # terms fetched and written at a time by exports
+EXPORT_WATERMARK_LAG = int(os.environ.get("EXPORT_WATERMARK_LAG", "600"))  # seconds before updated_since exported again, longer than any write transaction
+
+# Instrumentation, see apps.api.instrumentation
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "True") == "True"
+SLOW_QUERY_MS = int(os.environ.get("SLOW_QUERY_MS", "0"))  # EXPLAIN ANALYZE slower search statements, 0 disables
+INGEST_METRICS_FILE = os.environ.get("INGEST_METRICS_FILE", "")  # Prometheus textfile written by ingest
+
+# Database connections, used by the DATABASES of settings.local and settings.dev
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", "60"))  # seconds a connection is reused, 0 closes it per request
+DB_CONN_HEALTH_CHECKS = os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True"  # check a reused connection first
+DB_POOL = os.environ.get("DB_POOL", "False") == "True"  # psycopg pool per worker process instead of CONN_MAX_AGE
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))  # seconds waiting for a connection
+DB_POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", "600"))  # seconds before an idle extra connection is closed
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "False") == "True"  # behind PgBouncer in transaction mode
+# prepare the search statements of the sync views, see apps.api.prepared (PgBouncer needs 1.21+)
+DB_PREPARED_STATEMENTS = os.environ.get("DB_PREPARED_STATEMENTS", str(not DB_PGBOUNCER)) == "True"
+DB_PREPARE_THRESHOLD = int(os.environ.get("DB_PREPARE_THRESHOLD", "2"))  # runs on a connection before it is prepared
+
+DATABASE_OPTIONS = {}
+if DB_POOL:
+    DATABASE_OPTIONS["pool"] = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "timeout": DB_POOL_TIMEOUT,
+        "max_idle": DB_POOL_MAX_IDLE,
+    }
+if DB_PREPARED_STATEMENTS:
+    # only the server-side bound cursors of apps.api.prepared prepare statements
+    DATABASE_OPTIONS["prepare_threshold"] = DB_PREPARE_THRESHOLD
+    # a generic plan ignores the words searched: keep planning, skip parsing
+    DATABASE_OPTIONS["options"] = "-c plan_cache_mode=force_custom_plan"
+DATABASE_CONNECTION = {
+    # Django's pool replaces persistent connections
+    "CONN_MAX_AGE": 0 if DB_POOL else DB_CONN_MAX_AGE,
+    "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+    # named cursors do not survive transaction pooling
+    "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
+}
+
+# Async views (ASGI), see apps.api.async_db
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "False") == "True"  # asgi.py turns them on
+ASYNC_DB_POOL_MIN_SIZE = int(os.environ.get("ASYNC_DB_POOL_MIN_SIZE", "2"))  # connections per worker
+ASYNC_DB_POOL_MAX_SIZE = int(os.environ.get("ASYNC_DB_POOL_MAX_SIZE", "20"))
+ASYNC_QUEUE_TIMEOUT = float(os.environ.get("ASYNC_QUEUE_TIMEOUT", "5"))  # seconds waiting for a slot before a 503
+ASYNC_SEARCH_CONCURRENCY = int(os.environ.get("ASYNC_SEARCH_CONCURRENCY", "16"))  # slots per worker
+ASYNC_SEARCH_TIMEOUT = float(os.environ.get("ASYNC_SEARCH_TIMEOUT", "10"))  # seconds before a 504
+ASYNC_AUTOCOMPLETE_CONCURRENCY = int(os.environ.get("ASYNC_AUTOCOMPLETE_CONCURRENCY", "16"))
+ASYNC_AUTOCOMPLETE_TIMEOUT = float(os.environ.get("ASYNC_AUTOCOMPLETE_TIMEOUT", "2"))
+ASYNC_BATCH_CONCURRENCY = int(os.environ.get("ASYNC_BATCH_CONCURRENCY", "2"))
+ASYNC_BATCH_TIMEOUT = float(os.environ.get("ASYNC_BATCH_TIMEOUT", "120"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Ontology Search API",
     "DESCRIPTION": "",
@@ -17,22 +17,34 @@ CORS_ORIGIN_ALLOW_ALL = True
 CORS_PREFLIGHT_MAX_AGE = 0  # remove or set higher for production
 CORS_ALLOW_HEADERS = (*default_headers,)
 
-db_options = {}
+db_options = {**DATABASE_OPTIONS}  # noqa: F405
 if os.environ.get("POSTGRES_SCHEMA"):
-    db_options = {"options": f"-c search_path={os.environ.get('POSTGRES_SCHEMA')}"}
+    server_options = [db_options.get("options"), f"-c search_path={os.environ.get('POSTGRES_SCHEMA')}"]
+    db_options["options"] = " ".join(filter(None, server_options))
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "django.db.backends.postgresql",
         "OPTIONS": db_options,
         "NAME": os.environ.get("POSTGRES_DB"),
         "USER": os.environ.get("POSTGRES_USER"),
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("DB_HOST"),
         "PORT": os.environ.get("DB_PORT", "5432"),
+        **DATABASE_CONNECTION,  # noqa: F405
     },
 }
 
+# Shared by every worker and by ingest, which bump the generations the others
+# read (see apps.ontologies.generations). The table is made by createcachetable.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))},
+    }
+}
+
 # Storage, static and media
 STATIC_URL = "/static/"
 STATIC_ROOT = "/usr/src/static/"
@@ -48,6 +60,11 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # for the views with a throttle_scope
+    "DEFAULT_THROTTLE_RATES": {
+        "search-batch": SEARCH_BATCH_THROTTLE_RATE,  # noqa: F405
+        "annotate": ANNOTATE_THROTTLE_RATE,  # noqa: F405
+    },
 }
 
 STORAGES = {